@@ -0,0 +1,88 @@
+"""Window queries on cards with long timelines, the date index of `Card` against a scan of all events.
+
+    python -m benchmarks.bench_card_events [number of cards] [events per card]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from ghsprint.board_card import Card
+from ghsprint.board_stuff import Column
+from ghsprint.issue_event import Event
+
+label2val = {'0': 0, '½': 0.5, '1': 1, '2': 2, '3': 3, '5': 5, '8': 8, '13': 13}
+
+
+def make_card(i: int, num_events: int, start: datetime) -> Card:
+    card = Card(Column(1, {'id': 1, 'name': 'In Progress'}), {
+        'id': i, 'created_at': '2019-01-01T00:00:00Z', 'updated_at': '2019-01-01T00:00:00Z',
+        'content_url': 'https://api.github.com/repos/o/r/issues/{}'.format(i)})
+    events = []
+    for k in range(num_events):
+        date = start + timedelta(minutes=37 * k)
+        kind = random.choice(['labeled', 'labeled', 'unlabeled', 'assigned', 'closed', 'reopened'])
+        ev = {'id': k, 'event': kind, 'created_at': date.strftime('%Y-%m-%dT%H:%M:%SZ')}
+        if kind in ('labeled', 'unlabeled'):
+            ev['label'] = {'name': random.choice(list(label2val) + ['bug', 'on hold'])}
+        events.append(Event(ev, label2val))
+    card.set_events(events)
+    return card
+
+
+# the scans the index replaces
+def scan_pokered_value(card: Card, start: datetime, end: datetime):
+    vals = [e.label_val for e in card.events if start <= e.date <= end and e.label_val]
+    return vals[0] if vals else None
+
+
+def scan_current_value(card: Card):
+    vals = [e.label_val for e in card.events if e.label_val]
+    return vals[-1] if vals else None
+
+
+def scan_state(card: Card):
+    return next((ev.event for ev in card.events[::-1] if ev.event in ['reopened', 'closed']), 'open')
+
+
+def run(cards, windows, pokered_value, current_value, state) -> float:
+    begin = perf_counter()
+    for card in cards:
+        for start, end in windows:
+            pokered_value(card, start, end)
+        current_value(card)
+        state(card)
+    return perf_counter() - begin
+
+
+def main(num_cards=200, num_events=2000):
+    random.seed(0)
+    start = datetime(2019, 1, 1)
+    cards = [make_card(i, num_events, start) for i in range(num_cards)]
+    # the windows of one report: leftovers, pokered, repokered for the classification and again for rendering
+    sprint_start = start + timedelta(minutes=37 * num_events // 2)
+    sprint_end = sprint_start + timedelta(days=6)
+    windows = [(sprint_start - timedelta(days=1), sprint_start), (sprint_start, sprint_start + timedelta(hours=8)),
+               (sprint_end - timedelta(hours=12), sprint_end), (sprint_end - timedelta(hours=5), sprint_end)] * 2
+
+    for card in cards:
+        for window in windows:
+            assert card.get_pokered_value(*window) == scan_pokered_value(card, *window)
+        assert card.get_current_value() == scan_current_value(card)
+        assert card.get_state() == scan_state(card)
+
+    scan = run(cards, windows, scan_pokered_value, scan_current_value, scan_state)
+    index = run(cards, windows, Card.get_pokered_value, Card.get_current_value, Card.get_state)
+    begin = perf_counter()
+    for card in cards:
+        card.set_events(card.events)
+    build = perf_counter() - begin
+
+    print('{} cards with {} events, {} windows per card'.format(num_cards, num_events, len(windows)))
+    print('scan:\t{:.3f}s'.format(scan))
+    print('index:\t{:.3f}s (building the index: {:.3f}s)'.format(index, build))
+    print('speedup:\t{:.0f}x'.format(scan / index))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
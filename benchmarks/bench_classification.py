@@ -0,0 +1,69 @@
+"""Sorting the cards of a large board into stories, `Sprint.set_stories` against the former list scans.
+
+    python -m benchmarks.bench_classification [number of cards]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from ghsprint.board_card import Card
+from ghsprint.board_stuff import Column
+from ghsprint.issue_event import Event
+from ghsprint.sprint import Sprint
+
+label2val = {'1': 1, '2': 2, '3': 3, '5': 5, '8': 8}
+
+
+def make_cards(num_cards: int, sprint: Sprint):
+    cols = [Column(1, {'id': i, 'name': name}) for i, name in enumerate(['In Progress', 'Review', 'Done'])]
+    cards = []
+    for i in range(num_cards):
+        card = Card(random.choice(cols), {
+            'id': i, 'created_at': '2019-01-01T00:00:00Z', 'updated_at': '2019-01-01T00:00:00Z',
+            'content_url': 'https://api.github.com/repos/o/r/issues/{}'.format(i)})
+        events = []
+        for k in range(random.randint(0, 6)):
+            date = sprint.date_start + timedelta(hours=random.randint(-48, 7 * 24))
+            events.append(Event({'event': 'labeled', 'created_at': date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                 'label': {'name': random.choice(list(label2val))}}, label2val))
+        card.set_events(sorted(events, key=lambda e: e.date))
+        cards.append(card)
+    # the same story on the board twice
+    return cards + random.sample(cards, num_cards // 100)
+
+
+def scan_stories(sprint: Sprint, all_cards):
+    """The classification before `set_stories`."""
+    leftover = [c for c in all_cards if c.has_label_val_created_within(sprint.date_start-timedelta(days=1), sprint.date_start)]
+    pokered = [c for c in all_cards if c.has_label_val_created_within(sprint.date_start, sprint.date_start+timedelta(hours=8))]
+    stale = [c for c in all_cards if c.col.name in sprint.ghh.cols_keep and c not in pokered and c not in leftover]
+    repokered = [c for c in all_cards if c.has_label_val_created_within(sprint.date_end-timedelta(hours=12), sprint.date_end)]
+    return leftover, pokered, stale, repokered
+
+
+def main(num_cards=10000):
+    random.seed(0)
+    sprint = Sprint('token', ['o/r'], 'Board', '', 'In Progress,Review', login_name_mapper='a:A', week_number=10)
+    cards = make_cards(num_cards, sprint)
+
+    begin = perf_counter()
+    expected = scan_stories(sprint, cards)
+    scan = perf_counter() - begin
+
+    begin = perf_counter()
+    sprint.set_stories(cards)
+    sweep = perf_counter() - begin
+
+    result = (sprint.all_pokered_leftover, sprint.all_pokered_cards, sprint.all_stale_cards, sprint.all_repokered_cards)
+    for got, scanned in zip(result, expected):
+        assert got == list(dict.fromkeys(scanned))
+
+    print('{} cards: {} leftover, {} pokered, {} unchanged, {} repokered'.format(len(cards), *(len(r) for r in result)))
+    print('scan:\t{:.3f}s'.format(scan))
+    print('sweep:\t{:.3f}s'.format(sweep))
+    print('speedup:\t{:.0f}x'.format(scan / sweep))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,58 @@
+"""Startup time of the CLI, based on `python -X importtime -m ghsprint --help`.
+
+    python -m benchmarks.bench_import_time [--runs 5] [--budget-ms 100]
+
+Fails with exit code 1 if the imports take longer than the budget or if one of the heavy dependencies, which are only
+needed to fetch data or to write the report, is imported for `--help`.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+# modules that must not be imported at startup
+lazy_modules = ['rake_nltk', 'nltk', 'tqdm', 'dateutil', 'requests', 'urllib3', 'aiohttp']
+
+_line_pattern = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def import_times(args):
+    """The top level imports of the CLI with their cumulative time in µs, and all imported modules."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'ghsprint'] + args, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    top_level, modules = [], []
+    for match in _line_pattern.finditer(out):
+        _, cumulative, indent, module = match.groups()
+        modules.append(module)
+        if not indent:
+            top_level.append((module, int(cumulative)))
+    # everything before the first import of the package is the start of the interpreter
+    first = next(i for i, (module, _) in enumerate(top_level) if module.startswith('ghsprint'))
+    return top_level[first:], modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=100)
+    args = parser.parse_args()
+
+    runs = [import_times(['--help']) for _ in range(args.runs)]
+    totals = [sum(cumulative for _, cumulative in top_level) / 1000 for top_level, _ in runs]
+    total = statistics.median(totals)
+    top_level, modules = runs[totals.index(total)] if total in totals else runs[0]
+
+    print('import time of `python -m ghsprint --help`:\t{:.1f}ms (median of {} runs, budget {:.0f}ms)'.format(total, args.runs, args.budget_ms))
+    for module, cumulative in sorted(top_level, key=lambda m: m[1], reverse=True)[:10]:
+        print('  {:>8.1f}ms  {}'.format(cumulative / 1000, module))
+
+    eager = sorted(set(m.split('.')[0] for m in modules) & set(lazy_modules))
+    if eager:
+        print('imported at startup, but should be imported lazily: {}'.format(', '.join(eager)))
+    if eager or total > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
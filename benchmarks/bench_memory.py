@@ -0,0 +1,132 @@
+"""Memory of a decoded board with 20k timeline events, the `__slots__` models against the former `__dict__` models.
+
+    python -m benchmarks.bench_memory [number of cards] [events per card]
+"""
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from ghsprint.issue import Issue, states
+from ghsprint.issue_event import Event
+from ghsprint.repo_stuff import Repo
+from ghsprint.utils import str2date
+
+label2val = {'1': 1, '2': 2, '3': 3, '5': 5, '8': 8}
+
+
+def user(login: str) -> dict:
+    # the user object GitHub sends with every event, issue and assignee
+    return {'login': login, 'id': 1234, 'node_id': 'MDQ6VXNlcjEyMzQ=', 'avatar_url': 'https://avatars.githubusercontent.com/u/1234?v=4',
+            'gravatar_id': '', 'url': 'https://api.github.com/users/' + login, 'html_url': 'https://github.com/' + login,
+            'type': 'User', 'site_admin': False}
+
+
+def timeline_page(card: int, num_events: int) -> bytes:
+    start = datetime(2019, 6, 1)
+    events = []
+    for k in range(num_events):
+        ev = {'id': card * 10000 + k, 'node_id': 'MDEyOkxhYmVsZWRFdmVudDEyMzQ=', 'url': 'https://api.github.com/repos/o/r/issues/events/1',
+              'actor': user('alice'), 'commit_id': None, 'commit_url': None,
+              'created_at': (start + timedelta(minutes=k * 7)).strftime('%Y-%m-%dT%H:%M:%SZ')}
+        kind = random.choice(['labeled', 'assigned', 'cross-referenced'])
+        ev['event'] = kind
+        if kind == 'labeled':
+            ev['label'] = {'name': random.choice(list(label2val)), 'color': 'ededed'}
+        elif kind == 'assigned':
+            ev['assignee'] = user('bob')
+        else:
+            ev['source'] = {'type': 'issue', 'issue': {
+                'repository_url': 'https://api.github.com/repos/o/r', 'number': k, 'title': 'Fix the widget',
+                'state': 'open', 'pull_request': {'url': 'https://api.github.com/repos/o/r/pulls/1'}, 'user': user('carol'),
+                'labels': [{'name': 'bug', 'color': 'ff0000', 'description': 'something is broken'}],
+                'body': 'Some description of the change.\r\n- closes #{}\r\n'.format(card) + 'details ' * 150}}
+        events.append(ev)
+    return json.dumps(events).encode()
+
+
+def issue_page(number: int) -> bytes:
+    return json.dumps({'id': number, 'number': number, 'title': 'Story {}'.format(number), 'html_url': 'https://github.com/o/r/issues/1',
+                       'state': 'open', 'closed_at': None, 'user': user('alice'), 'assignees': [user('alice'), user('bob')],
+                       'labels': [{'id': 1, 'node_id': 'MDU6TGFiZWwx', 'url': 'https://api.github.com/repos/o/r/labels/3',
+                                   'name': '3', 'color': 'ededed', 'default': False, 'description': 'story points'}],
+                       'body': 'As a user I want ' + 'widgets ' * 200}).encode()
+
+
+class LegacyEvent(object):
+    """`Event` before `__slots__`, it kept the body of cross-referenced issues."""
+
+    def __init__(self, ev, label2val: dict = {}):
+        self.date = str2date(ev['created_at'])
+        self.id = ev.get('id', None)
+        self.event = ev['event']
+        self.label = ev.get('label', {}).get('name', None)
+        self.label_val = label2val.get(self.label, None)
+        self.assignee = ev.get('assignee', {}).get('login', None)
+        src = ev.get('source', {})
+        issue = src.get('issue', {})
+        self.source_title = None
+        self.source_number = None
+        self.source_closed_at = None
+        self.source_state = None
+        self.source_is_pr = None
+        self.source_repo = None
+        if src:
+            owner, repo = issue['repository_url'].split('/')[-2:]
+            self.source_repo = Repo(owner, repo)
+            self.source_title = issue.get('title', None)
+            self.source_number = issue.get('number', None)
+            self.source_state = states[issue.get('state', None)]
+            self.source_is_pr = 'pull_request' in issue
+            self.source_body = issue['body']
+
+
+class LegacyIssue(object):
+    """`Issue` before `__slots__`, it kept the full assignee and label objects."""
+
+    def __init__(self, repo: Repo, issue_dict: dict):
+        self.repo = repo
+        self.closed_at = str2date(issue_dict.get('closed_at', None))
+        self.id = issue_dict.get('id', None)
+        self.number = issue_dict.get('number', None)
+        self.title = issue_dict.get('title', None)
+        self.url = issue_dict.get('html_url', None)
+        self.assignees = issue_dict.get('assignees', [])
+        self.labels = issue_dict.get('labels', [])
+        self.state = states[issue_dict['state']]
+
+
+def decode(timelines, issues, event_cls, issue_cls):
+    repo = Repo('o', 'r')
+    return [([event_cls(ev, label2val) for ev in json.loads(timeline)], issue_cls(repo, json.loads(issue)))
+            for timeline, issue in zip(timelines, issues)]
+
+
+def measure(timelines, issues, event_cls, issue_cls):
+    gc.collect()
+    tracemalloc.start()
+    board = decode(timelines, issues, event_cls, issue_cls)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del board
+    return retained, peak
+
+
+def main(num_cards=200, num_events=100):
+    random.seed(0)
+    timelines = [timeline_page(card, num_events) for card in range(num_cards)]
+    issues = [issue_page(card) for card in range(num_cards)]
+
+    legacy = measure(timelines, issues, LegacyEvent, LegacyIssue)
+    slots = measure(timelines, issues, Event, Issue)
+    mb = 1024 * 1024
+    print('{} cards with {} events ({:.1f} MB of JSON)'.format(num_cards, num_events * num_cards, sum(map(len, timelines + issues)) / mb))
+    print('dict models:\tretained {:.1f} MB, peak {:.1f} MB'.format(legacy[0] / mb, legacy[1] / mb))
+    print('slots models:\tretained {:.1f} MB, peak {:.1f} MB'.format(slots[0] / mb, slots[1] / mb))
+    print('retained:\t-{:.0f}%'.format(100 - 100 * slots[0] / legacy[0]))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,255 @@
+"""Scalability of a full run, `fetch_all_data` and `print_report` on generated boards served by the local fake GitHub.
+
+    python -m benchmarks.bench_scale [--cards 100,1000,10000] [--latency 0.02] [--out results.json] [--compare baseline.json]
+
+Every scale is fetched by a fresh interpreter from a fake GitHub (`ghsprint.fake_github`) running in another process,
+so the wall time, CPU time, peak memory and requests of every phase are those of the client alone. The results are
+written as JSON with `--out`. `--compare` prints the change against the results of another version and fails with
+exit code 1 if a phase got slower or bigger by more than `--threshold`, or sent more requests.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import threading
+import urllib.request
+from time import perf_counter, process_time
+
+mb = 1024 * 1024
+default_columns = ['Backlog', 'Ready', 'In Progress', 'Review', 'Done']
+# the metrics of a phase compared between two versions with the smallest change that counts, the requests have to be the same
+compared_metrics = {'wall_s': 0.05, 'cpu_s': 0.05, 'peak_rss_mb': 1.0}
+
+_timing_pattern = re.compile(r'time for (.+?):\t([\d.]+)s')
+
+
+class MemorySampler(object):
+    """Peak resident memory of this process since the last `reset`, sampled every `interval` seconds.
+
+    Without `/proc` (not on Linux) the peak of the whole process is reported instead.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.has_proc = os.path.exists('/proc/self/statm')
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if self.has_proc else 0
+        self.peak = self.rss()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+
+    def rss(self) -> int:
+        if not self.has_proc:
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # kilobytes on Linux, bytes on macOS
+            return maxrss if sys.platform == 'darwin' else maxrss * 1024
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * self.page_size
+
+    def reset(self):
+        self.peak = self.rss()
+
+    def sample(self) -> int:
+        self.peak = max(self.peak, self.rss())
+        return self.peak
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def start(self) -> 'MemorySampler':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+class TimingCollector(logging.Handler):
+    """Collects the durations of the pipeline tasks logged by `fetch_all_data`."""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.timings = {}
+
+    def emit(self, record):
+        match = _timing_pattern.match(record.getMessage())
+        if match:
+            self.timings[match.group(1)] = float(match.group(2))
+
+
+def run_scale(settings: dict) -> dict:
+    """Runs one scale in this interpreter, `settings` are those of the worker, see `main`."""
+    sampler = MemorySampler().start()
+    phases = {}
+    client = None
+
+    @contextlib.contextmanager
+    def phase(name):
+        requests = client.num_requests if client else 0
+        sampler.reset()
+        wall, cpu = perf_counter(), process_time()
+        result = phases[name] = {}
+        yield result
+        result.update({'wall_s': perf_counter() - wall, 'cpu_s': process_time() - cpu, 'peak_rss_mb': sampler.sample() / mb,
+                       'requests': (client.num_requests if client else 0) - requests})
+
+    with phase('setup'):
+        from ghsprint.sprint import Sprint
+
+        sprint = Sprint('benchmark', settings['repos'], settings['project_name'], ignore_columns='', keep_columns=settings['keep_columns'],
+                        max_workers=settings['max_workers'], api_url=settings['api_url'])
+        client = sprint.ghh.client
+    # the log of the sprint goes to stdout, which is the result of the worker
+    collector = TimingCollector()
+    sprint.logger.handlers = [collector]
+
+    with phase('fetch') as result:
+        sprint.fetch_all_data(engine=settings['engine'])
+        result['pipeline'] = collector.timings
+    with phase('report') as result:
+        report = sprint.print_report()
+        result['report_bytes'] = len(report.encode())
+    sampler.stop()
+
+    return {'phases': phases, 'stories': len(sprint.cards_with_issues), 'prs': len(sprint.prs),
+            'total': {'wall_s': sum(p['wall_s'] for p in phases.values()), 'cpu_s': sum(p['cpu_s'] for p in phases.values()),
+                      'peak_rss_mb': max(p['peak_rss_mb'] for p in phases.values()), 'requests': client.num_requests}}
+
+
+def start_fake(args, num_cards: int):
+    """Starts the fake GitHub with a board of `num_cards` in another process, returns the process, its url, the
+    seconds it took to generate the board and the names of the columns."""
+    columns = default_columns if args.columns == len(default_columns) else ['Column {}'.format(i + 1) for i in range(args.columns)]
+    command = [sys.executable, '-m', 'ghsprint.fake_github', '--port', '0', '--repos', ','.join(repo_names(args)),
+               '--columns', ','.join(columns), '--cards', str(num_cards), '--events-per-card', str(args.events_per_card),
+               '--prs', str(max(int(num_cards * args.prs_per_card), 1)), '--reviews-per-pr', str(args.reviews_per_pr),
+               '--latency', str(args.latency), '--jitter', str(args.jitter), '--rate-limit', '0', '--seed', str(args.seed)]
+    start = perf_counter()
+    fake = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True)
+    line = fake.stdout.readline()
+    match = re.match(r'serving on (\S+),', line)
+    if not match:
+        fake.kill()
+        raise RuntimeError('the fake GitHub did not start: {}'.format(line or fake.wait()))
+    return fake, match.group(1), perf_counter() - start, columns
+
+
+def repo_names(args):
+    return ['repo{}'.format(i + 1) for i in range(args.repos)]
+
+
+def measure(args, num_cards: int) -> dict:
+    fake, url, generate_s, columns = start_fake(args, num_cards)
+    try:
+        settings = {'api_url': url, 'repos': ['acme/' + repo for repo in repo_names(args)], 'project_name': 'Sprint Board',
+                    'keep_columns': ','.join(columns[2:-1]), 'max_workers': args.max_workers, 'engine': args.engine}
+        worker = subprocess.run([sys.executable, '-m', 'benchmarks.bench_scale', '--worker', json.dumps(settings)],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=dict(os.environ, TQDM_DISABLE='1'))
+        if worker.returncode != 0:
+            raise RuntimeError('the run of {} cards failed:\n{}'.format(num_cards, worker.stderr))
+        result = json.loads(worker.stdout.strip().splitlines()[-1])
+        with urllib.request.urlopen(url + '/_fake/stats') as r:
+            server = json.loads(r.read())
+    finally:
+        fake.terminate()
+        fake.wait()
+    return dict({'cards': num_cards, 'columns': len(columns), 'events_per_card': args.events_per_card,
+                 'prs': max(int(num_cards * args.prs_per_card), 1), 'reviews_per_pr': args.reviews_per_pr, 'generate_s': generate_s,
+                 'server': {'requests': server['requests'], 'mb': server['bytes'] / mb, 'by_status': server['by_status']}}, **result)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'describe', '--always', '--dirty'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def print_results(results: list):
+    print('{:>7} {:>7} {:>9} {:>9} {:>10} {:>8}   {}'.format('cards', 'phase', 'wall s', 'cpu s', 'peak MB', 'requests', 'slowest pipeline tasks'))
+    for result in results:
+        for name, p in list(result['phases'].items()) + [('total', result['total'])]:
+            slowest = sorted(p.get('pipeline', {}).items(), key=lambda item: -item[1])[:3]
+            print('{:>7} {:>7} {:>9.2f} {:>9.2f} {:>10.1f} {:>8}   {}'.format(
+                result['cards'], name, p['wall_s'], p['cpu_s'], p['peak_rss_mb'], p['requests'],
+                ', '.join('{} {:.1f}s'.format(task, seconds) for task, seconds in slowest)))
+
+
+def compare(results: list, baseline: dict, threshold: float) -> int:
+    """Prints the change of every phase against `baseline`, returns the number of regressions."""
+    base = {result['cards']: result for result in baseline['results']}
+    print('against {} ({})'.format(baseline['environment'].get('commit'), baseline['environment'].get('python')))
+    regressions = 0
+    for result in results:
+        if result['cards'] not in base:
+            continue
+        old = base[result['cards']]
+        for name, p in list(result['phases'].items()) + [('total', result['total'])]:
+            old_p = old['total'] if name == 'total' else old['phases'].get(name)
+            if old_p is None:
+                continue
+            changes = []
+            for metric, min_change in compared_metrics.items():
+                change = p[metric] / old_p[metric] - 1 if old_p[metric] else 0
+                worse = change > threshold and p[metric] - old_p[metric] > min_change
+                regressions += worse
+                changes.append('{} {:+.0%}{}'.format(metric, change, ' !' if worse else ''))
+            if p['requests'] > old_p['requests']:
+                regressions += 1
+                changes.append('requests {} > {} !'.format(p['requests'], old_p['requests']))
+            print('{:>7} {:>7}   {}'.format(result['cards'], name, ', '.join(changes)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', default='100,1000,10000', help='numbers of cards of the boards, separated by commas, e.g. 100,1000,10000,50000')
+    parser.add_argument('--columns', type=int, default=5)
+    parser.add_argument('--events-per-card', type=int, default=8)
+    parser.add_argument('--prs-per-card', type=float, default=0.3)
+    parser.add_argument('--reviews-per-pr', type=int, default=2)
+    parser.add_argument('--repos', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds every response of the fake GitHub is delayed')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--engine', default='threads', choices=['threads', 'async', 'graphql'])
+    parser.add_argument('--max-workers', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change of a phase that counts as regression')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scale(json.loads(args.worker))))
+        return
+
+    results = []
+    for num_cards in (int(n) for n in args.cards.split(',')):
+        results.append(measure(args, num_cards))
+        print('{} cards: {:.1f}s, {} requests'.format(num_cards, results[-1]['total']['wall_s'], results[-1]['total']['requests']), file=sys.stderr)
+    print_results(results)
+
+    settings = {name: value for name, value in vars(args).items() if name not in ('out', 'compare', 'threshold', 'worker')}
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'environment': environment(), 'settings': settings, 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print('{} regressions'.format(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Parsing the timestamps of a run, `utils.str2date` against `datetime.strptime`.
+
+    python -m benchmarks.bench_str2date [number of timestamps]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from ghsprint.utils import _parse_date, str2date
+
+
+def strptime_str2date(input: str):
+    """`str2date` before the fast path."""
+    if input:
+        return datetime.strptime(input, '%Y-%m-%dT%H:%M:%SZ')
+    return None
+
+
+def main(num_timestamps=200000):
+    random.seed(0)
+    start = datetime(2019, 6, 1)
+    # timestamps repeat a lot, e.g. `created_at` of the cards or the `updated_at` of issues changed in one bulk edit
+    distinct = [(start + timedelta(seconds=random.randint(0, 90 * 24 * 3600))).strftime('%Y-%m-%dT%H:%M:%SZ') for _ in range(num_timestamps // 4)]
+    timestamps = [random.choice(distinct) for _ in range(num_timestamps)]
+
+    for ts in distinct[:1000]:
+        assert str2date(ts) == strptime_str2date(ts)
+
+    begin = perf_counter()
+    for ts in timestamps:
+        strptime_str2date(ts)
+    strptime = perf_counter() - begin
+
+    _parse_date.cache_clear()
+    begin = perf_counter()
+    for ts in timestamps:
+        str2date(ts)
+    fast = perf_counter() - begin
+
+    _parse_date.cache_clear()
+    begin = perf_counter()
+    for ts in distinct:
+        str2date(ts)
+    uncached = perf_counter() - begin
+
+    print('{} timestamps, {} distinct'.format(len(timestamps), len(distinct)))
+    print('strptime:\t{:.3f}s'.format(strptime))
+    print('str2date:\t{:.3f}s ({:.0f}x), distinct only without cache hits: {:.3f}s ({:.0f}x)'.format(
+        fast, strptime / fast, uncached, strptime * len(distinct) / len(timestamps) / uncached))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
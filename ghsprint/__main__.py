@@ -1,15 +1,12 @@
-import concurrent.futures
-import datetime
+import contextlib
 import os
-import sys
-import typing
-from datetime import date, datetime, timedelta
-from time import time
-from typing import List, Tuple, TypeVar
 
 import click
 
-from ghsprint.sprint import Sprint
+from ghsprint.http_cache import DEFAULT_CACHE_DIR
+from ghsprint.keywords import DEFAULT_KEYWORD_CACHE_PATH
+from ghsprint.store import DEFAULT_STORE_PATH
+from ghsprint.utils import parse_weeks
 
 os.putenv('PYTHONIOENCODING', 'UTF-8')
 
@@ -18,20 +15,72 @@ os.putenv('PYTHONIOENCODING', 'UTF-8')
 @click.option('--ignore-columns', default='', help='list of columns names to ignore, separated by commas')
 @click.option('-v', '--verbose', count=True)
 @click.option('-w', '--week')
+@click.option('--weeks', callback=parse_weeks, help='calendar weeks like `30-42` or `30,32,35`, one report per week from a single fetch')
 @click.option('--keep-columns', default='', help='list of columns names to always have in report, separated by commas')
 @click.option('--login-name-mapper', default='', help='<login>:<name>,...')
 @click.option('--special-tags', default='', help='<tag string>,...')
+@click.option('--engine', type=click.Choice(['threads', 'async', 'graphql']), default='threads',
+              help='how data is fetched, `async` requires aiohttp, `graphql` fetches in bulk through the GraphQL API')
+@click.option('--api-url', default='https://api.github.com', show_default=True, help='base url of the REST API')
+@click.option('--graphql-url', default=None, help='url of the GraphQL API, default is <api-url>/graphql')
+@click.option('--cache-dir', default=DEFAULT_CACHE_DIR, show_default=True, help='directory of the http response cache')
+@click.option('--cache-size', default=256, show_default=True, help='maximal size of the http response cache in MB')
+@click.option('--no-cache', is_flag=True, help='do not cache http responses')
+@click.option('--incremental', is_flag=True, help='fetch only what changed since the last run, the rest is taken from the local store')
+@click.option('--store', default=DEFAULT_STORE_PATH, show_default=True, help='SQLite file of the local store used by --incremental')
+@click.option('--keywords', type=click.Choice(['degree', 'rake']), default='degree',
+              help='how the keywords of the report title are found, `rake` requires rake-nltk and the NLTK data')
+@click.option('--keyword-cache', default=DEFAULT_KEYWORD_CACHE_PATH, show_default=True, help='file of the keywords of every title, kept across runs')
+@click.option('--record', type=click.Path(dir_okay=False), help='record all requests with their responses to this cassette file, without the token')
+@click.option('--replay', type=click.Path(exists=True, dir_okay=False), help='take all responses from this cassette file, nothing is sent')
+@click.option('--max-workers', default=50, help='number of concurrent requests, also the size of the connection pool')
+@click.option('--metrics-out', multiple=True, type=click.Path(dir_okay=False),
+              help='write the requests of the run by endpoint to this file, as Prometheus textfile if it ends with `.prom`, as JSON otherwise')
+@click.option('--trace-out', type=click.Path(dir_okay=False),
+              help='write spans of the run (phases, calls, requests, report sections) to this file as Chrome trace events, e.g. for Perfetto')
+@click.option('--profile', type=click.Path(dir_okay=False),
+              help='profile the run with cProfile in all threads, write the stats sorted by cumulative time to this file, '
+                   'in the binary pstats format if it ends with `.prof`')
 @click.argument('access-token')
 @click.argument('project-name')
 @click.argument('repos', nargs=-1)
-def start_sprint(access_token, repos, project_name, ignore_columns, keep_columns, verbose, week, login_name_mapper, special_tags):
+def start_sprint(access_token, repos, project_name, ignore_columns, keep_columns, verbose, week, login_name_mapper, special_tags, max_workers, engine,
+                 api_url, graphql_url, cache_dir, cache_size, no_cache, incremental, store, keywords, keyword_cache, weeks, record, replay, metrics_out,
+                 trace_out, profile):
     """Fetches all data from github to create the sprint report."""
+    from ghsprint import tracing
+    from ghsprint.sprint import Sprint
+
+    if record and replay:
+        raise click.UsageError('use either --record or --replay')
+
     if week:
         week = int(week)
-    sp = Sprint(access_token, repos, project_name, ignore_columns, keep_columns, login_name_mapper=login_name_mapper, week_number=week, verbosity=verbose, special_tags=special_tags)
-    sp.fetch_all_data()
-    report = sp.print_report()
-    print(report)
+    elif weeks:
+        week = weeks[0]
+
+    def run():
+        sp = Sprint(access_token, repos, project_name, ignore_columns, keep_columns, login_name_mapper=login_name_mapper, week_number=week, verbosity=verbose,
+                    special_tags=special_tags, max_workers=max_workers, cache_dir=None if no_cache else cache_dir, cache_size=cache_size,
+                    api_url=api_url, graphql_url=graphql_url, store_path=store,
+                    keyword_engine=keywords, keyword_cache_path=None if no_cache else keyword_cache, weeks=weeks,
+                    record_path=record, replay_path=replay)
+        sp.fetch_all_data(engine=engine, incremental=incremental)
+        if weeks:
+            print('\n\n'.join(sp.print_reports()))
+        else:
+            report = sp.print_report()
+            print(report)
+        # written after the report, the requests of the report (PRs not fetched before) are included
+        for path in metrics_out:
+            sp.ghh.metrics.write(path, labels={'project': project_name})
+
+    with contextlib.ExitStack() as stack:
+        if trace_out:
+            stack.enter_context(tracing.tracing(trace_out))
+        if profile:
+            stack.enter_context(tracing.profiling(profile))
+        run()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,240 @@
+import asyncio
+import json
+from datetime import datetime
+from time import perf_counter
+from typing import List
+
+from .board_card import Card
+from .board_stuff import Column
+from .ghdriver import GithubHelper, PageError, _page_number, _with_page, logger
+from .issue import Issue
+from .issue_event import Event
+from .pr_stuff import PR, Review
+from .rate_limit import _int_header
+from .http_cache import strip_token
+from .utils import str2date
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncGithubHelper(object):
+    """Issues the requests of a `GithubHelper` with asyncio, all of them share one semaphore of `concurrency` slots.
+
+    Use it as async context manager, the underlying `aiohttp.ClientSession` lives as long as the context.
+    The response cache of the helper's client is used the same way as by the threaded engine.
+    """
+
+    def __init__(self, ghh: GithubHelper, concurrency=200, retries=3, backoff_factor=1.0, status_forcelist=(500, 502, 504)):
+        if aiohttp is None:
+            raise RuntimeError('the async engine requires aiohttp, install it with `pip install ghsprint[async]`')
+        self.ghh = ghh
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+        self.num_requests = 0
+        self.cache = ghh.client.cache
+        self.limiter = ghh.client.limiter
+        self.throttle_retries = ghh.client.throttle_retries
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._slot_freed = asyncio.Event()
+        self._flights = {}
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def _acquire(self):
+        """Waits for a slot of the rate limiter without blocking the event loop."""
+        while True:
+            self._slot_freed.clear()
+            if self.limiter.try_acquire():
+                return
+            try:
+                await asyncio.wait_for(self._slot_freed.wait(), timeout=self.limiter.delay() or 1.0)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _get(self, url, headers=None, params=None):
+        """Returns status, decoded json (None if not 200) and the parsed `Link` header of a GET request.
+
+        Identical requests in flight are sent once, like by `HTTPClient.get`, but in a map of tasks of the event loop:
+        the flights of the client are waited for by blocking a thread. Everything is requested concurrently here, so
+        the responses received before are not kept.
+        """
+        key = (url, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = asyncio.ensure_future(self._send(url, headers=headers, params=params))
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            with self.ghh.client._lock:
+                self.ghh.client.num_saved += 1
+        # a cancelled caller does not cancel the request of the others
+        return await asyncio.shield(flight)
+
+    async def _send(self, url, headers=None, params=None):
+        for attempt in range(self.throttle_retries + 1):
+            await self._acquire()
+            try:
+                status, data, links, headers_in, text = await self._get_once(url, headers=headers, params=params, throttled=attempt > 0)
+            finally:
+                self.limiter.release()
+                self._slot_freed.set()
+            if self.limiter.observe(status, headers_in, text) is None:
+                break
+        return status, data, links
+
+    async def _get_once(self, url, headers=None, params=None, throttled=False):
+        # the cache reads and writes files, it is used from the default executor, not in the event loop
+        loop = asyncio.get_running_loop()
+        entry = None
+        if self.cache is not None:
+            key = self.cache.key(url, params, headers)
+            entry = await loop.run_in_executor(None, self.cache.load, key)
+            if entry:
+                headers = dict(headers or {}, **self.cache.conditional_headers(entry))
+
+        def observe(status, num_bytes=0, remaining=None):
+            self.ghh.metrics.observe('GET', url, status, perf_counter() - start, num_bytes=num_bytes, retries=attempt + int(throttled), remaining=remaining)
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff_factor * (2 ** (attempt - 1)))
+            start = perf_counter()
+            try:
+                async with self._semaphore:
+                    self.num_requests += 1
+                    async with self.session.get(url, headers=headers, params=params) as r:
+                        if r.status in self.status_forcelist and attempt < self.retries:
+                            continue
+                        remaining = _int_header(r.headers, 'X-RateLimit-Remaining')
+                        if r.status == 304 and entry:
+                            await loop.run_in_executor(None, self.cache.not_modified, key)
+                            links = self._links(self.cache.restore_links(entry, str(r.url)).get('Link'))
+                            observe(304, remaining=remaining)
+                            return 200, json.loads(entry['body']), links, r.headers, ''
+                        data = None
+                        text = ''
+                        body = b''
+                        if r.status == 200:
+                            body = await r.read()
+                            if self.cache is not None:
+                                await loop.run_in_executor(None, self.cache.store, key, url, r.headers, body)
+                            data = json.loads(body)
+                        elif r.status in (403, 429):
+                            text = await r.text()
+                        links = {rel: str(link['url']) for rel, link in r.links.items()}
+                        observe(r.status, num_bytes=len(body) or len(text), remaining=remaining)
+                        return r.status, data, links, r.headers, text
+            except aiohttp.ClientConnectionError:
+                if attempt == self.retries:
+                    observe('error')
+                    raise
+        return None, None, {}, {}, ''
+
+    @staticmethod
+    def _links(link_header: str) -> dict:
+        links = {}
+        for link in (link_header or '').split(','):
+            if ';' in link:
+                url, rel = link.split(';', 1)
+                links[rel.split('=')[-1].strip(' "')] = url.strip(' <>')
+        return links
+
+    async def _pages(self, data, links, headers=None) -> List[dict]:
+        """Collects the items of the remaining pages given by `links`, concurrently if the `last` page is known.
+
+        Raises `PageError` like `GithubHelper._iter_pages` if one of the pages cannot be fetched.
+        """
+        items = list(data)
+        if 'last' in links:
+            last_url = links['last']
+            first_page = _page_number(links['next']) if 'next' in links else _page_number(last_url) + 1
+            urls = [_with_page(last_url, page) for page in range(first_page, _page_number(last_url) + 1)]
+            pages = await asyncio.gather(*(self._get(url, headers=headers) for url in urls))
+            for url, (status, page_data, _) in zip(urls, pages):
+                self._check_page(url, status)
+                items.extend(page_data)
+            return items
+
+        next_url = links.get('next')
+        while next_url:
+            status, page_data, links = await self._get(next_url, headers=headers)
+            self._check_page(next_url, status)
+            items.extend(page_data)
+            next_url = links.get('next')
+        return items
+
+    @staticmethod
+    def _check_page(url: str, status: int):
+        if status != 200:
+            url = strip_token(url)
+            logger.warning('page %s failed with status %s, the list is incomplete', url, status)
+            raise PageError(url, status)
+
+    async def _paginate(self, url, headers=None, params=None) -> List[dict]:
+        status, data, links = await self._get(url, headers=headers, params=params)
+        if status != 200:
+            logger.warning('%s failed with status %s', strip_token(url), status)
+            return []
+        return await self._pages(data, links, headers=headers)
+
+    async def get_all_projects(self, repo):
+        status, data, _ = await self._get(self.ghh.projects_url(repo), headers=self.ghh.headers)
+        if status == 200:
+            return data
+        raise RuntimeError(f'Connection error fetching projects for {repo}')
+
+    async def get_all_columns(self) -> List[Column]:
+        cols = await self._paginate(self.ghh.columns_url(), headers=self.ghh.headers)
+        return [Column(self.ghh.project_id, col) for col in cols if col['name'] not in self.ghh.cols_ignore]
+
+    async def get_all_cards(self, col: Column) -> List[Card]:
+        return [Card(col, card) for card in await self._paginate(self.ghh.cards_url(col), headers=self.ghh.headers)]
+
+    async def get_all_events(self, issue_num, repo=None) -> List[Event]:
+        headers = self.ghh.timeline_headers
+        repo = repo or self.ghh.route(issue_num)
+        if repo is not None:
+            self.ghh._count_avoided_probes(repo)
+        for candidate in [repo] if repo is not None else self.ghh.repos:
+            status, data, links = await self._get(self.ghh.timeline_url(candidate, issue_num), headers=headers)
+            if status == 200:
+                self.ghh.add_route(candidate, issue_num)
+                return self.ghh.make_events(await self._pages(data, links, headers=headers))
+        return []
+
+    async def get_single_issue_from_card(self, card: Card) -> Issue:
+        status, data, _ = await self._get(self.ghh.issue_url(card.repo, card.issue_num), headers=self.ghh.headers)
+        if status == 200:
+            return self.ghh.register_issue(card.repo, data)
+        return None
+
+    async def get_all_PRs(self, updated_since: datetime = None) -> List[PR]:
+        pull_requests = []
+        for repo in self.ghh.repos:
+            status, data, links = await self._get(self.ghh.pulls_url(repo), headers=self.ghh.headers, params=self.ghh.pulls_params)
+            # PRs are sorted by update, follow the pages one by one until they get too old
+            while status == 200:
+                fresh = [pr_dict for pr_dict in data if not updated_since or str2date(pr_dict['updated_at']) >= updated_since]
+                pull_requests.extend(self.ghh.register_pr(repo, pr_dict) for pr_dict in fresh)
+                if len(fresh) < len(data) or 'next' not in links:
+                    break
+                status, data, links = await self._get(links['next'], headers=self.ghh.headers)
+        return pull_requests
+
+    async def fetch_PR_data(self, pr: PR) -> dict:
+        status, data, _ = await self._get(self.ghh.pull_url(pr.repo, pr.number), headers=self.ghh.headers)
+        if status == 200:
+            return data
+        return None
+
+    async def fetch_PR_reviews(self, pr: PR) -> List[Review]:
+        return [Review(pr, rev) for rev in await self._paginate(self.ghh.reviews_url(pr.repo, pr.number), headers=self.ghh.headers)]
@@ -0,0 +1,125 @@
+"""Reports of several projects in one process, `python -m ghsprint.batch projects.json`.
+
+The config file is a JSON object, every entry of `projects` takes the arguments of the single report::
+
+    {
+        "access_token": "...",
+        "max_workers": 50,
+        "projects": [
+            {"name": "team-a", "project_name": "Storyboard", "repos": ["company/some-service"], "keep_columns": "In Progress"},
+            {"name": "team-b", "project_name": "Board B", "repos": ["company/other-service", "company/some-service"],
+             "ignore_columns": "Product Backlog", "login_name_mapper": "alxndrjhn:Alex", "week": 6}
+        ]
+    }
+
+All projects are fetched concurrently through one client, they share its connection pool, the response cache, the
+deduplication of identical requests (e.g. the PRs of a repo used by several teams) and the rate-limit budget.
+"""
+import concurrent.futures
+import json
+import os
+import sys
+from time import time
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import click
+
+from .http_cache import DEFAULT_CACHE_DIR
+
+# settings of a project, a value given at the top level of the config is the default of every project
+project_settings = ('access_token', 'project_name', 'repos', 'ignore_columns', 'keep_columns', 'login_name_mapper', 'special_tags', 'week', 'weeks')
+
+
+def load_config(path: str) -> List[dict]:
+    """The projects of the config file, with the defaults of the top level applied."""
+    with open(path) as f:
+        config = json.load(f)
+    defaults = {key: config[key] for key in project_settings if key in config}
+    projects = []
+    for i, project in enumerate(config.get('projects', [])):
+        project = dict(defaults, **project)
+        project.setdefault('name', project.get('project_name', str(i)))
+        for key in ('access_token', 'project_name', 'repos'):
+            if not project.get(key):
+                raise ValueError('project `{}` has no `{}`'.format(project['name'], key))
+        projects.append(project)
+    if len({p['name'] for p in projects}) != len(projects):
+        raise ValueError('the names of the projects are not unique')
+    return projects
+
+
+def run_batch(projects: List[dict], output_dir: str, engine='threads', max_workers=50, cache_dir=None, cache_size=256,
+              api_url='https://api.github.com', graphql_url=None, verbosity=0, metrics_out: List[str] = ()) -> Dict[str, str]:
+    """Writes the report of every project to `<output_dir>/<name>.md`, returns the paths by project name.
+
+    The requests of all projects by endpoint are written to every file of `metrics_out`, see `RequestMetrics.write`.
+    """
+    from .request_session import HTTPClient
+    from .http_cache import ResponseCache
+    from .metrics import RequestMetrics
+    from .sprint import Sprint
+
+    cache = ResponseCache(cache_dir, max_bytes=cache_size * 1024 * 1024) if cache_dir else None
+    client = HTTPClient(pool_maxsize=max_workers, cache=cache, metrics=RequestMetrics(urlsplit(api_url).path))
+    sprints = {}
+    for project in projects:
+        sprints[project['name']] = Sprint(
+            project['access_token'], project['repos'], project['project_name'], project.get('ignore_columns', ''), project.get('keep_columns', ''),
+            login_name_mapper=project.get('login_name_mapper', ''), special_tags=project.get('special_tags', ''),
+            week_number=project.get('week') or (project.get('weeks') or [None])[0], weeks=project.get('weeks'),
+            verbosity=verbosity, max_workers=max_workers, api_url=api_url, graphql_url=graphql_url, client=client)
+
+    def run(name: str) -> str:
+        sprint = sprints[name]
+        sprint.fetch_all_data(engine=engine)
+        report = '\n\n'.join(sprint.print_reports()) if sprint.weeks else sprint.print_report()
+        path = os.path.join(output_dir, name + '.md')
+        with open(path, 'w') as f:
+            f.write(report)
+        return path
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time()
+    client.reset()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(sprints) or 1) as executor:
+            paths = dict(zip(sprints, executor.map(run, sprints)))
+    finally:
+        client.close()
+        for path in metrics_out:
+            client.metrics.write(path, labels={'projects': ','.join(sprints)})
+
+    saved = client.num_saved + sum(2 * sprint.ghh.num_registry_hits for sprint in sprints.values())
+    print('{} projects in {:.1f}s, http requests: {}, saved by deduplication: {}'.format(len(sprints), time() - start, client.num_requests, saved),
+          file=sys.stderr)
+    return paths
+
+
+@click.command()
+@click.argument('config', type=click.Path(exists=True, dir_okay=False))
+@click.option('-o', '--output-dir', default='reports', show_default=True, help='directory of the reports, one `<name>.md` per project')
+@click.option('-v', '--verbose', count=True)
+@click.option('--engine', type=click.Choice(['threads', 'async', 'graphql']), default='threads', help='how data is fetched, see `python -m ghsprint --help`')
+@click.option('--api-url', default='https://api.github.com', show_default=True, help='base url of the REST API')
+@click.option('--graphql-url', default=None, help='url of the GraphQL API, default is <api-url>/graphql')
+@click.option('--cache-dir', default=DEFAULT_CACHE_DIR, show_default=True, help='directory of the http response cache')
+@click.option('--cache-size', default=256, show_default=True, help='maximal size of the http response cache in MB')
+@click.option('--no-cache', is_flag=True, help='do not cache http responses')
+@click.option('--max-workers', default=50, help='number of concurrent requests of all projects together, also the size of the connection pool')
+@click.option('--metrics-out', multiple=True, type=click.Path(dir_okay=False),
+              help='write the requests of all projects by endpoint to this file, as Prometheus textfile if it ends with `.prom`, as JSON otherwise')
+def start_batch(config, output_dir, verbose, engine, api_url, graphql_url, cache_dir, cache_size, no_cache, max_workers, metrics_out):
+    """Creates the sprint reports of all projects of the CONFIG file in one process."""
+    try:
+        projects = load_config(config)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='CONFIG')
+    paths = run_batch(projects, output_dir, engine=engine, max_workers=max_workers, cache_dir=None if no_cache else cache_dir,
+                      cache_size=cache_size, api_url=api_url, graphql_url=graphql_url, verbosity=verbose, metrics_out=metrics_out)
+    for name, path in paths.items():
+        print('{}:\t{}'.format(name, path))
+
+
+if __name__ == '__main__':
+    start_batch()
@@ -1,3 +1,4 @@
+from bisect import bisect_left
 from datetime import datetime
 from typing import List, Dict
 
@@ -8,6 +9,9 @@ from .repo_stuff import Repo
 
 
 class Card(object):
+    __slots__ = ('col', 'id', 'created_at', 'updated_at', 'content_url', 'has_issue', 'issue_num', 'repo', 'issue', 'events',
+                 '_value_dates', '_values', '_current_value', '_last_change')
+
     def __init__(self, col: Column, input_dict: dict):
         self.col = col
         self.id = input_dict['id']
@@ -22,7 +26,8 @@ class Card(object):
             self.repo = Repo.from_http(self.content_url)
             self.has_issue = True
             self.issue_num = int(self.content_url.split('/')[-1])
-        self.events = []
+        self.issue = None
+        self.set_events([])
 
     def __str__(self):
         return 'id: {}, issue_num: {}'.format(self.id, self.issue_num)
@@ -30,14 +35,23 @@ class Card(object):
     def __eq__(self, other):
         return isinstance(other, self.__class__) and self.created_at == other.created_at and self.content_url == other.content_url
 
+    def __hash__(self):
+        return hash((self.created_at, self.content_url))
+
     def set_events(self, events: List[Event]):
+        """Sets the events and indexes them, the label values sorted by date for the window queries."""
         self.events = events
 
+        valued = sorted((e for e in events if e.label_val), key=lambda e: e.date)
+        self._value_dates = [e.date for e in valued]
+        self._values = [e.label_val for e in valued]
+        self._current_value = next((e.label_val for e in reversed(events) if e.label_val), None)
+        self._last_change = next((e.event for e in reversed(events) if e.event in ['reopened', 'closed']), None)
+
     def get_state(self):
-        last_change = next((ev.event for ev in self.events[::-1] if ev.event in ['reopened', 'closed']), None)
         state = 'open'
-        if last_change:
-            state = last_change
+        if self._last_change:
+            state = self._last_change
 
         return state
 
@@ -46,19 +60,14 @@ class Card(object):
         return val is not None and val >= min_value
 
     def get_pokered_value(self, start: datetime, end: datetime):
-        vals = [e.label_val for e in self.events if start <=
-                e.date <= end and e.label_val]
-        if len(vals) > 0:
-            return vals[0]
-        else:
-            return None
+        """The first label value set between `start` and `end`, or None."""
+        i = bisect_left(self._value_dates, start)
+        if i < len(self._value_dates) and self._value_dates[i] <= end:
+            return self._values[i]
+        return None
 
     def get_current_value(self):
-        vals = [e.label_val for e in self.events if e.label_val]
-        if len(vals) > 0:
-            return vals[-1]
-        else:
-            return None
+        return self._current_value
 
     def set_issue(self, issue):
         self.issue = issue
@@ -1,6 +1,8 @@
 
 
 class Column(object):
+    __slots__ = ('project_id', 'name', 'id')
+
     def __init__(self, project_id, input_dict: dict):
         self.project_id = project_id
         self.name = input_dict['name']
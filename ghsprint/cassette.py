@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .http_cache import ResponseCache, _token_pattern, strip_token
+
+# the response headers kept in a cassette, everything the client and the rate limiter read
+recorded_headers = ('Content-Type', 'ETag', 'Last-Modified', 'Link', 'Retry-After',
+                    'X-RateLimit-Limit', 'X-RateLimit-Remaining', 'X-RateLimit-Reset', 'X-RateLimit-Used')
+
+
+class Cassette(object):
+    """Recorded requests with their responses, a JSON lines file with one interaction per line.
+
+    In `record` mode every request of the client is sent and written to the file, in `replay` mode the responses
+    are taken from the file and nothing is sent. Requests are matched by method, path and query, `Accept` header and
+    body, not by host, so a cassette recorded against api.github.com can be replayed against any server. The
+    `access_token` is removed from urls and `Link` headers before anything is written. A request made several times
+    gets the recorded responses in the order they were recorded, the last one again once all are used.
+    """
+
+    def __init__(self, path: str, mode='replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'unknown cassette mode `{mode}`')
+        self.path = path
+        self.mode = mode
+        self.interactions: Dict[str, List[dict]] = {}
+        self.num_played = 0
+        self.num_recorded = 0
+        self._lock = threading.Lock()
+        self._next: Dict[str, int] = {}
+        if mode == 'record':
+            self._file = open(path, 'w', buffering=1)
+        else:
+            self._file = None
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self.interactions.setdefault(interaction['key'], []).append(interaction)
+
+    @staticmethod
+    def key(method: str, url: str, params: dict = None, headers: dict = None, json_body=None) -> str:
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'access_token']
+        query = sorted(query + [(k, str(v)) for k, v in (params or {}).items()])
+        key = '{} {}?{} {}'.format(method, parts.path, urlencode(query), (headers or {}).get('Accept', ''))
+        if json_body is not None:
+            key += ' ' + hashlib.sha256(json.dumps(json_body, sort_keys=True).encode()).hexdigest()
+        return key
+
+    def record(self, method: str, url: str, params: dict, headers: dict, json_body, r: requests.Response):
+        response_headers = {name: r.headers[name] for name in recorded_headers if name in r.headers}
+        if 'Link' in response_headers:
+            response_headers['Link'] = _token_pattern.sub('access_token=', response_headers['Link'])
+        line = json.dumps({'key': self.key(method, url, params, headers, json_body), 'url': strip_token(r.url or url), 'status': r.status_code,
+                           'headers': response_headers, 'body': r.content.decode('utf-8', errors='replace')})
+        with self._lock:
+            self._file.write(line + '\n')
+            self.num_recorded += 1
+
+    def find(self, key: str) -> dict:
+        """The next recorded interaction of `key`, or None."""
+        with self._lock:
+            interactions = self.interactions.get(key)
+            if not interactions:
+                return None
+            i = self._next.get(key, 0)
+            self._next[key] = i + 1
+            self.num_played += 1
+        return interactions[min(i, len(interactions) - 1)]
+
+    def play(self, method: str, url: str, params: dict = None, headers: dict = None, json_body=None) -> requests.Response:
+        interaction = self.find(self.key(method, url, params, headers, json_body))
+        if interaction is None:
+            raise RuntimeError('no recorded response for {} {} in {}'.format(method, strip_token(url), self.path))
+        r = requests.Response()
+        r.status_code = interaction['status']
+        r.url = requests.Request(method, url, params=params).prepare().url
+        r.headers = CaseInsensitiveDict(ResponseCache.restore_links(interaction, r.url))
+        r._content = interaction['body'].encode()
+        r.encoding = 'utf-8'
+        return r
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,520 @@
+"""A local fake of the GitHub REST API, `python -m ghsprint.fake_github --cards 1000 --latency 0.05`.
+
+It serves a generated board (`SyntheticBoard`) or the responses of a cassette recorded with `--record`, for the
+endpoints ghsprint uses: projects, columns, cards, issues, timelines, pulls and reviews. The generated board is also
+served by `POST /graphql` for the queries of `--engine graphql` (`BoardGraphQL`). Latency with jitter, server
+errors and the rate limit of GitHub (`X-RateLimit-*` headers, `403` once the budget is used) are simulated, unchanged
+responses are answered with `304` if the request has a matching `If-None-Match`. Point ghsprint to it with
+`--api-url http://127.0.0.1:8000`. `GET /_fake/stats` returns the number of requests by endpoint and status.
+"""
+import collections
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep, time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+from .cassette import Cassette
+from .ghdriver import _with_page
+from .http_cache import ResponseCache
+from .utils import date2str
+
+logins = ['alice', 'bob', 'carol', 'dave', 'erin', 'frank']
+points = ['1', '2', '3', '5', '8', '13']
+words = ['login', 'widget', 'checkout', 'search', 'export', 'payment', 'profile', 'cache', 'timeout', 'migration', 'dashboard',
+         'invoice', 'upload', 'settings', 'report', 'billing', 'onboarding', 'api', 'latency', 'retry', 'import', 'mobile']
+
+
+class SyntheticBoard(object):
+    """A generated project with cards, issues, timelines, PRs and reviews, the same for the same arguments.
+
+    Card `i` is the issue `i // len(repos) + 1` of `repos[i % len(repos)]`, its story points are labeled on the
+    Wednesday of one of the last three sprints. PRs are numbered after the issues of their repo, most of them close
+    an issue of the board and are cross-referenced in its timeline. The first `num_pr_cards` PRs are also on the
+    board, like issue cards. Timelines and issues are built on request, so large boards take little memory.
+    """
+
+    def __init__(self, owner='acme', repos=('api', 'web'), project_name='Sprint Board', columns=('Backlog', 'Ready', 'In Progress', 'Review', 'Done'),
+                 num_cards=200, events_per_card=8, num_prs=100, reviews_per_pr=2, num_pr_cards=0, seed=0, now: datetime = None):
+        self.owner = owner
+        self.repos = list(repos)
+        self.project_name = project_name
+        self.num_cards = num_cards
+        self.events_per_card = events_per_card
+        self.reviews_per_pr = reviews_per_pr
+        self.seed = seed
+        self.now = (now or datetime.utcnow()).replace(microsecond=0)
+        self.project_id = 1
+        # 10:00 of the last Wednesday, the start of the current sprint
+        self.sprint_start = (self.now - timedelta(days=(self.now.weekday() - 2) % 7)).replace(hour=10, minute=0, second=0)
+
+        self.columns = [{'id': 100 + i, 'name': name, 'url': '', 'project_url': 'https://api.github.com/projects/{}'.format(self.project_id)}
+                        for i, name in enumerate(columns)]
+        self.cards: Dict[int, List[dict]] = {col['id']: [] for col in self.columns}
+        self.card_columns: Dict[tuple, str] = {}
+        self.num_issues = collections.Counter()
+        for i in range(num_cards):
+            repo, number = self.repos[i % len(self.repos)], i // len(self.repos) + 1
+            self._add_card(i, repo, number)
+            self.num_issues[repo] += 1
+
+        self.pulls: Dict[str, List[dict]] = {repo: [] for repo in self.repos}
+        self.closing: Dict[tuple, List[dict]] = collections.defaultdict(list)
+        for j in range(num_prs):
+            repo = self.repos[j % len(self.repos)]
+            pr = self._pull(repo, self.num_issues[repo] + len(self.pulls[repo]) + 1)
+            self.pulls[repo].append(pr)
+            match = re.match(r'- closes #(\d+)', pr['body'])
+            if match:
+                self.closing[(repo, int(match.group(1)))].append(pr)
+        for prs in self.pulls.values():
+            prs.sort(key=lambda pr: pr['updated_at'], reverse=True)
+        self.pull_index = {(repo, pr['number']): pr for repo, prs in self.pulls.items() for pr in prs}
+        for j in range(min(num_pr_cards, num_prs)):
+            repo = self.repos[j % len(self.repos)]
+            self._add_card(num_cards + j, repo, self.num_issues[repo] + j // len(self.repos) + 1)
+        # the pages of a listing are requested one after the other, it is built once
+        self._issue_listings: Dict[tuple, List[dict]] = {}
+
+    def _random(self, *key) -> random.Random:
+        return random.Random('{}:{}'.format(self.seed, ':'.join(map(str, key))))
+
+    def _add_card(self, i: int, repo: str, number: int):
+        col = self.columns[self._random('card', i).randrange(len(self.columns))]
+        updated_at = self.now - timedelta(hours=self._random('card', i).randrange(24 * 14))
+        self.cards[col['id']].append({'id': 10000 + i, 'note': None, 'archived': False, 'column_id': col['id'],
+                                      'created_at': date2str(self.now - timedelta(days=60)), 'updated_at': date2str(updated_at),
+                                      'content_url': 'https://api.github.com/repos/{}/{}/issues/{}'.format(self.owner, repo, number)})
+        self.card_columns[(repo, number)] = col['name']
+
+    def _repo_url(self, repo: str) -> str:
+        return 'https://api.github.com/repos/{}/{}'.format(self.owner, repo)
+
+    def _title(self, rnd: random.Random) -> str:
+        return '{} the {} {}'.format(rnd.choice(['Fix', 'Add', 'Improve', 'Remove', 'Speed up']), rnd.choice(words), rnd.choice(words))
+
+    def _pull(self, repo: str, number: int) -> dict:
+        rnd = self._random('pull', repo, number)
+        created_at = self.now - timedelta(minutes=rnd.randrange(60 * 24 * 28))
+        updated_at = created_at + timedelta(minutes=rnd.randrange(int((self.now - created_at).total_seconds() // 60) + 1))
+        merged = rnd.random() < 0.5
+        body = 'Some description of the change.'
+        if rnd.random() < 0.8 and self.num_issues[repo]:
+            body = '- closes #{}\r\n'.format(rnd.randrange(self.num_issues[repo]) + 1) + body
+        return {'id': 900000 + number, 'number': number, 'title': self._title(rnd), 'state': 'closed' if merged else 'open',
+                'html_url': 'https://github.com/{}/{}/pull/{}'.format(self.owner, repo, number), 'url': '{}/pulls/{}'.format(self._repo_url(repo), number),
+                'created_at': date2str(created_at), 'updated_at': date2str(updated_at), 'closed_at': date2str(updated_at) if merged else None,
+                'merged_at': date2str(updated_at) if merged else None, 'merge_commit_sha': hashlib.sha1(body.encode()).hexdigest(),
+                'user': {'login': rnd.choice(logins)}, 'body': body, 'additions': rnd.randrange(1, 500), 'deletions': rnd.randrange(0, 200),
+                'changed_files': rnd.randrange(1, 20), 'labels': [{'name': 'bug'}] if rnd.random() < 0.2 else [],
+                'mergeable_state': 'draft' if rnd.random() < 0.1 else 'clean'}
+
+    def projects(self, repo: str) -> Optional[List[dict]]:
+        if repo not in self.repos:
+            return None
+        return [{'id': self.project_id, 'name': self.project_name}] if repo == self.repos[0] else []
+
+    def timeline(self, repo: str, number: int) -> Optional[List[dict]]:
+        if (repo, number) not in self.card_columns:
+            return None
+        rnd = self._random('timeline', repo, number)
+        date = self.sprint_start - timedelta(weeks=rnd.randrange(3)) + timedelta(minutes=rnd.randrange(6 * 60))
+        if date > self.now:
+            date -= timedelta(weeks=1)
+        events = [{'id': number * 1000, 'event': 'labeled', 'created_at': date2str(date), 'actor': {'login': rnd.choice(logins)},
+                   'label': {'name': rnd.choice(points), 'color': 'ededed'}}]
+        for k in range(1, self.events_per_card):
+            date = min(date + timedelta(minutes=rnd.randrange(60 * 24)), self.now)
+            kind = rnd.choice(['labeled', 'assigned', 'commented', 'commented', 'mentioned'])
+            ev = {'id': number * 1000 + k, 'event': kind, 'created_at': date2str(date), 'actor': {'login': rnd.choice(logins)}}
+            if kind == 'labeled':
+                ev['label'] = {'name': rnd.choice(points + ['bug', 'frontend']), 'color': 'ededed'}
+            elif kind == 'assigned':
+                ev['assignee'] = {'login': rnd.choice(logins)}
+            events.append(ev)
+        for pr in self.closing.get((repo, number), []):
+            events.append({'event': 'cross-referenced', 'created_at': pr['created_at'], 'actor': pr['user'], 'source': {'type': 'issue', 'issue': {
+                'repository_url': self._repo_url(repo), 'number': pr['number'], 'title': pr['title'], 'state': pr['state'],
+                'closed_at': pr['closed_at'], 'pull_request': {'url': pr['url']}, 'user': pr['user'], 'body': pr['body']}}})
+        if self.card_columns[(repo, number)] == self.columns[-1]['name']:
+            events.append({'id': number * 1000 + 999, 'event': 'closed', 'created_at': date2str(date), 'actor': {'login': rnd.choice(logins)}})
+        return sorted(events, key=lambda ev: ev['created_at'])
+
+    def issue(self, repo: str, number: int) -> Optional[dict]:
+        timeline = self.timeline(repo, number)
+        if timeline is None:
+            return None
+        rnd = self._random('issue', repo, number)
+        closed = timeline[-1]['event'] == 'closed'
+        labels = [ev['label'] for ev in timeline if ev['event'] == 'labeled'][-1:]
+        issue = {'id': 500000 + number, 'number': number, 'title': self._title(rnd),
+                 'html_url': 'https://github.com/{}/{}/issues/{}'.format(self.owner, repo, number),
+                 'state': 'closed' if closed else 'open', 'closed_at': timeline[-1]['created_at'] if closed else None,
+                 'updated_at': timeline[-1]['created_at'], 'user': {'login': rnd.choice(logins)},
+                 'assignees': [{'login': login} for login in rnd.sample(logins, rnd.randrange(3))], 'labels': labels,
+                 'body': 'As a user I want the {}.'.format(rnd.choice(words))}
+        pr = self.pull(repo, number)
+        if pr is not None:
+            # the issue of a PR card, like on GitHub
+            issue.update({'title': pr['title'], 'html_url': pr['html_url'], 'state': pr['state'], 'closed_at': pr['closed_at'],
+                          'user': pr['user'], 'body': pr['body'], 'pull_request': {'url': pr['url']}})
+        return issue
+
+    def issues(self, repo: str, since: str = '') -> Optional[List[dict]]:
+        """The issues and PRs of `repo` updated since `since`, PRs have a `pull_request` key like on GitHub."""
+        if repo not in self.repos:
+            return None
+        if (repo, since) not in self._issue_listings:
+            issues = [self.issue(repo, number) for number in range(1, self.num_issues[repo] + 1)]
+            issues += [dict(pr, pull_request={'url': pr['url']}) for pr in self.pulls[repo]]
+            self._issue_listings = {(repo, since): [issue for issue in issues if issue['updated_at'] >= since]}
+        return self._issue_listings[(repo, since)]
+
+    def pull(self, repo: str, number: int) -> Optional[dict]:
+        return self.pull_index.get((repo, number))
+
+    def reviews(self, repo: str, number: int) -> Optional[List[dict]]:
+        pr = self.pull(repo, number)
+        if pr is None:
+            return None
+        rnd = self._random('reviews', repo, number)
+        return [{'id': number * 100 + k, 'user': {'login': rnd.choice(logins)}, 'state': rnd.choice(['APPROVED', 'COMMENTED', 'CHANGES_REQUESTED']),
+                 'submitted_at': pr['updated_at'], 'html_url': '{}#pullrequestreview-{}'.format(pr['html_url'], number * 100 + k)}
+                for k in range(rnd.randrange(self.reviews_per_pr + 1))]
+
+
+class BoardGraphQL(object):
+    """Answers the GraphQL queries of `GraphQLGithubHelper` with the data of `board`.
+
+    There is no GraphQL parser, a query is recognized by its connections (`pullRequests`, `projects`, `columns`,
+    `cards` or `timelineItems`) and answered with all the fields ghsprint asks for. Node ids are `PRO_<id>` for the
+    project, `PC_<id>` for columns and `I_<repo>/<number>` for issues and PRs, cursors are offsets.
+    """
+
+    timeline_types = {'labeled': 'LabeledEvent', 'unlabeled': 'UnlabeledEvent', 'closed': 'ClosedEvent', 'reopened': 'ReopenedEvent',
+                      'assigned': 'AssignedEvent', 'cross-referenced': 'CrossReferencedEvent'}
+
+    def __init__(self, board: SyntheticBoard):
+        self.board = board
+
+    def execute(self, query: str, variables: dict) -> Optional[dict]:
+        """The `data` of the query, None if it is not one of ghsprint."""
+        if 'pullRequests(' in query:
+            return {'repository': self.pull_requests(variables['name'], variables['first'], variables.get('after'))}
+        if 'projects(' in query:
+            projects = self.board.projects(variables['name'])
+            if projects is None:
+                return {'repository': None}
+            return {'repository': {'projects': {'nodes': [{'id': 'PRO_{}'.format(p['id']), 'databaseId': p['id'], 'name': p['name']} for p in projects]}}}
+        if 'columns(' in query:
+            if variables['project'] != 'PRO_{}'.format(self.board.project_id):
+                return {'node': None}
+            return {'node': {'columns': {'nodes': [{'id': 'PC_{}'.format(col['id']), 'databaseId': col['id'], 'name': col['name']}
+                                                   for col in self.board.columns]}}}
+        if 'cards(' in query:
+            cards = self.board.cards.get(int(variables['column'].split('_', 1)[1]))
+            if cards is None:
+                return {'node': None}
+            return {'node': {'cards': self._page([self.card(card) for card in cards], variables['first'], variables.get('after'))}}
+        if 'timelineItems(' in query:
+            repo, number = variables['issue'].split('_', 1)[1].rsplit('/', 1)
+            nodes = self.timeline(repo, int(number))
+            return {'node': None if nodes is None else {'timelineItems': self._page(nodes, 100, variables.get('after'))}}
+        return None
+
+    @staticmethod
+    def _page(nodes: list, first: int, after: str = None) -> dict:
+        start = int(after or 0)
+        return {'pageInfo': {'hasNextPage': start + first < len(nodes), 'endCursor': str(start + first)}, 'nodes': nodes[start:start + first]}
+
+    @staticmethod
+    def _state(issue: dict) -> str:
+        return 'MERGED' if issue.get('merged_at') else issue['state'].upper()
+
+    def _name_with_owner(self, repo: str) -> dict:
+        return {'nameWithOwner': '{}/{}'.format(self.board.owner, repo)}
+
+    def timeline(self, repo: str, number: int) -> Optional[List[dict]]:
+        events = self.board.timeline(repo, number)
+        if events is None:
+            return None
+        nodes = []
+        for ev in events:
+            if ev['event'] not in self.timeline_types:
+                continue
+            node = {'__typename': self.timeline_types[ev['event']], 'id': 'E_{}'.format(ev.get('id')), 'createdAt': ev['created_at']}
+            if 'label' in ev:
+                node['label'] = {'name': ev['label']['name']}
+            if 'assignee' in ev:
+                node['assignee'] = {'login': ev['assignee']['login']}
+            if 'source' in ev:
+                source = ev['source']['issue']
+                pr = self.board.pull(repo, source['number'])
+                node['source'] = {'__typename': 'PullRequest' if 'pull_request' in source else 'Issue', 'number': source['number'],
+                                  'title': source['title'], 'state': self._state(pr or source), 'closedAt': source.get('closed_at'),
+                                  'repository': self._name_with_owner(repo)}
+            nodes.append(node)
+        return nodes
+
+    def card(self, card: dict) -> dict:
+        node = {'databaseId': card['id'], 'createdAt': card['created_at'], 'updatedAt': card['updated_at'], 'content': None}
+        repo, number = card['content_url'].split('/')[-3], int(card['content_url'].split('/')[-1])
+        issue = self.board.issue(repo, number)
+        if issue is not None:
+            pr = self.board.pull(repo, number)
+            node['content'] = {
+                '__typename': 'Issue' if pr is None else 'PullRequest', 'id': 'I_{}/{}'.format(repo, number), 'databaseId': issue['id'],
+                'number': number, 'title': issue['title'], 'url': issue['html_url'], 'state': self._state(pr or issue),
+                'closedAt': issue['closed_at'], 'updatedAt': issue['updated_at'], 'repository': self._name_with_owner(repo),
+                'assignees': {'nodes': [{'login': a['login']} for a in issue['assignees']]},
+                'labels': {'nodes': [{'name': label['name']} for label in issue['labels']]},
+                'timelineItems': self._page(self.timeline(repo, number), 100)}
+        return node
+
+    def pull_requests(self, repo: str, first: int, after: str = None) -> Optional[dict]:
+        if repo not in self.board.pulls:
+            return None
+        nodes = []
+        for pr in self.board.pulls[repo]:
+            reviews = self.board.reviews(repo, pr['number'])
+            nodes.append({
+                'databaseId': pr['id'], 'number': pr['number'], 'title': pr['title'], 'state': self._state(pr), 'createdAt': pr['created_at'],
+                'updatedAt': pr['updated_at'], 'url': pr['html_url'], 'mergedAt': pr['merged_at'], 'body': pr['body'],
+                'isDraft': pr['mergeable_state'] == 'draft', 'additions': pr['additions'], 'deletions': pr['deletions'],
+                'changedFiles': pr['changed_files'], 'mergeCommit': {'oid': pr['merge_commit_sha']}, 'author': {'login': pr['user']['login']},
+                'labels': {'nodes': [{'name': label['name']} for label in pr['labels']]},
+                'reviews': {'totalCount': len(reviews), 'nodes': [{'submittedAt': rev['submitted_at'], 'url': rev['html_url'], 'state': rev['state'],
+                                                                  'author': {'login': rev['user']['login']}} for rev in reviews[:50]]}})
+        return {'pullRequests': self._page(nodes, first, after)}
+
+
+class FakeGitHub(object):
+    """Serves `board` or the responses of `cassette` like the GitHub REST and GraphQL APIs, on `port` (0 for any free port)."""
+
+    def __init__(self, board: SyntheticBoard = None, cassette: Cassette = None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit=5000, rate_reset=3600, seed=0):
+        if (board is None) == (cassette is None):
+            raise ValueError('serve either a board or a cassette')
+        self.board = board
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_reset = rate_reset
+        self.remaining = rate_limit
+        # the reset is in whole seconds like on GitHub, rounded up so a window is never shorter than `rate_reset`
+        self.reset_at = math.ceil(time()) + rate_reset
+        self.counts = collections.Counter()
+        self.num_bytes = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.routes = [(re.compile(pattern), handler) for pattern, handler in [
+            (r'/repos/([^/]+)/([^/]+)/projects', lambda q, owner, repo: board.projects(repo)),
+            (r'/projects/(\d+)/columns', lambda q, project_id: board.columns if int(project_id) == board.project_id else None),
+            (r'/projects/columns/(\d+)', lambda q, column_id: next((col for col in board.columns if col['id'] == int(column_id)), None)),
+            (r'/projects/columns/(\d+)/cards', lambda q, column_id: board.cards.get(int(column_id))),
+            (r'/repos/([^/]+)/([^/]+)/issues', lambda q, owner, repo: board.issues(repo, q.get('since', [''])[0])),
+            (r'/repos/([^/]+)/([^/]+)/issues/(\d+)', lambda q, owner, repo, number: board.issue(repo, int(number))),
+            (r'/repos/([^/]+)/([^/]+)/issues/(\d+)/timeline', lambda q, owner, repo, number: board.timeline(repo, int(number))),
+            (r'/repos/([^/]+)/([^/]+)/pulls', lambda q, owner, repo: board.pulls.get(repo)),
+            (r'/repos/([^/]+)/([^/]+)/pulls/(\d+)', lambda q, owner, repo, number: board.pull(repo, int(number))),
+            (r'/repos/([^/]+)/([^/]+)/pulls/(\d+)/reviews', lambda q, owner, repo, number: board.reviews(repo, int(number))),
+        ]] if board is not None else []
+        self.graphql = BoardGraphQL(board) if board is not None else None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return 'http://{}:{}'.format(*self.httpd.server_address[:2])
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_status = collections.Counter()
+            for (endpoint, status), count in self.counts.items():
+                by_status[status] += count
+            return {'requests': sum(self.counts.values()), 'bytes': self.num_bytes, 'by_status': dict(by_status),
+                    'by_endpoint': {'{} {}'.format(*key): count for key, count in sorted(self.counts.items())}, 'rate_remaining': self.remaining}
+
+    def start(self) -> 'FakeGitHub':
+        threading.Thread(target=self.httpd.serve_forever, name='fake-github', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _rate_limit(self, counted: bool) -> dict:
+        """The rate-limit headers, `counted` requests use the budget, None if it is used up."""
+        with self._lock:
+            if time() >= self.reset_at:
+                self.remaining = self.rate_limit
+                self.reset_at = math.ceil(time()) + self.rate_reset
+            if counted:
+                if self.remaining == 0:
+                    return None
+                self.remaining -= 1
+            return {'X-RateLimit-Limit': str(self.rate_limit), 'X-RateLimit-Remaining': str(self.remaining),
+                    'X-RateLimit-Reset': str(self.reset_at), 'X-RateLimit-Used': str(self.rate_limit - self.remaining)}
+
+    def _route(self, path: str, query: dict):
+        """The endpoint template and the data of `path`, None as data if it does not exist."""
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match:
+                return pattern.pattern, handler(query, *match.groups())
+        return path, None
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, endpoint: str, status: int, body: bytes, headers: dict):
+                # counted before the client has the response, so the stats include every request it got
+                with fake._lock:
+                    fake.counts[(endpoint, status)] += 1
+                    fake.num_bytes += len(body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _respond(self, method: str, json_body=None):
+                url = urlsplit(self.path)
+                if url.path == '/_fake/stats':
+                    body = json.dumps(fake.stats()).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if fake.latency or fake.jitter:
+                    with fake._lock:
+                        delay = fake.latency + fake._random.uniform(0, fake.jitter)
+                    sleep(delay)
+                with fake._lock:
+                    failed = fake.error_rate and fake._random.random() < fake.error_rate
+
+                if fake.cassette is not None:
+                    endpoint = url.path
+                    interaction = fake.cassette.find(Cassette.key(method, self.path, headers={'Accept': self.headers.get('Accept', '')}, json_body=json_body))
+                    if interaction is None:
+                        status, body, headers = 404, {'message': 'Not Found'}, {}
+                    else:
+                        status, body = interaction['status'], interaction['body']
+                        headers = ResponseCache.restore_links(interaction, self.path)
+                        if 'Link' in headers:
+                            recorded = urlsplit(interaction['url'])
+                            headers['Link'] = headers['Link'].replace('{}://{}'.format(recorded.scheme, recorded.netloc), 'http://' + self.headers['Host'])
+                elif url.path == '/graphql' and method == 'POST':
+                    endpoint, status, headers = url.path, 200, {}
+                    data = fake.graphql.execute((json_body or {}).get('query', ''), (json_body or {}).get('variables') or {})
+                    if data is None:
+                        body = {'errors': [{'type': 'PARSE_ERROR', 'message': 'the fake GitHub does not know this query'}]}
+                    else:
+                        body = {'data': dict(data, rateLimit={'cost': 1, 'remaining': fake.remaining})}
+                else:
+                    query = parse_qs(url.query)
+                    endpoint, data = fake._route(url.path, query)
+                    status, headers, body = (200, {}, data) if data is not None else (404, {}, {'message': 'Not Found'})
+                    if status == 200 and isinstance(data, list):
+                        per_page = min(int(query.get('per_page', ['30'])[0]), 100)
+                        page = int(query.get('page', ['1'])[0])
+                        last = max((len(data) + per_page - 1) // per_page, 1)
+                        body = data[(page - 1) * per_page:page * per_page]
+                        own_url = 'http://{}{}'.format(self.headers['Host'], self.path)
+                        links = []
+                        if page < last:
+                            links += ['<{}>; rel="next"'.format(_with_page(own_url, page + 1)), '<{}>; rel="last"'.format(_with_page(own_url, last))]
+                        if page > 1:
+                            links += ['<{}>; rel="first"'.format(_with_page(own_url, 1)), '<{}>; rel="prev"'.format(_with_page(own_url, page - 1))]
+                        if links:
+                            headers['Link'] = ', '.join(links)
+
+                if failed:
+                    self._send(endpoint, 502, b'{"message": "Server Error"}', {'Content-Type': 'application/json'})
+                    return
+                if not isinstance(body, str):
+                    body = json.dumps(body)
+                body = body.encode()
+                headers = {name: value for name, value in headers.items() if not name.startswith('X-RateLimit')}
+                headers['Content-Type'] = 'application/json; charset=utf-8'
+                etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+                if status == 200:
+                    headers['ETag'] = etag
+                # like on GitHub, a `304` does not count against the rate limit
+                not_modified = status == 200 and self.headers.get('If-None-Match') == etag
+                rate_limit = fake._rate_limit(counted=not not_modified) if fake.rate_limit else {}
+                if rate_limit is None:
+                    message = {'message': 'API rate limit exceeded for 127.0.0.1.', 'documentation_url': 'https://docs.github.com/rest'}
+                    self._send(endpoint, 403, json.dumps(message).encode(), dict(fake._rate_limit(counted=False), **{'Content-Type': 'application/json'}))
+                elif not_modified:
+                    self._send(endpoint, 304, b'', dict(rate_limit, ETag=etag))
+                else:
+                    self._send(endpoint, status, body, dict(headers, **rate_limit))
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                self._respond('POST', json.loads(body) if body else None)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=8000, show_default=True)
+@click.option('--cassette', type=click.Path(exists=True, dir_okay=False), help='serve the responses of this cassette instead of a generated board')
+@click.option('--owner', default='acme', show_default=True)
+@click.option('--repos', default='api,web', show_default=True, help='names of the repos, separated by commas')
+@click.option('--project-name', default='Sprint Board', show_default=True)
+@click.option('--columns', default='Backlog,Ready,In Progress,Review,Done', show_default=True, help='names of the columns, separated by commas')
+@click.option('--cards', default=200, show_default=True, help='number of cards of the board')
+@click.option('--events-per-card', default=8, show_default=True)
+@click.option('--prs', default=100, show_default=True, help='number of PRs of all repos')
+@click.option('--reviews-per-pr', default=2, show_default=True, help='maximal number of reviews of a PR')
+@click.option('--pr-cards', default=0, show_default=True, help='number of PRs that are also cards of the board')
+@click.option('--seed', default=0, show_default=True)
+@click.option('--latency', default=0.0, show_default=True, help='seconds every response is delayed')
+@click.option('--jitter', default=0.0, show_default=True, help='maximal random seconds added to the latency')
+@click.option('--error-rate', default=0.0, show_default=True, help='share of requests answered with `502`')
+@click.option('--rate-limit', default=5000, show_default=True, help='requests per rate-limit window, 0 for no rate limit')
+@click.option('--rate-reset', default=3600, show_default=True, help='seconds of a rate-limit window')
+def start_fake(host, port, cassette, owner, repos, project_name, columns, cards, events_per_card, prs, reviews_per_pr, pr_cards, seed, latency, jitter,
+               error_rate, rate_limit, rate_reset):
+    """Serves a fake GitHub API for ghsprint."""
+    board = None
+    if not cassette:
+        board = SyntheticBoard(owner, repos.split(','), project_name, columns.split(','), num_cards=cards, events_per_card=events_per_card,
+                               num_prs=prs, reviews_per_pr=reviews_per_pr, num_pr_cards=pr_cards, seed=seed)
+    fake = FakeGitHub(board, Cassette(cassette) if cassette else None, host=host, port=port, latency=latency, jitter=jitter,
+                      error_rate=error_rate, rate_limit=rate_limit, rate_reset=rate_reset, seed=seed)
+    print('serving on {}, e.g. python -m ghsprint TOKEN "{}" {}'.format(
+        fake.url, project_name, ' '.join('{}/{}'.format(owner, repo) for repo in repos.split(','))), flush=True)
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    start_fake()
@@ -1,23 +1,68 @@
 import concurrent.futures
 import datetime
+import logging
+import threading
 import typing
 from datetime import date, datetime, timedelta
 from time import time
-from typing import Dict, List, Tuple, TypeVar
+from typing import Dict, Iterator, List, Tuple, TypeVar
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 
 from .board_card import Card
 from .board_stuff import Column
+from .http_cache import ResponseCache, strip_token
 from .issue import Issue
 from .issue_event import Event
 from .pr_stuff import PR, Review
 from .repo_stuff import Commit, Repo
-from .request_session import requests_retry_session
-from .utils import str2date
+from .tracing import span, traced
+from .utils import date2str, str2date
+
+if typing.TYPE_CHECKING:
+    from .cassette import Cassette
+    from .metrics import RequestMetrics
+    from .request_session import HTTPClient
+
+logger = logging.getLogger('ghsprint.ghdriver')
+
+
+class PageError(RuntimeError):
+    """A following page of a paginated list could not be fetched, the items yielded before are not the whole list."""
+
+    def __init__(self, url: str, status: int):
+        super().__init__('page {} failed with status {}'.format(url, status))
+        self.url = url
+        self.status = status
+
+
+def _page_number(url: str) -> int:
+    return int(parse_qs(urlsplit(url).query).get('page', ['1'])[0])
+
+
+def _json(r):
+    with span('json', 'decode', bytes=len(r.content)):
+        return r.json()
+
+
+def _with_page(url: str, page: int) -> str:
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    query['page'] = [str(page)]
+    return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
 
 
 class GithubHelper(object):
-    def __init__(self, access_token: str, repos: List[str], project_name: str, ignore_columns: str, keep_columns: str, login_name_mapper: str, special_tags: str, verbosity=0):
+    def __init__(self, access_token: str, repos: List[str], project_name: str, ignore_columns: str, keep_columns: str, login_name_mapper: str,
+                 special_tags: str, verbosity=0, pool_maxsize=50, client: 'HTTPClient' = None, cache: ResponseCache = None, api_url='https://api.github.com',
+                 cassette: 'Cassette' = None):
         self.access_token = access_token
+        self.api_url = api_url.rstrip('/')
+        if client is None:
+            # requests is imported with the first helper, not with the package
+            from .metrics import RequestMetrics
+            from .request_session import HTTPClient
+            client = HTTPClient(pool_maxsize=pool_maxsize, cache=cache, cassette=cassette, metrics=RequestMetrics(urlsplit(self.api_url).path))
+        self.client = client
         self.headers = {'Accept': 'application/vnd.github.inertia-preview+json'}
 
         if repos is None:
@@ -32,214 +77,414 @@ class GithubHelper(object):
         self.cols_ignore = ignore_columns.split(',')
         self.cols_keep = keep_columns.split(',')
 
-        self.login_name_mapper = dict(entry.split(':') for entry in login_name_mapper.split(','))
+        self.login_name_mapper = dict(entry.split(':') for entry in login_name_mapper.split(',') if entry)
         self.login_name_mapper = {k.lower(): v for k, v in self.login_name_mapper.items()}
         self.special_tags = special_tags.split(',')
         self.label2val = {'0': 0, '½': 0.5, '1': 1, '2': 2, '3': 3, '5': 5, '8': 8, '13': 13, '25': 25, '50': 50, '100': 100}
+        self.timeline_headers = {'Accept': 'application/vnd.github.mockingbird-preview'}
+        self.interesting_event_types = ['labeled', 'unlabeled', 'reopened', 'closed', 'assigned', 'cross-referenced']
+        self.pulls_params = {
+            'state': 'all',
+            'sort': 'updated',
+            'direction': 'desc'
+        }
+
+        # every PR and issue is materialized once per run, keyed by (repo, number)
+        self.prs: Dict[Tuple[Repo, int], PR] = {}
+        self.issues: Dict[Tuple[Repo, int], Issue] = {}
+        self.num_registry_hits = 0
+        self._registry_lock = threading.Lock()
+
+        # issue number -> repos known to have an issue with this number, learned from cards and fetched issues
+        self.issue_routes: Dict[int, set] = {}
+        self.num_probes_avoided = 0
+
+        # the following pages of all lists share these threads, at most one per pooled connection
+        self._page_executor = None
+
+    def add_route(self, repo: Repo, issue_num: int):
+        with self._registry_lock:
+            self.issue_routes.setdefault(issue_num, set()).add(repo)
+
+    def route(self, issue_num: int) -> Repo:
+        """The repo of the issue if the number is known in exactly one repo, otherwise None."""
+        repos = self.issue_routes.get(issue_num, ())
+        if len(repos) == 1:
+            return next(iter(repos))
+        return None
+
+    def _count_avoided_probes(self, repo: Repo):
+        # without the repo, the timeline was requested from every repo in order until one answered
+        probes = self.repos.index(repo) if repo in self.repos else len(self.repos)
+        with self._registry_lock:
+            self.num_probes_avoided += probes
+
+    @property
+    def metrics(self) -> 'RequestMetrics':
+        """The requests of the run by endpoint, those of all helpers if the client is shared."""
+        return self.client.metrics
+
+    @property
+    def requests_saved(self) -> int:
+        # a PR taken from the registry saves the request for the PR and the one for its reviews
+        return self.client.num_saved + 2 * self.num_registry_hits
+
+    def reset(self, client=True):
+        """Starts a new run, PRs, issues and responses of the previous run are fetched again.
+
+        A client shared with other helpers is reset by its owner, pass `client=False`.
+        """
+        if client:
+            self.client.reset()
+        with self._registry_lock:
+            self.prs = {}
+            self.issues = {}
+            self.num_registry_hits = 0
+            self.num_probes_avoided = 0
+
+    def register_pr(self, repo: Repo, pr_dict: dict) -> PR:
+        with self._registry_lock:
+            pr = self.prs.get((repo, pr_dict['number']))
+            if pr is None:
+                pr = self.prs[(repo, pr_dict['number'])] = PR(repo, pr_dict)
+            return pr
+
+    def register_issue(self, repo: Repo, issue_dict: dict) -> Issue:
+        with self._registry_lock:
+            issue = self.issues.get((repo, issue_dict['number']))
+            if issue is None:
+                issue = self.issues[(repo, issue_dict['number'])] = Issue(repo, issue_dict)
+                self.issue_routes.setdefault(issue_dict['number'], set()).add(repo)
+            return issue
+
+    # urls of the endpoints used to build the sprint, shared with the async engine
+    def projects_url(self, repo: Repo) -> str:
+        return '{}/repos/{}/{}/projects?access_token={}'.format(self.api_url, repo.owner, repo.name, self.access_token)
+
+    def columns_url(self) -> str:
+        return '{}/projects/{}/columns?access_token={}&per_page=100'.format(self.api_url, self.project_id, self.access_token)
+
+    def column_url(self, column_id) -> str:
+        return '{}/projects/columns/{}?access_token={}'.format(self.api_url, column_id, self.access_token)
+
+    def cards_url(self, col: Column) -> str:
+        return '{}/projects/columns/{}/cards?access_token={}&per_page=100'.format(self.api_url, col.id, self.access_token)
+
+    def timeline_url(self, repo: Repo, issue_num) -> str:
+        return '{}/repos/{}/{}/issues/{}/timeline?access_token={}&per_page=100'.format(self.api_url, repo.owner, repo.name, issue_num, self.access_token)
+
+    def issue_url(self, repo: Repo, issue_num) -> str:
+        return '{}/repos/{}/{}/issues/{}?access_token={}'.format(self.api_url, repo.owner, repo.name, issue_num, self.access_token)
+
+    def pulls_url(self, repo: Repo) -> str:
+        return '{}/repos/{}/{}/pulls?access_token={}&per_page=100'.format(self.api_url, repo.owner, repo.name, self.access_token)
+
+    def pull_url(self, repo: Repo, pr_num) -> str:
+        return '{}/repos/{}/{}/pulls/{}?access_token={}'.format(self.api_url, repo.owner, repo.name, pr_num, self.access_token)
+
+    def reviews_url(self, repo: Repo, pr_num) -> str:
+        return '{}/repos/{}/{}/pulls/{}/reviews?access_token={}&per_page=100'.format(self.api_url, repo.owner, repo.name, pr_num, self.access_token)
+
+    @traced('models')
+    def make_events(self, timeline: List[dict]) -> List[Event]:
+        return [Event(ev, self.label2val) for ev in timeline if ev['event'] in self.interesting_event_types]
+
+    @property
+    def page_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._registry_lock:
+            if self._page_executor is None:
+                self._page_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.client.pool_maxsize, thread_name_prefix='page')
+            return self._page_executor
+
+    def _iter_pages(self, r, headers=None, parallel=False) -> Iterator[dict]:
+        """Yields the items of the response `r` and of all following pages given by its `Link` header.
+
+        With `parallel` the remaining pages are fetched concurrently if the `last` page is known, they are still yielded in order.
+        Raises `PageError` after the items of the pages before if a following page cannot be fetched.
+        """
+        yield from _json(r)
+        last_url = r.links.get('last', {}).get('url')
+        if parallel and last_url:
+            urls = [_with_page(last_url, page) for page in range(_page_number(r.url) + 1, _page_number(last_url) + 1)]
+            for url, r_page in zip(urls, self.page_executor.map(lambda url: self.client.get(url, headers=headers), urls)):
+                self._check_page(url, r_page)
+                yield from _json(r_page)
+            return
+
+        next_url = r.links.get('next', {}).get('url')
+        while next_url:
+            r = self.client.get(next_url, headers=headers)
+            self._check_page(next_url, r)
+            yield from _json(r)
+            next_url = r.links.get('next', {}).get('url')
+
+    @staticmethod
+    def _check_page(url: str, r):
+        if r.status_code != 200:
+            url = strip_token(url)
+            logger.warning('page %s failed with status %s, the list is incomplete', url, r.status_code)
+            raise PageError(url, r.status_code)
+
+    def _fetch_pages(self, url, headers=None, parallel=False) -> List[dict]:
+        """The items of all pages of `url`, None if one of the pages cannot be fetched."""
+        r = self.client.get(url, headers=headers)
+        if r.status_code != 200:
+            return None
+        try:
+            return list(self._iter_pages(r, headers=headers, parallel=parallel))
+        except PageError:
+            return None
+
+    def _paginate(self, url, headers=None, params=None, parallel=False) -> Iterator[dict]:
+        """Yields the items of all pages of `url`, nothing if the first page cannot be fetched, see `_iter_pages` for the others."""
+        r = self.client.get(url, headers=headers, params=params)
+        if r.status_code == 200:
+            yield from self._iter_pages(r, headers=headers, parallel=parallel)
+        else:
+            logger.warning('%s failed with status %s', strip_token(url), r.status_code)
 
+    @traced()
     def get_all_projects(self, repo: Repo):
-        url = 'https://api.github.com/repos/{}/{}/projects?access_token={}'.format(repo.owner, repo.name, self.access_token)
-        r = requests_retry_session().get(url, headers=self.headers)
+        r = self.client.get(self.projects_url(repo), headers=self.headers)
         if r.status_code == 200:
-            return r.json()
+            return _json(r)
         else:
             raise RuntimeError(f'Connection error fetching projects for {repo}')
 
+    @traced()
     def get_all_columns(self) -> List[Column]:
-        url = 'https://api.github.com/projects/{}/columns?access_token={}'.format(self.project_id, self.access_token)
-        r = requests_retry_session().get(url, headers=self.headers)
+        return [Column(self.project_id, col) for col in self._paginate(self.columns_url(), headers=self.headers) if col['name'] not in self.cols_ignore]
+
+    @traced()
+    def fetch_column(self, column_id) -> dict:
+        r = self.client.get(self.column_url(column_id), headers=self.headers)
+
         if r.status_code == 200:
-            return [Column(self.project_id, col) for col in r.json() if col['name'] not in self.cols_ignore]
-        return []
+            return _json(r)
+        return None
 
+    def iter_cards(self, col: Column) -> Iterator[Card]:
+        for card in self._paginate(self.cards_url(col), headers=self.headers, parallel=True):
+            yield Card(col, card)
+
+    @traced()
     def get_all_cards(self, col: Column) -> List[Card]:
-        url = 'https://api.github.com/projects/columns/{}/cards?access_token={}&per_page=100'.format(col.id, self.access_token)
-        r = requests_retry_session().get(url, headers=self.headers)
-        if r.status_code == 200:
-            return [Card(col, card) for card in r.json()]
-        return []
+        card_dicts = list(self._paginate(self.cards_url(col), headers=self.headers, parallel=True))
+        with span('Card', 'models', cards=len(card_dicts)):
+            return [Card(col, card) for card in card_dicts]
 
+    @traced()
     def get_all_current_labels(self, issue) -> List[str]:
-        url = 'https://api.github.com/repos/{}/{}/issues/{}/labels?access_token={}'.format(
+        url = '{}/repos/{}/{}/issues/{}/labels?access_token={}'.format(
+            self.api_url,
             issue.owner,
             issue.repo,
             issue.number,
             self.access_token)
-        r = requests_retry_session().get(url, headers=self.headers)
+        r = self.client.get(url, headers=self.headers)
 
         if r.status_code == 200:
-            return [lab['name'] for lab in r.json() if lab['name'] in self.import_label_types]
+            return [lab['name'] for lab in _json(r) if lab['name'] in self.import_label_types]
         return []
 
-    def get_all_events(self, issue_num) -> List[Event]:
-        events = []
-        for repo in self.repos:
-            interesting_event_types = ['labeled', 'unlabeled', 'reopened', 'closed', 'assigned', 'cross-referenced']
-            url = 'https://api.github.com/repos/{}/{}/issues/{}/timeline?access_token={}&per_page=100'.format(repo.owner, repo.name, issue_num, self.access_token)
-            header = {'Accept': 'application/vnd.github.mockingbird-preview'}
-            r = requests_retry_session().get(url, headers=header)
-
-            if r.status_code == 200:
+    def iter_timeline(self, issue_num, repo: Repo = None) -> Iterator[dict]:
+        """Yields the interesting timeline items of the issue `issue_num` of `repo`, one request per timeline page.
 
-                for ev in r.json():
-                    if ev['event'] in interesting_event_types:
-                        events.append(Event(ev, self.label2val))
-                return events
-        return []
+        Without `repo` the routing index is used, only unknown numbers are probed in every repo.
+        """
+        repo = repo or self.route(issue_num)
+        if repo is not None:
+            self._count_avoided_probes(repo)
+        for candidate in [repo] if repo is not None else self.repos:
+            r = self.client.get(self.timeline_url(candidate, issue_num), headers=self.timeline_headers)
 
-    def get_all_active_repos(self, owner, weeks=1) -> List[Repo]:
-        rlist = []
+            if r.status_code == 200:
+                self.add_route(candidate, issue_num)
+                for ev in self._iter_pages(r, headers=self.timeline_headers, parallel=True):
+                    if ev['event'] in self.interesting_event_types:
+                        yield ev
+                return
+
+    def fetch_timeline(self, issue_num, repo: Repo) -> List[dict]:
+        """The interesting timeline items of the issue `issue_num` of `repo`, None if the timeline cannot be fetched."""
+        self._count_avoided_probes(repo)
+        timeline = self._fetch_pages(self.timeline_url(repo, issue_num), headers=self.timeline_headers, parallel=True)
+        if timeline is None:
+            return None
+        self.add_route(repo, issue_num)
+        return [ev for ev in timeline if ev['event'] in self.interesting_event_types]
+
+    def iter_events(self, issue_num, repo: Repo = None) -> Iterator[Event]:
+        for ev in self.iter_timeline(issue_num, repo=repo):
+            yield Event(ev, self.label2val)
+
+    @traced()
+    def get_all_events(self, issue_num, repo: Repo = None) -> List[Event]:
+        return self.make_events(list(self.iter_timeline(issue_num, repo=repo)))
+
+    def iter_active_repos(self, owner, weeks=1) -> Iterator[Repo]:
         for repo in self.repos:
-            url = 'https://api.github.com/orgs/{}/repos?access_token={}'.format(
+            url = '{}/orgs/{}/repos?access_token={}&per_page=100'.format(
+                self.api_url,
                 repo.owner,
                 self.access_token)
-            r = requests_retry_session().get(url, headers=self.headers)
+            for repo in self._paginate(url, headers=self.headers, parallel=True):
+                last_push = str2date(repo['pushed_at'])
+                if datetime.now()-timedelta(weeks=weeks) < last_push:
+                    yield Repo(repo['name'], repo['id'])
 
-            if r.status_code == 200:
-                for repo in r.json():
-                    last_push = str2date(repo['pushed_at'])
-                    if datetime.now()-timedelta(weeks=weeks) < last_push:
-                        rlist.append(Repo(repo['name'], repo['id']))
-        return rlist
+    @traced()
+    def get_all_active_repos(self, owner, weeks=1) -> List[Repo]:
+        return list(self.iter_active_repos(owner, weeks=weeks))
 
-    def get_all_issues(self) -> List[Issue]:
-        rlist = []
+    def iter_issue_dicts(self, repo: Repo, since: datetime = None) -> Iterator[dict]:
+        """Yields the issues of `repo`, with `since` all issues (open or closed) updated since then, PRs included."""
+        url = '{}/repos/{}/{}/issues?access_token={}&per_page=100'.format(
+            self.api_url,
+            repo.owner,
+            repo.name,
+            self.access_token)
+        params = {'state': 'all', 'since': date2str(since)} if since else None
+        yield from self._paginate(url, headers=self.headers, params=params, parallel=True)
+
+    def iter_issues(self) -> Iterator[Issue]:
         for repo in self.repos:
-            url = 'https://api.github.com/repos/{}/{}/issues?access_token={}&per_page=100'.format(
-                repo.owner,
-                repo.name,
-                self.access_token)
-            r = requests_retry_session().get(url, headers=self.headers)
+            for issue_dict in self.iter_issue_dicts(repo):
+                yield self.register_issue(repo, issue_dict)
 
-            if r.status_code == 200:
-                for issue_dict in r.json():
-                    rlist.append(Issue(repo, issue_dict))
-        return rlist
+    @traced()
+    def get_all_issues(self) -> List[Issue]:
+        return list(self.iter_issues())
 
+    @traced()
     def get_pr(self, repo, pr_num):
+        with self._registry_lock:
+            pr = self.prs.get((repo, pr_num))
+            if pr is not None and pr.reviews is not None and pr.additions is not None:
+                self.num_registry_hits += 1
+                return pr
+
         # /repos/:owner/:repo/pulls/:number
-        url = 'https://api.github.com/repos/{}/{}/pulls/{}?access_token={}'.format(
-            repo.owner,
-            repo.name,
-            pr_num,
-            self.access_token)
-        r = requests_retry_session().get(url, headers=self.headers)
+        r = self.client.get(self.pull_url(repo, pr_num), headers=self.headers)
 
         if r.status_code == 200:
-            pr = PR(repo, r.json())
-            revs = self.fetch_PR_reviews(pr)
-            pr.add_reviews(revs)
-            data = self.fetch_PR_data(pr)
+            data = _json(r)
+            pr = self.register_pr(repo, data)
+            if pr.reviews is None:
+                pr.add_reviews(self.fetch_PR_reviews(pr))
             pr.update(data)
             return pr
         raise ValueError('invalid PR request for {}/{} #{}'.format(repo.owner, repo.name, pr_num))
 
-    def get_all_PRs(self) -> List[PR]:
+    def iter_PR_dicts(self, repo: Repo, updated_since: datetime = None) -> Iterator[dict]:
+        """Yields the PRs of `repo`, most recently updated first, stops at the first PR not updated since `updated_since`."""
+        for pr_dict in self._paginate(self.pulls_url(repo), headers=self.headers, params=self.pulls_params):
+            if updated_since and str2date(pr_dict['updated_at']) < updated_since:
+                return
+            yield pr_dict
+
+    def iter_PRs(self, repo: Repo, updated_since: datetime = None) -> Iterator[PR]:
+        for pr_dict in self.iter_PR_dicts(repo, updated_since=updated_since):
+            yield self.register_pr(repo, pr_dict)
+
+    @traced()
+    def get_all_PRs(self, updated_since: datetime = None) -> List[PR]:
         pull_requests = []
         for repo in self.repos:
-            url = 'https://api.github.com/repos/{}/{}/pulls?access_token={}&per_page=100'.format(
-                repo.owner,
-                repo.name,
-                self.access_token)
-            params = {
-                'state': 'all',
-                'sort': 'updated',
-                'direction': 'desc'
-            }
-            r = requests_retry_session().get(url, headers=self.headers, data=params)
-
-            if r.status_code == 200:
-                for pr_dict in r.json():
-                    pull_requests.append(PR(repo, pr_dict))
+            pull_requests.extend(self.iter_PRs(repo, updated_since=updated_since))
         return pull_requests
 
-    def fetch_PR_data(self, pr: PR) -> List[Review]:
-        # GET /repos/:owner/:repo/pulls/:number/reviews
-        url = 'https://api.github.com/repos/{}/{}/pulls/{}?access_token={}'.format(
-            pr.repo.owner,
-            pr.repo.name,
-            pr.number,
-            self.access_token)
-
-        r = requests_retry_session().get(url, headers=self.headers)
+    @traced()
+    def fetch_PR_data(self, pr: PR) -> dict:
+        # GET /repos/:owner/:repo/pulls/:number
+        r = self.client.get(self.pull_url(pr.repo, pr.number), headers=self.headers)
 
         if r.status_code == 200:
-            return r.json()
+            return _json(r)
         return None
 
-    def fetch_PR_reviews(self, pr: PR) -> List[Review]:
+    def iter_PR_review_dicts(self, pr: PR) -> Iterator[dict]:
         # GET /repos/:owner/:repo/pulls/:number/reviews
-        url = 'https://api.github.com/repos/{}/{}/pulls/{}/reviews?access_token={}&per_page=100'.format(
-            pr.repo.owner,
-            pr.repo.name,
-            pr.number,
-            self.access_token)
+        yield from self._paginate(self.reviews_url(pr.repo, pr.number), headers=self.headers)
 
-        r = requests_retry_session().get(url, headers=self.headers)
+    def fetch_PR_review_dicts(self, pr: PR) -> List[dict]:
+        """The reviews of `pr`, None if they cannot be fetched."""
+        return self._fetch_pages(self.reviews_url(pr.repo, pr.number), headers=self.headers)
 
-        if r.status_code == 200:
-            revs = []
-            for rev in r.json():
-                revs.append(Review(pr, rev))
-            return revs
-        return []
+    def iter_PR_reviews(self, pr: PR) -> Iterator[Review]:
+        for rev in self.iter_PR_review_dicts(pr):
+            yield Review(pr, rev)
 
-    def get_single_issue_from_card(self, card: Card) -> Issue:
-        # /repos/:owner/:repo/issues/:number
-        url = 'https://api.github.com/repos/{}/{}/issues/{}?access_token={}'.format(
-            card.repo.owner,
-            card.repo.name,
-            card.issue_num,
-            self.access_token)
+    @traced()
+    def fetch_PR_reviews(self, pr: PR) -> List[Review]:
+        review_dicts = list(self.iter_PR_review_dicts(pr))
+        with span('Review', 'models', reviews=len(review_dicts)):
+            return [Review(pr, rev) for rev in review_dicts]
 
-        r = requests_retry_session().get(url, headers=self.headers)
+    @traced()
+    def fetch_issue(self, repo: Repo, issue_num) -> dict:
+        # /repos/:owner/:repo/issues/:number
+        r = self.client.get(self.issue_url(repo, issue_num), headers=self.headers)
 
         if r.status_code == 200:
-            return Issue(card.repo, r.json())
+            return _json(r)
+        return None
+
+    @traced()
+    def get_single_issue_from_card(self, card: Card) -> Issue:
+        issue_dict = self.fetch_issue(card.repo, card.issue_num)
+        if issue_dict is not None:
+            return self.register_issue(card.repo, issue_dict)
         return None
 
+    @traced()
     def get_production_sha(self, repo: Repo) -> str:
         # GET /repos/:owner/:repo/git/refs/tags
         ref = 'production'
-        url = 'https://api.github.com/repos/{}/{}/git/refs/tags?access_token={}'.format(
+        url = '{}/repos/{}/{}/git/refs/tags?access_token={}'.format(
+            self.api_url,
             repo.owner,
             repo.name,
             self.access_token)
 
-        r = requests_retry_session().get(url, headers=self.headers)
+        r = self.client.get(url, headers=self.headers)
 
         if r.status_code == 200:
-            prod_tag = [r for r in r.json() if 'refs/tags/{}'.format(ref)
+            prod_tag = [r for r in _json(r) if 'refs/tags/{}'.format(ref)
                         == r['ref']][0]
             commit_sha = prod_tag['object']['sha']
             return commit_sha
         return None
 
+    @traced()
     def get_master_sha(self, repo: Repo) -> str:
         # GET #/repos/:owner/:repo/git/refs/:ref
-        url = 'https://api.github.com/repos/{}/{}/git/refs?access_token={}'.format(
+        url = '{}/repos/{}/{}/git/refs?access_token={}'.format(
+            self.api_url,
             repo.owner,
             repo.name,
             self.access_token)
-        r = requests_retry_session().get(url, headers=self.headers)
+        r = self.client.get(url, headers=self.headers)
         if r.status_code == 200:
-            master_ref = [r for r in r.json() if 'master' in r['ref']][0]
+            master_ref = [r for r in _json(r) if 'master' in r['ref']][0]
             commit_sha = master_ref['object']['sha']
             return commit_sha
         return None
 
+    @traced()
     def compare_commits(self, repo: Repo, base: str, head: str) -> List[Commit]:
         # /repos/:owner/:repo/compare/:base...:head
-        url = 'https://api.github.com/repos/{}/{}/compare/{}...{}?access_token={}'.format(
+        url = '{}/repos/{}/{}/compare/{}...{}?access_token={}'.format(
+            self.api_url,
             repo.owner,
             repo.name,
             base,
             head,
             self.access_token)
-        r = requests_retry_session().get(url, headers=self.headers)
+        r = self.client.get(url, headers=self.headers)
 
         if r.status_code == 200:
-            cmp = r.json()
+            cmp = _json(r)
 
             return cmp['ahead_by'], [Commit(c) for c in cmp['commits']]
         return None, None
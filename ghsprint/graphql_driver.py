@@ -0,0 +1,322 @@
+import concurrent.futures
+from datetime import datetime
+from typing import List, Tuple
+
+from .board_card import Card
+from .board_stuff import Column
+from .ghdriver import GithubHelper, _json
+from .pr_stuff import PR, Review
+from .repo_stuff import Repo
+from .tracing import traced
+from .utils import str2date
+
+_timeline_item_types = 'LABELED_EVENT, UNLABELED_EVENT, CLOSED_EVENT, REOPENED_EVENT, ASSIGNED_EVENT, CROSS_REFERENCED_EVENT'
+
+_timeline_fields = '''
+pageInfo { hasNextPage endCursor }
+nodes {
+  __typename
+  ... on LabeledEvent { id createdAt label { name } }
+  ... on UnlabeledEvent { id createdAt label { name } }
+  ... on ClosedEvent { id createdAt }
+  ... on ReopenedEvent { id createdAt }
+  ... on AssignedEvent { id createdAt assignee { ... on User { login } } }
+  ... on CrossReferencedEvent {
+    id createdAt
+    source {
+      __typename
+      ... on Issue { number title state closedAt repository { nameWithOwner } }
+      ... on PullRequest { number title state closedAt repository { nameWithOwner } }
+    }
+  }
+}'''
+
+# the fields of the card content, a PR on the board is a story like an issue
+_content_fields = '''
+id databaseId number title url state closedAt updatedAt
+repository { nameWithOwner }
+assignees(first: 20) { nodes { login } }
+labels(first: 30) { nodes { name } }
+timelineItems(first: 100, itemTypes: [%s]) { %s }''' % (_timeline_item_types, _timeline_fields)
+
+_projects_query = '''
+query($owner: String!, $name: String!) {
+  rateLimit { cost remaining }
+  repository(owner: $owner, name: $name) { projects(first: 100) { nodes { id databaseId name } } }
+}'''
+
+_columns_query = '''
+query($project: ID!) {
+  rateLimit { cost remaining }
+  node(id: $project) { ... on Project { columns(first: 100) { nodes { id databaseId name } } } }
+}'''
+
+_cards_query = '''
+query($column: ID!, $first: Int!, $after: String) {
+  rateLimit { cost remaining }
+  node(id: $column) {
+    ... on ProjectColumn {
+      cards(first: $first, after: $after, archivedState: NOT_ARCHIVED) {
+        pageInfo { hasNextPage endCursor }
+        nodes {
+          databaseId createdAt updatedAt
+          content {
+            __typename
+            ... on Issue { %s }
+            ... on PullRequest { %s }
+          }
+        }
+      }
+    }
+  }
+}''' % (_content_fields, _content_fields)
+
+_timeline_query = '''
+query($issue: ID!, $after: String) {
+  rateLimit { cost remaining }
+  node(id: $issue) {
+    ... on Issue { timelineItems(first: 100, after: $after, itemTypes: [%s]) { %s } }
+    ... on PullRequest { timelineItems(first: 100, after: $after, itemTypes: [%s]) { %s } }
+  }
+}''' % ((_timeline_item_types, _timeline_fields) * 2)
+
+_pulls_query = '''
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  rateLimit { cost remaining }
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId number title state createdAt updatedAt url mergedAt body isDraft
+        additions deletions changedFiles
+        mergeCommit { oid }
+        author { login }
+        labels(first: 30) { nodes { name } }
+        reviews(first: 50) { totalCount nodes { submittedAt url state author { login } } }
+      }
+    }
+  }
+}'''
+
+
+class GraphQLError(RuntimeError):
+    pass
+
+
+class GraphQLGithubHelper(object):
+    """Fetches the board, the issues with their timelines and the PRs with their reviews through the GraphQL API.
+
+    One query returns a page of cards together with their issues and timelines, one more a page of PRs with their
+    reviews, instead of two REST calls per card and two per PR. The responses are translated to the REST shapes, so
+    the same `Card`, `Issue`, `Event`, `PR` and `Review` objects are built.
+    The page size of a paged query is halved whenever GitHub rejects it as too expensive, for its following pages
+    too, the next paged query starts again with `page_size`.
+    """
+
+    def __init__(self, ghh: GithubHelper, graphql_url: str = None, page_size=50, max_workers=10):
+        self.ghh = ghh
+        self.graphql_url = graphql_url or ghh.api_url + '/graphql'
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.headers = {'Authorization': 'bearer {}'.format(ghh.access_token)}
+        self.num_queries = 0
+        self.cost = 0
+        self._project_node_ids = {}
+
+    @traced()
+    def query(self, query: str, **variables) -> dict:
+        r = self.ghh.client.post(self.graphql_url, json={'query': query, 'variables': variables}, headers=self.headers)
+        self.num_queries += 1
+        if r.status_code != 200:
+            raise GraphQLError(f'GraphQL request failed with status {r.status_code}')
+        result = _json(r)
+        if result.get('errors'):
+            raise GraphQLError('; '.join(e.get('type', '') + ' ' + e.get('message', '') for e in result['errors']))
+        data = result['data']
+        self.cost += (data.get('rateLimit') or {}).get('cost', 1)
+        return data
+
+    def _paged_query(self, query: str, page_size: int, **variables) -> Tuple[dict, int]:
+        """Runs a query with `first` set to `page_size`, halving it while the query is too expensive.
+
+        Returns the data and the page size used, the one for the next page. It is kept per query, so the queries of
+        other threads are not affected.
+        """
+        while True:
+            try:
+                return self.query(query, first=page_size, **variables), page_size
+            except GraphQLError as e:
+                if page_size > 1 and ('MAX_NODE_LIMIT_EXCEEDED' in str(e) or 'timeout' in str(e).lower() or 'status 502' in str(e)):
+                    page_size //= 2
+                    continue
+                raise
+
+    def rest_url(self, repo_name_with_owner: str) -> str:
+        return '{}/repos/{}'.format(self.ghh.api_url, repo_name_with_owner)
+
+    # translation of GraphQL nodes to the dicts of the REST API
+    def _timeline_to_rest(self, nodes: List[dict]) -> List[dict]:
+        events = []
+        for node in nodes:
+            kind = node.get('__typename')
+            ev = {'id': node.get('id'), 'created_at': node.get('createdAt')}
+            if kind in ('LabeledEvent', 'UnlabeledEvent'):
+                ev['event'] = 'labeled' if kind == 'LabeledEvent' else 'unlabeled'
+                ev['label'] = {'name': (node.get('label') or {}).get('name')}
+            elif kind == 'ClosedEvent':
+                ev['event'] = 'closed'
+            elif kind == 'ReopenedEvent':
+                ev['event'] = 'reopened'
+            elif kind == 'AssignedEvent':
+                ev['event'] = 'assigned'
+                ev['assignee'] = {'login': (node.get('assignee') or {}).get('login')}
+            elif kind == 'CrossReferencedEvent':
+                source = node.get('source') or {}
+                if source.get('__typename') not in ('Issue', 'PullRequest'):
+                    continue
+                ev['event'] = 'cross-referenced'
+                issue = {
+                    'repository_url': self.rest_url(source['repository']['nameWithOwner']),
+                    'title': source.get('title'),
+                    'number': source.get('number'),
+                    'state': 'open' if source.get('state') == 'OPEN' else 'closed',
+                    'closed_at': source.get('closedAt'),
+                }
+                if source['__typename'] == 'PullRequest':
+                    issue['pull_request'] = {}
+                ev['source'] = {'issue': issue}
+            else:
+                continue
+            events.append(ev)
+        return events
+
+    def _issue_to_rest(self, content: dict) -> dict:
+        return {
+            'id': content.get('databaseId'),
+            'number': content.get('number'),
+            'title': content.get('title'),
+            'html_url': content.get('url'),
+            # the issue of a merged PR is closed
+            'state': ('open' if content['state'] == 'OPEN' else 'closed') if content.get('state') else None,
+            'closed_at': content.get('closedAt'),
+            'updated_at': content.get('updatedAt'),
+            'assignees': [{'login': a['login']} for a in content['assignees']['nodes']],
+            'labels': [{'name': label['name']} for label in content['labels']['nodes']],
+        }
+
+    def _pr_to_rest(self, node: dict) -> Tuple[dict, dict]:
+        pr_dict = {
+            'id': node['databaseId'],
+            'number': node['number'],
+            'title': node['title'],
+            'state': 'open' if node['state'] == 'OPEN' else 'closed',
+            'created_at': node['createdAt'],
+            'updated_at': node['updatedAt'],
+            'html_url': node['url'],
+            'merged_at': node['mergedAt'],
+            'body': node['body'] or '',
+            'merge_commit_sha': (node.get('mergeCommit') or {}).get('oid'),
+            'user': {'login': (node.get('author') or {}).get('login', 'ghost')},
+        }
+        data = {
+            'additions': node['additions'],
+            'deletions': node['deletions'],
+            'changed_files': node['changedFiles'],
+            'labels': [{'name': label['name']} for label in node['labels']['nodes']],
+            'mergeable_state': 'draft' if node['isDraft'] else 'unknown',
+        }
+        return pr_dict, data
+
+    @staticmethod
+    def _review_to_rest(node: dict) -> dict:
+        return {
+            'submitted_at': node.get('submittedAt'),
+            'html_url': node['url'],
+            'state': node['state'],
+            'user': {'login': (node.get('author') or {}).get('login', 'ghost')},
+        }
+
+    # fetching
+    @traced()
+    def get_all_projects(self, repo: Repo) -> List[dict]:
+        data = self.query(_projects_query, owner=repo.owner, name=repo.name)
+        projects = ((data.get('repository') or {}).get('projects') or {}).get('nodes', [])
+        self._project_node_ids.update((p['databaseId'], p['id']) for p in projects)
+        return [{'id': p['databaseId'], 'name': p['name']} for p in projects]
+
+    @traced()
+    def get_all_columns(self) -> List[Tuple[Column, str]]:
+        """Columns of the project with their node ids."""
+        data = self.query(_columns_query, project=self._project_node_ids[self.ghh.project_id])
+        return [(Column(self.ghh.project_id, {'id': col['databaseId'], 'name': col['name']}), col['id'])
+                for col in data['node']['columns']['nodes'] if col['name'] not in self.ghh.cols_ignore]
+
+    def _full_timeline(self, issue_node_id: str, timeline: dict) -> List[dict]:
+        nodes = list(timeline['nodes'])
+        page_info = timeline['pageInfo']
+        while page_info['hasNextPage']:
+            data = self.query(_timeline_query, issue=issue_node_id, after=page_info['endCursor'])
+            timeline = data['node']['timelineItems']
+            nodes.extend(timeline['nodes'])
+            page_info = timeline['pageInfo']
+        return nodes
+
+    @traced()
+    def get_all_cards(self, col: Column, column_node_id: str) -> List[Card]:
+        """Cards of a column, issue cards come with their issue and events already set."""
+        cards = []
+        timelines = []
+        after = None
+        page_size = self.page_size
+        while True:
+            data, page_size = self._paged_query(_cards_query, page_size, column=column_node_id, after=after)
+            page = data['node']['cards']
+            for node in page['nodes']:
+                content = node.get('content') or {}
+                card_dict = {'id': node['databaseId'], 'created_at': node['createdAt'], 'updated_at': node['updatedAt']}
+                # like on the REST API, the content of a PR card is its issue
+                if content.get('__typename') in ('Issue', 'PullRequest'):
+                    card_dict['content_url'] = '{}/issues/{}'.format(self.rest_url(content['repository']['nameWithOwner']), content['number'])
+                card = Card(col, card_dict)
+                if card.has_issue:
+                    card.set_issue(self.ghh.register_issue(card.repo, self._issue_to_rest(content)))
+                    timelines.append((card, content['id'], content['timelineItems']))
+                cards.append(card)
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+
+        # only long timelines need more queries, they are run concurrently
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            full_timelines = executor.map(lambda t: self._full_timeline(t[1], t[2]), timelines)
+            for (card, _, _), timeline in zip(timelines, full_timelines):
+                card.set_events(self.ghh.make_events(self._timeline_to_rest(timeline)))
+        return cards
+
+    def iter_PRs(self, repo: Repo, updated_since: datetime = None):
+        """Yields PRs with reviews and data already applied, most recently updated first."""
+        after = None
+        page_size = self.page_size
+        while True:
+            data, page_size = self._paged_query(_pulls_query, page_size, owner=repo.owner, name=repo.name, after=after)
+            page = data['repository']['pullRequests']
+            for node in page['nodes']:
+                if updated_since and str2date(node['updatedAt']) < updated_since:
+                    return
+                pr_dict, pr_data = self._pr_to_rest(node)
+                pr = self.ghh.register_pr(repo, pr_dict)
+                pr.update(pr_data)
+                if node['reviews']['totalCount'] > len(node['reviews']['nodes']):
+                    pr.add_reviews(self.ghh.fetch_PR_reviews(pr))
+                else:
+                    pr.add_reviews([Review(pr, self._review_to_rest(rev)) for rev in node['reviews']['nodes']])
+                yield pr
+            if not page['pageInfo']['hasNextPage']:
+                return
+            after = page['pageInfo']['endCursor']
+
+    @traced()
+    def get_all_PRs(self, updated_since: datetime = None) -> List[PR]:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            per_repo = executor.map(lambda repo: list(self.iter_PRs(repo, updated_since=updated_since)), self.ghh.repos)
+            return [pr for prs in per_repo for pr in prs]
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ghsprint')
+
+_token_pattern = re.compile(r'access_token=[^&>;\s]*')
+
+
+def strip_token(url: str) -> str:
+    """Removes the `access_token` query parameter, the token is never written to disk or used as key."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'access_token']
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class ResponseCache(object):
+    """On-disk cache of GET responses, revalidated with `If-None-Match` / `If-Modified-Since`.
+
+    GitHub answers an unchanged resource with `304 Not Modified`, which does not count against the rate limit.
+    Every entry is one file, its modification time is the last use, the least recently used entries are removed
+    once the cache grows over `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._size = sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file())
+
+    def key(self, url: str, params: dict = None, headers: dict = None) -> str:
+        url = strip_token(url)
+        if params:
+            url += '&' + urlencode(sorted(params.items()))
+        accept = (headers or {}).get('Accept', '')
+        return hashlib.sha256('{} {}'.format(accept, url).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key: str):
+        """Returns the cached entry as dict with `headers` and `body`, or None and counts a miss."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                meta, body = f.read().split(b'\n', 1)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        entry = json.loads(meta)
+        entry['body'] = body
+        with self._lock:
+            self.revalidated += 1
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: dict) -> dict:
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    @staticmethod
+    def restore_links(entry: dict, url: str) -> dict:
+        """Headers of `entry`, with the token of `url` put back into the stored `Link` header."""
+        headers = dict(entry['headers'])
+        if 'Link' in headers:
+            token = dict(parse_qsl(urlsplit(url).query)).get('access_token', '')
+            headers['Link'] = headers['Link'].replace('access_token=', 'access_token=' + token)
+        return headers
+
+    def not_modified(self, key: str):
+        with self._lock:
+            self.hits += 1
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def store(self, key: str, url: str, headers: dict, body: bytes):
+        headers = {name: headers.get(name) for name in ('ETag', 'Last-Modified', 'Link', 'Content-Type') if headers.get(name)}
+        if not headers.get('ETag') and not headers.get('Last-Modified'):
+            return
+        if 'Link' in headers:
+            headers['Link'] = _token_pattern.sub('access_token=', headers['Link'])
+        data = json.dumps({'url': strip_token(url), 'headers': headers}).encode() + b'\n' + body
+
+        path = self._path(key)
+        tmp_path = '{}.{}.tmp'.format(path, threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            try:
+                self._size -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted((e for e in os.scandir(self.cache_dir) if e.is_file() and not e.name.endswith('.tmp')), key=lambda e: e.stat().st_mtime)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self._size <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._size -= size
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated}
@@ -11,15 +11,19 @@ class states(Enum):
 
 
 class Issue(object):
+    __slots__ = ('repo', 'closed_at', 'updated_at', 'id', 'number', 'title', 'url', 'assignees', 'labels', 'state')
+
     def __init__(self, repo: Repo, issue_dict: dict):
         self.repo = repo
         self.closed_at = str2date(issue_dict.get('closed_at', None))
+        self.updated_at = str2date(issue_dict.get('updated_at', None))
         self.id = issue_dict.get('id', None)
         self.number = issue_dict.get('number', None)
         self.title = issue_dict.get('title', None)
         self.url = issue_dict.get('html_url', None)
-        self.assignees = issue_dict.get('assignees', [])
-        self.labels = issue_dict.get('labels', [])
+        # only the login of the assignees and the name of the labels are used
+        self.assignees = [{'login': user['login']} for user in issue_dict.get('assignees') or []]
+        self.labels = [{'name': label['name']} for label in issue_dict.get('labels') or []]
         state_string = issue_dict.get('state', None)
         self.state = None
         if state_string:
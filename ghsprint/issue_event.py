@@ -1,14 +1,26 @@
+import sys
+from functools import lru_cache
+
 from .issue import states
 from .utils import str2date
 from .repo_stuff import Repo
 
+# the repos of cross-referenced issues are few, they are shared by all events
+_source_repo = lru_cache(maxsize=1024)(Repo)
+
 
 class Event(object):
+    """One item of an issue timeline, only the fields needed for the report are kept."""
+    __slots__ = ('date', 'id', 'event', 'label', 'label_val', 'assignee', 'source_title', 'source_number', 'source_closed_at',
+                 'source_state', 'source_is_pr', 'source_repo')
+
     def __init__(self, ev, label2val: dict = {}):
         self.date = str2date(ev['created_at'])
         self.id = ev.get('id', None)
-        self.event = ev['event']
+        self.event = sys.intern(ev['event'])
         self.label = ev.get('label', {}).get('name', None)
+        if self.label is not None:
+            self.label = sys.intern(self.label)
         self.label_val = label2val.get(self.label, None)
         self.assignee = ev.get('assignee', {}).get('login', None)
 
@@ -23,10 +35,9 @@ class Event(object):
         self.source_repo = None
         if src:
             owner, repo = issue['repository_url'].split('/')[-2:]
-            self.source_repo = Repo(owner, repo)
+            self.source_repo = _source_repo(owner, repo)
             self.source_title = issue.get('title', None)
             self.source_number = issue.get('number', None)
-            self.source_closed_at = str2date(self.source_closed_at)
+            self.source_closed_at = str2date(issue.get('closed_at', None))
             self.source_state = states[issue.get('state', None)]
             self.source_is_pr = 'pull_request' in issue
-            self.source_body = issue['body']
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_KEYWORD_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'ghsprint-keywords.json')
+
+# the english stopwords of NLTK, which Rake uses by default
+ENGLISH_STOPWORDS = frozenset('''
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves he him his himself
+she she's her hers herself it it's its itself they them their theirs themselves what which who whom this that that'll
+these those am is are was were be been being have has had having do does did doing a an the and but if or because as
+until while of at by for with about against between into through during before after above below to from up down in
+out on off over under again further then once here there when where why how all any both each few more most other some
+such no nor not only own same so than too very s t can will just don don't should should've now d ll m o re ve y ain
+aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't haven haven't isn isn't ma mightn
+mightn't mustn mustn't needn needn't shan shan't shouldn shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+'''.split())
+
+# the tokens of nltk's `wordpunct_tokenize`, runs of punctuation are matched as empty words
+_token_pattern = re.compile(r'(\w+)|[^\w\s]+')
+
+
+class DegreeKeywords(object):
+    """Dependency-free keyword scores, the word degrees of RAKE.
+
+    A title is split into phrases at stopwords and punctuation, the degree of a word is the summed length of the
+    phrases it occurs in. Phrases never span two titles, so the degrees of all titles are the sum of the degrees of
+    each title, the same as `Rake.get_word_degrees` of the titles joined by `. `. Unlike Rake, runs of punctuation
+    like `--` or `?.` always separate phrases instead of counting as words.
+    """
+    name = 'degree'
+
+    def __init__(self, stopwords=ENGLISH_STOPWORDS):
+        self.to_ignore = frozenset(stopwords) | {''}
+
+    def word_degrees(self, title: str) -> Dict[str, int]:
+        degrees = Counter()
+        phrase = []
+        for token in _token_pattern.findall(title.lower()) + ['']:
+            if token not in self.to_ignore:
+                phrase.append(token)
+            elif phrase:
+                for word in phrase:
+                    degrees[word] += len(phrase)
+                phrase = []
+        return dict(degrees)
+
+
+class RakeKeywords(object):
+    """Word degrees of `rake_nltk.Rake`, requires the NLTK stopwords and punkt data."""
+    name = 'rake'
+
+    def __init__(self):
+        from rake_nltk import Rake
+
+        self.rake = Rake()
+
+    def word_degrees(self, title: str) -> Dict[str, int]:
+        self.rake.extract_keywords_from_text(title)
+        return dict(self.rake.get_word_degrees())
+
+
+keyword_engines = {engine.name: engine for engine in (DegreeKeywords, RakeKeywords)}
+
+
+class KeywordCache(object):
+    """Word degrees per title, kept across runs in a JSON file.
+
+    Entries are keyed by engine, issue id and a hash of the title, so only new or renamed stories are scored again.
+    One cache can be shared by the reports rendered concurrently.
+    """
+
+    def __init__(self, path=DEFAULT_KEYWORD_CACHE_PATH, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._changed = False
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(engine: str, issue_id, title: str) -> str:
+        return '{}:{}:{}'.format(engine, issue_id, hashlib.sha1(title.encode()).hexdigest())
+
+    def word_degrees(self, engine, issue_id, title: str) -> Dict[str, int]:
+        key = self.key(engine.name, issue_id, title)
+        with self._lock:
+            degrees = self.entries.get(key)
+            if degrees is not None:
+                self.hits += 1
+                return degrees
+        degrees = engine.word_degrees(title)
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = degrees
+            self._changed = True
+        return degrees
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            # the oldest entries are dropped first, json keeps the order of insertion
+            entries = dict(list(self.entries.items())[-self.max_entries:])
+            self._changed = False
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(self.path, threading.get_ident())
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def top_keywords(titles: Iterable[Tuple[object, str]], engine=None, cache: KeywordCache = None, n=10) -> List[str]:
+    """The `n` words of the highest degree over all `(issue id, title)` pairs."""
+    engine = engine or DegreeKeywords()
+    degrees = Counter()
+    for issue_id, title in titles:
+        title = title.strip()
+        degrees.update(cache.word_degrees(engine, issue_id, title) if cache else engine.word_degrees(title))
+    return [word for word, _ in sorted(degrees.items(), key=lambda item: item[1], reverse=True)[:n]]
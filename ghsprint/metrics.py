@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+from time import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def endpoint_template(path: str) -> str:
+    """The endpoint of a request path, `/repos/acme/api/issues/12/timeline` is `/repos/{o}/{r}/issues/{n}/timeline`."""
+    parts = path.rstrip('/').split('/')
+    if len(parts) > 3 and parts[1] == 'repos':
+        parts[2:4] = ['{o}', '{r}']
+    return '/'.join('{n}' if part.isdigit() else part for part in parts) or '/'
+
+
+def _label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: dict) -> str:
+    return '{' + ','.join('{}="{}"'.format(name, _label_value(value)) for name, value in labels.items()) + '}'
+
+
+class Endpoint(object):
+    __slots__ = ('latencies', 'bytes', 'retries', 'statuses', 'remaining')
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.bytes = 0
+        self.retries = 0
+        self.statuses: Dict[str, int] = {}
+        self.remaining = None
+
+
+class RequestMetrics(object):
+    """The requests of a run by method and endpoint template (e.g. `GET /repos/{o}/{r}/issues/{n}/timeline`).
+
+    For every endpoint the number of requests, their latency, the bytes received, the retries, the status codes (a
+    revalidated cache entry counts as `304`) and the lowest `X-RateLimit-Remaining` seen are kept. Requests that failed
+    without response have the status `error`. `base_path` is the path of the API url, e.g. `/api/v3` on GitHub
+    Enterprise, it is not part of the templates.
+    """
+
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, base_path=''):
+        self.base_path = base_path.rstrip('/')
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints: Dict[Tuple[str, str], Endpoint] = {}
+            self.started_at = time()
+            self.remaining = None
+
+    def template(self, url: str) -> str:
+        path = urlsplit(url).path
+        if self.base_path and path.startswith(self.base_path + '/'):
+            path = path[len(self.base_path):]
+        return endpoint_template(path)
+
+    def observe(self, method: str, url: str, status, seconds: float, num_bytes=0, retries=0, remaining: int = None):
+        key = (method, self.template(url))
+        status = str(status)
+        with self._lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = Endpoint()
+            endpoint.latencies.append(seconds)
+            endpoint.bytes += num_bytes
+            endpoint.retries += retries
+            endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+            if remaining is not None:
+                endpoint.remaining = remaining if endpoint.remaining is None else min(endpoint.remaining, remaining)
+                self.remaining = remaining
+
+    @property
+    def num_requests(self) -> int:
+        with self._lock:
+            return sum(len(endpoint.latencies) for endpoint in self.endpoints.values())
+
+    def to_dict(self) -> dict:
+        """The metrics of the run and of every endpoint, the slowest endpoints (by total latency) first."""
+        with self._lock:
+            endpoints = {}
+            for (method, template), endpoint in sorted(self.endpoints.items(), key=lambda item: -sum(item[1].latencies)):
+                latency = {'p{:g}'.format(100 * q): percentile(endpoint.latencies, q) for q in self.quantiles}
+                latency.update({'max': max(endpoint.latencies), 'sum': sum(endpoint.latencies)})
+                endpoints['{} {}'.format(method, template)] = {
+                    'requests': len(endpoint.latencies), 'latency': latency, 'bytes': endpoint.bytes, 'retries': endpoint.retries,
+                    'not_modified': endpoint.statuses.get('304', 0), 'statuses': dict(sorted(endpoint.statuses.items())),
+                    'rate_limit_remaining': endpoint.remaining}
+            statuses = {}
+            for endpoint in self.endpoints.values():
+                for status, count in endpoint.statuses.items():
+                    statuses[status] = statuses.get(status, 0) + count
+            return {'started_at': self.started_at, 'duration': time() - self.started_at,
+                    'requests': sum(e['requests'] for e in endpoints.values()), 'bytes': sum(e['bytes'] for e in endpoints.values()),
+                    'retries': sum(e['retries'] for e in endpoints.values()), 'not_modified': statuses.get('304', 0),
+                    'statuses': dict(sorted(statuses.items())), 'rate_limit_remaining': self.remaining, 'endpoints': endpoints}
+
+    def to_prometheus(self, labels: dict = None) -> str:
+        """The metrics in the Prometheus text format, e.g. for the textfile collector of the node exporter.
+
+        `labels` are added to every sample, e.g. the name of the project.
+        """
+        labels = dict(labels or {})
+        metrics = self.to_dict()
+        lines = []
+
+        def metric(name: str, kind: str, help: str, samples):
+            lines.extend(['# HELP ghsprint_{} {}'.format(name, help), '# TYPE ghsprint_{} {}'.format(name, kind)])
+            for suffix, sample_labels, value in samples:
+                if value is not None:
+                    lines.append('ghsprint_{}{}{} {}'.format(name, suffix, _labels(dict(labels, **sample_labels)), value))
+
+        endpoints = [(dict(zip(('method', 'endpoint'), key.split(' ', 1))), endpoint) for key, endpoint in metrics['endpoints'].items()]
+        metric('requests_total', 'counter', 'Requests sent to GitHub by endpoint and status.',
+               [('', dict(e, status=status), count) for e, endpoint in endpoints for status, count in endpoint['statuses'].items()])
+        metric('request_duration_seconds', 'summary', 'Latency of the requests by endpoint.',
+               [('', dict(e, quantile='{:g}'.format(q)), endpoint['latency']['p{:g}'.format(100 * q)]) for e, endpoint in endpoints for q in self.quantiles]
+               + [(suffix, e, value) for e, endpoint in endpoints
+                  for suffix, value in (('_sum', endpoint['latency']['sum']), ('_count', endpoint['requests']))])
+        metric('response_bytes_total', 'counter', 'Bytes of the response bodies by endpoint, 0 for a 304.',
+               [('', e, endpoint['bytes']) for e, endpoint in endpoints])
+        metric('request_retries_total', 'counter', 'Requests sent again after an error or throttling, by endpoint.',
+               [('', e, endpoint['retries']) for e, endpoint in endpoints])
+        metric('not_modified_total', 'counter', 'Cached responses revalidated with a 304 by endpoint, they do not count against the rate limit.',
+               [('', e, endpoint['not_modified']) for e, endpoint in endpoints])
+        metric('rate_limit_remaining_min', 'gauge', 'Lowest X-RateLimit-Remaining seen by endpoint.',
+               [('', e, endpoint['rate_limit_remaining']) for e, endpoint in endpoints])
+        metric('rate_limit_remaining', 'gauge', 'X-RateLimit-Remaining at the end of the run.', [('', {}, metrics['rate_limit_remaining'])])
+        metric('run_duration_seconds', 'gauge', 'Duration of the run.', [('', {}, metrics['duration'])])
+        metric('run_timestamp_seconds', 'gauge', 'Unix time of the end of the run.', [('', {}, metrics['started_at'] + metrics['duration'])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str, labels: dict = None):
+        """Writes the metrics to `path`, in the Prometheus text format if it ends with `.prom`, as JSON otherwise.
+
+        The file is replaced at once, a collector reading it never sees half of it.
+        """
+        if path.endswith('.prom'):
+            content = self.to_prometheus(labels)
+        else:
+            content = json.dumps(dict(self.to_dict(), labels=dict(labels or {})), indent=2)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
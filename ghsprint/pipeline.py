@@ -0,0 +1,82 @@
+import concurrent.futures
+from time import time
+from typing import Callable, Dict, List, Sequence
+
+from .tracing import span
+
+
+class Task(object):
+    def __init__(self, name: str, fn: Callable, deps: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.start = None
+        self.end = None
+        self.result = None
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class Pipeline(object):
+    """Dependency graph of tasks, every task is started as soon as all tasks it depends on are done.
+
+    A task is called with the results of its dependencies as positional arguments, in the order of `deps`.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, Task] = {}
+        self.started_at = None
+
+    def add(self, name: str, fn: Callable, deps: Sequence[str] = ()):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f'task `{name}` depends on unknown task `{dep}`')
+        self.tasks[name] = Task(name, fn, deps)
+
+    def _run_task(self, task: Task):
+        task.start = time()
+        try:
+            with span(task.name, 'pipeline'):
+                return task.fn(*(self.tasks[dep].result for dep in task.deps))
+        finally:
+            task.end = time()
+
+    def run(self) -> Dict[str, object]:
+        self.started_at = time()
+        waiting = list(self.tasks.values())
+        running = {}
+        finished = set()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.tasks) or 1) as executor:
+            while waiting or running:
+                for task in [t for t in waiting if all(dep in finished for dep in t.deps)]:
+                    waiting.remove(task)
+                    running[executor.submit(self._run_task, task)] = task
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    task.result = future.result()
+                    finished.add(task.name)
+        return {name: task.result for name, task in self.tasks.items()}
+
+    def critical_path(self) -> List[Task]:
+        """The chain of tasks that determined the total run time, following the dependency that finished last."""
+        tasks = [t for t in self.tasks.values() if t.end is not None]
+        if not tasks:
+            return []
+        path = [max(tasks, key=lambda t: t.end)]
+        while path[-1].deps:
+            path.append(max((self.tasks[dep] for dep in path[-1].deps), key=lambda t: t.end))
+        return path[::-1]
+
+    def timings(self) -> List[str]:
+        lines = []
+        for task in sorted(self.tasks.values(), key=lambda t: t.start or 0):
+            if task.end is not None:
+                lines.append('time for {}:\t{:.1f}s (from {:.1f}s to {:.1f}s)'.format(
+                    task.name, task.duration, task.start - self.started_at, task.end - self.started_at))
+        path = self.critical_path()
+        if path:
+            lines.append('critical path:\t{} ({:.1f}s)'.format(' > '.join(t.name for t in path), path[-1].end - self.started_at))
+        return lines
@@ -8,6 +8,9 @@ from .utils import str2date
 
 
 class PR(object):
+    __slots__ = ('repo', 'id', 'number', 'title', 'state', 'created_at', 'updated_at', 'url', 'merged_at', 'is_in_prod', 'merge_commit_sha',
+                 'user_name', 'labels', 'deletions', 'additions', 'changed_files', 'is_draft', 'reviews', 'closes')
+
     def __init__(self, repo: Repo, pr_dict: dict):
         self.repo = repo
         self.id = pr_dict['id']
@@ -20,7 +23,6 @@ class PR(object):
 
         self.merged_at = str2date(pr_dict['merged_at'])
         self.is_in_prod = None
-        self.body = pr_dict['body']
         self.merge_commit_sha = pr_dict['merge_commit_sha']
         self.user_name = pr_dict['user']['login']
 
@@ -29,9 +31,10 @@ class PR(object):
         self.additions = None
         self.changed_files = None
         self.is_draft = False
+        self.reviews = None
 
         self.closes = []
-        closes_lines = [line.strip() for line in pr_dict['body'].lower().split('\r\n') if line.startswith('- closes ')]
+        closes_lines = [line.strip() for line in (pr_dict['body'] or '').lower().split('\r\n') if line.startswith('- closes ')]
         if len(closes_lines) > 0:
             for line in closes_lines:
                 issue = Issue.from_closes_line(line, repo)
@@ -45,7 +48,7 @@ class PR(object):
         self.deletions = data['deletions']
         self.additions = data['additions']
         self.changed_files = data['changed_files']
-        self.labels = data['labels']
+        self.labels = [{'name': label['name']} for label in data['labels']]
         self.is_draft = data['mergeable_state'] == 'draft'
 
     def get_state(self):
@@ -56,7 +59,8 @@ class PR(object):
 
     def get_review_state(self, login_to_name_mapping: Dict[str, str]={}):
         ignore_states = [Review.states.DISMISSED, Review.states.COMMENTED]
-        unique_reviewers = list({o.reviewer for o in self.reviews if o.state not in ignore_states})
+        # in the order of their first review, a set would change the order from run to run
+        unique_reviewers = list(dict.fromkeys(o.reviewer for o in self.reviews if o.state not in ignore_states))
         if len(unique_reviewers) == 0:
             return 'not reviewed'
         txt = []
@@ -75,6 +79,8 @@ class Review(object):
         DISMISSED = 3
         PENDING = 4
 
+    __slots__ = ('pr', 'submitted_at', 'url', 'reviewer', 'state')
+
     def __init__(self, pr: PR, rev: dict):
         self.pr = pr
         self.submitted_at = str2date(rev.get('submitted_at', None))
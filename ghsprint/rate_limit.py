@@ -0,0 +1,120 @@
+import threading
+from collections import deque
+from time import time
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter(object):
+    """Shared budget of concurrent requests that follows GitHub's rate limits.
+
+    The number of requests allowed in flight grows by one per round of successful responses and is halved whenever
+    GitHub throttles (AIMD). A `Retry-After` header or an exhausted `X-RateLimit-Remaining` pauses all requests until
+    the given time, and so does a remaining budget of `low_remaining` or less, so the run doesn't die halfway through.
+    Waiting threads are let through in the order they arrived, a thread that keeps sending requests cannot starve others.
+    """
+
+    def __init__(self, max_concurrency=50, min_concurrency=1, low_remaining=None, secondary_wait=60, max_wait=3600):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.low_remaining = max_concurrency if low_remaining is None else low_remaining
+        self.secondary_wait = secondary_wait
+        self.max_wait = max_wait
+
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.remaining = None
+        self.reset_at = None
+
+        self.throttled = 0
+        self.paused = 0.0
+        self._cond = threading.Condition()
+        self._waiting = deque()
+
+    def delay(self) -> float:
+        """Seconds until requests may be sent again."""
+        return max(self.paused_until - time(), 0.0)
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self._waiting or self.delay() > 0 or self.in_flight >= int(self.concurrency):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self):
+        with self._cond:
+            ticket = object()
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    wait = self.delay()
+                    if wait > 0:
+                        self._cond.wait(wait)
+                    elif self._waiting[0] is not ticket or self.in_flight >= int(self.concurrency):
+                        self._cond.wait()
+                    else:
+                        break
+            finally:
+                self._waiting.remove(ticket)
+                # the next thread in line may be let through as well
+                self._cond.notify_all()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _pause(self, seconds: float):
+        seconds = min(max(seconds, 0.0), self.max_wait)
+        until = time() + seconds
+        if until > self.paused_until:
+            self.paused += until - max(self.paused_until, time())
+            self.paused_until = until
+
+    def observe(self, status: int, headers, text: str = ''):
+        """Updates the budget from a response, returns the seconds to wait before retrying or None if not throttled."""
+        remaining = _int_header(headers, 'X-RateLimit-Remaining')
+        reset_at = _int_header(headers, 'X-RateLimit-Reset')
+        retry_after = _int_header(headers, 'Retry-After')
+
+        with self._cond:
+            if remaining is not None:
+                self.remaining = remaining
+                self.reset_at = reset_at
+
+            throttled = status == 429 or (status == 403 and (retry_after is not None or remaining == 0 or 'rate limit' in text.lower()))
+            if throttled:
+                self.throttled += 1
+                self.concurrency = max(self.concurrency / 2, self.min_concurrency)
+                if retry_after is not None:
+                    wait = retry_after
+                elif remaining == 0 and reset_at:
+                    wait = reset_at - time() + 1
+                else:
+                    wait = self.secondary_wait
+                self._pause(wait)
+                self._cond.notify_all()
+                return wait
+
+            self.concurrency = min(self.concurrency + 1 / self.concurrency, self.max_concurrency)
+            if remaining is not None and remaining <= self.low_remaining and reset_at:
+                self._pause(reset_at - time() + 1)
+            self._cond.notify_all()
+            return None
+
+    def stats(self) -> dict:
+        return {
+            'remaining': self.remaining,
+            'throttled': self.throttled,
+            'paused': self.paused,
+            'concurrency': int(self.concurrency),
+        }
@@ -2,6 +2,8 @@
 from .utils import str2date
 
 class Repo(object):
+    __slots__ = ('owner', 'name')
+
     def __init__(self, owner:str, name:str):
         self.owner = owner
         self.name = name
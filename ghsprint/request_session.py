@@ -1,9 +1,25 @@
+import collections
+import threading
+import typing
+from concurrent.futures import Future
+from time import perf_counter
+
 import requests
 from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from requests.packages.urllib3.util.retry import Retry
 
+from . import tracing
+from .http_cache import ResponseCache
+from .metrics import RequestMetrics
+from .rate_limit import RateLimiter, _int_header
+
+if typing.TYPE_CHECKING:
+    from .cassette import Cassette
 
-def requests_retry_session(retries=3, backoff_factor=1.0, status_forcelist=(500, 502, 504), session=None):
+
+def requests_retry_session(retries=3, backoff_factor=1.0, status_forcelist=(500, 502, 504), session=None, pool_connections=10, pool_maxsize=10,
+                           pool_block=False):
     session = session or requests.Session()
     retry = Retry(
         total=retries,
@@ -11,8 +27,235 @@ def requests_retry_session(retries=3, backoff_factor=1.0, status_forcelist=(500,
         connect=retries,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
+        # `Retry-After` is handled by the RateLimiter for all threads at once
+        respect_retry_after_header=False,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
+
+
+class HTTPClient(object):
+    """Long-lived client sharing one keep-alive connection pool between all threads.
+
+    `pool_maxsize` is the number of connections kept open per host, it should match the number of worker threads
+    issuing requests, otherwise surplus connections are opened and thrown away after every request.
+    With a `cache` every GET is sent as conditional request and a `304 Not Modified` is answered from the cache.
+    All requests go through the `limiter`, requests throttled by GitHub are retried up to `throttle_retries` times.
+    Identical GETs are sent only once: concurrent callers wait for the request in flight and later callers get the
+    stored response, until `forget_responses` or `reset` is called (e.g. at the start of the next run). Stored
+    responses are dropped least recently used first beyond `max_stored_bytes`.
+    With a `cassette` all requests are recorded to it or replayed from it, the `cache` is not used then.
+    Every request sent is counted in `metrics` by endpoint, they are cleared by `reset` as well.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=50, pool_block=False, retries=3, backoff_factor=1.0, cache: ResponseCache = None,
+                 limiter: RateLimiter = None, throttle_retries=5, cassette: 'Cassette' = None, metrics: RequestMetrics = None,
+                 max_stored_bytes=64 * 1024 * 1024):
+        self.session = requests_retry_session(
+            retries=retries,
+            backoff_factor=backoff_factor,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.pool_maxsize = pool_maxsize
+        self.cache = cache
+        self.cassette = cassette
+        self.limiter = limiter or RateLimiter(max_concurrency=pool_maxsize)
+        self.throttle_retries = throttle_retries
+        self.metrics = metrics or RequestMetrics()
+        self.num_requests = 0
+        self.num_saved = 0
+        self.max_stored_bytes = max_stored_bytes
+        # requests in flight, and the successful responses of the run in the order of their last use
+        self._flights = {}
+        self._responses = collections.OrderedDict()
+        self._stored_bytes = 0
+        self._lock = threading.Lock()
+
+    def forget_responses(self):
+        """The responses received so far are no longer used to deduplicate requests, requests in flight still are."""
+        with self._lock:
+            self._responses = collections.OrderedDict()
+            self._stored_bytes = 0
+
+    def reset(self):
+        """Forgets the responses and the metrics of the previous run."""
+        self.forget_responses()
+        self.metrics.reset()
+
+    def _store_response(self, key, r: requests.Response):
+        with self._lock:
+            old = self._responses.pop(key, None)
+            if old is not None:
+                self._stored_bytes -= len(old.content)
+            self._responses[key] = r
+            self._stored_bytes += len(r.content)
+            while self._stored_bytes > self.max_stored_bytes:
+                _, dropped = self._responses.popitem(last=False)
+                self._stored_bytes -= len(dropped.content)
+
+    def get(self, url, headers=None, params=None) -> requests.Response:
+        key = (url, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+        with self._lock:
+            r = self._responses.get(key)
+            if r is not None:
+                self._responses.move_to_end(key)
+                self.num_saved += 1
+                return r
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.num_saved += 1
+                waiting = True
+            else:
+                flight = self._flights[key] = Future()
+                waiting = False
+        if waiting:
+            with tracing.span('wait for identical request', 'queue'):
+                return flight.result()
+
+        try:
+            r = self._get_throttled(url, headers=headers, params=params)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            # only successful responses are reused, failures are retried by the next caller
+            if r.status_code == 200:
+                self._store_response(key, r)
+            flight.set_result(r)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+        return r
+
+    def _get_throttled(self, url, headers=None, params=None) -> requests.Response:
+        for attempt in range(self.throttle_retries + 1):
+            self._acquire()
+            try:
+                r = self._get(url, headers=headers, params=params, throttled=attempt > 0)
+            finally:
+                self.limiter.release()
+            if self.limiter.observe(r.status_code, r.headers, r.text if r.status_code in (403, 429) else '') is None:
+                break
+        return r
+
+    def post(self, url, json=None, headers=None) -> requests.Response:
+        """POST without cache, used for GraphQL queries."""
+        for attempt in range(self.throttle_retries + 1):
+            self._acquire()
+            try:
+                with self._lock:
+                    self.num_requests += 1
+                start = perf_counter()
+                try:
+                    if self.cassette is not None:
+                        r = self._send_cassette('POST', url, headers=headers, json=json)
+                    else:
+                        r = self.session.post(url, json=json, headers=headers)
+                except requests.RequestException:
+                    self._observe_error('POST', url, start, throttled=attempt > 0)
+                    raise
+                self._observe('POST', url, r, start, throttled=attempt > 0)
+            finally:
+                self.limiter.release()
+            if self.limiter.observe(r.status_code, r.headers, r.text if r.status_code in (403, 429) else '') is None:
+                break
+        return r
+
+    def _get(self, url, headers=None, params=None, throttled=False) -> requests.Response:
+        with self._lock:
+            self.num_requests += 1
+        start = perf_counter()
+        try:
+            r, not_modified = self._send_get(url, headers=headers, params=params)
+        except requests.RequestException:
+            self._observe_error('GET', url, start, throttled=throttled)
+            raise
+        self._observe('GET', url, r, start, throttled=throttled, not_modified=not_modified)
+        return r
+
+    def _send_get(self, url, headers=None, params=None) -> typing.Tuple[requests.Response, bool]:
+        """The response and whether it was revalidated from the cache."""
+        if self.cassette is not None:
+            return self._send_cassette('GET', url, headers=headers, params=params), False
+        if self.cache is None:
+            return self.session.get(url, headers=headers, params=params), False
+
+        key = self.cache.key(url, params, headers)
+        entry = self.cache.load(key)
+        if entry:
+            headers = dict(headers or {}, **self.cache.conditional_headers(entry))
+        r = self.session.get(url, headers=headers, params=params)
+
+        if r.status_code == 304 and entry:
+            self.cache.not_modified(key)
+            return self._cached_response(r, entry), True
+        if r.status_code == 200:
+            self.cache.store(key, url, r.headers, r.content)
+        return r, False
+
+    def _acquire(self):
+        start = perf_counter()
+        self.limiter.acquire()
+        tracer = tracing.tracer
+        if tracer is not None and perf_counter() - start > 0.001:
+            tracer.add('rate limit wait', 'queue', start, perf_counter())
+
+    def _observe(self, method, url, r: requests.Response, start: float, throttled=False, not_modified=False):
+        end = perf_counter()
+        # retries of urllib3 after errors are in the history of the response, a throttled request is sent again by us
+        retry = getattr(r.raw, 'retries', None)
+        retries = len(retry.history) if retry is not None else 0
+        status = 304 if not_modified else r.status_code
+        self.metrics.observe(method, url, status, end - start, num_bytes=0 if not_modified else len(r.content),
+                             retries=retries + int(throttled), remaining=_int_header(r.headers, 'X-RateLimit-Remaining'))
+        tracer = tracing.tracer
+        if tracer is not None:
+            tracer.add('{} {}'.format(method, self.metrics.template(url)), 'http', start, end, {'status': status, 'retries': retries + int(throttled)})
+
+    def _observe_error(self, method, url, start: float, throttled=False):
+        end = perf_counter()
+        self.metrics.observe(method, url, 'error', end - start, retries=int(throttled))
+        tracer = tracing.tracer
+        if tracer is not None:
+            tracer.add('{} {}'.format(method, self.metrics.template(url)), 'http', start, end, {'status': 'error'})
+
+    def _send_cassette(self, method, url, headers=None, params=None, json=None) -> requests.Response:
+        if self.cassette.mode == 'replay':
+            return self.cassette.play(method, url, params=params, headers=headers, json_body=json)
+        r = self.session.request(method, url, headers=headers, params=params, json=json)
+        self.cassette.record(method, url, params, headers, json, r)
+        return r
+
+    def _cached_response(self, not_modified: requests.Response, entry: dict) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.headers = CaseInsensitiveDict(self.cache.restore_links(entry, not_modified.url))
+        # the rate-limit headers of the 304 are the current ones
+        r.headers.update((k, v) for k, v in not_modified.headers.items() if k.lower().startswith('x-ratelimit'))
+        r._content = entry['body']
+        r.encoding = 'utf-8'
+        r.url = not_modified.url
+        r.request = not_modified.request
+        r.elapsed = not_modified.elapsed
+        return r
+
+    def connection_stats(self) -> dict:
+        adapter = self.session.get_adapter('https://')
+        pools = adapter.poolmanager.pools
+        opened = 0
+        for key in pools.keys():
+            opened += pools[key].num_connections
+        return {
+            'requests': self.num_requests,
+            'connections': opened,
+            'reused': max(self.num_requests - opened, 0),
+        }
+
+    def close(self):
+        self.session.close()
+        if self.cassette is not None:
+            self.cassette.close()
@@ -0,0 +1,329 @@
+"""Serves sprint reports from data kept in memory, `python -m ghsprint.serve TOKEN PROJECT REPOS...`.
+
+The data is refreshed in the background every `--interval` seconds, with the response cache all unchanged resources
+are revalidated with conditional requests. Reports are rendered once per refresh, so they are served in milliseconds:
+
+- `GET /report` the report of the current sprint, `GET /report?week=30` the one of another calendar week (up to ±53)
+- `GET /metrics` refresh lag and duration, requests to GitHub by endpoint, latency of the served requests, as JSON
+- `GET /healthz` `200` once the first refresh is done, `503` before
+- `POST /webhook` GitHub webhooks, applied to the data in memory between two refreshes, see `ghsprint.webhooks`
+"""
+import collections
+import json
+import logging
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, time
+from typing import Dict
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+from .http_cache import DEFAULT_CACHE_DIR
+from .metrics import percentile
+from .store import DEFAULT_STORE_PATH
+from .utils import parse_weeks
+from .webhooks import WebhookApplier, load_recorded, record, verify_signature
+
+logger = logging.getLogger('ghsprint.serve')
+
+# reports are served for the calendar weeks of this year, negative weeks count back into last year (`-1` is its last week)
+max_week = 53
+
+
+class SprintServer(object):
+    """Keeps `sprint` in memory, refreshes it every `interval` seconds and serves the rendered reports over HTTP."""
+
+    def __init__(self, sprint, interval=300.0, engine='threads', incremental=False, host='127.0.0.1', port=8080, latency_window=1000,
+                 webhook_secret=None, record_dir=None):
+        self.sprint = sprint
+        self.interval = interval
+        self.engine = engine
+        self.incremental = incremental
+        self.webhook_secret = webhook_secret
+        self.record_dir = record_dir
+
+        # the state served, replaced as a whole after every refresh
+        self.snapshot = None
+        self.reports: Dict[int, str] = {}
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # reports of other weeks are rendered one after the other, each once per refresh
+        self._week_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # webhooks are applied one after the other and never during a refresh
+        self.applier = None
+        self.webhooks = queue.Queue()
+        self.webhook_statuses = collections.Counter()
+
+        self.num_refreshes = 0
+        self.num_failed_refreshes = 0
+        self.last_refresh_duration = None
+        self.last_refresh_requests = None
+        self.last_error = None
+        self.latencies = collections.deque(maxlen=latency_window)
+        self.num_served = collections.Counter()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def refresh(self):
+        """Fetches the sprint and renders the current report, the served state is replaced only if both succeed."""
+        from .sprint import sprint_window
+
+        with self._refresh_lock:
+            start = perf_counter()
+            requests_before = self.sprint.ghh.client.num_requests
+            try:
+                # the current sprint moves on while serving
+                sprint = self.sprint
+                sprint.date_start, sprint.date_end = sprint_window()
+                sprint.fetch_since = min([sprint.date_start] + [sprint_window(week)[0] for week in sprint.weeks])
+                sprint.fetch_all_data(engine=self.engine, incremental=self.incremental)
+                self._render()
+            except Exception as e:
+                self.num_failed_refreshes += 1
+                self.last_error = repr(e)
+                logger.exception('refresh failed')
+                return False
+            self.refreshed_at = time()
+            if self.applier is None:
+                self.applier = WebhookApplier(sprint, self._open_store())
+            else:
+                # the deliveries and deleted cards seen so far still apply to the refreshed sprint
+                if self.applier.store:
+                    self.applier.store.close()
+                self.applier.set_sprint(sprint, self._open_store())
+            self.num_refreshes += 1
+            self.last_refresh_duration = perf_counter() - start
+            self.last_refresh_requests = self.sprint.ghh.client.num_requests - requests_before
+            self.last_error = None
+            return True
+
+    def _open_store(self):
+        if not self.incremental:
+            return None
+        from .store import SyncStore
+
+        return SyncStore(self.sprint.store_path or DEFAULT_STORE_PATH)
+
+    def _render(self):
+        """Renders the current report and the ones of `weeks` and serves them."""
+        # the lists of the sprint are replaced by fetches and webhooks, not changed, so the copy stays consistent
+        snapshot = self.sprint.for_week(None)
+        reports = {None: snapshot.print_report()}
+        reports.update(zip(self.sprint.weeks, self.sprint.print_reports()) if self.sprint.weeks else [])
+        with self._lock:
+            self.snapshot = snapshot
+            self.reports = reports
+
+    def apply_webhook(self, event: str, payload: dict, delivery: str = None) -> str:
+        """Applies a webhook to the sprint and renders the reports again if it changed something."""
+        if self.record_dir:
+            record(self.record_dir, event, delivery, payload)
+        with self._refresh_lock:
+            if self.applier is None:
+                status = 'not ready'
+            else:
+                try:
+                    status = self.applier.apply(event, payload, delivery)
+                    if status == 'applied':
+                        self._render()
+                except Exception:
+                    status = 'failed'
+                    logger.exception('webhook %s %s failed', event, delivery)
+            self.webhook_statuses[status] += 1
+            return status
+
+    def _apply_loop(self):
+        while True:
+            event, payload, delivery = self.webhooks.get()
+            self.apply_webhook(event, payload, delivery)
+
+    def report(self, week=None) -> str:
+        """The report of the calendar week `week`, the current one if not given, None before the first refresh."""
+        if week is not None and not -max_week <= week <= max_week:
+            raise ValueError(f'week {week} is not within ±{max_week}')
+        with self._lock:
+            snapshot, reports = self.snapshot, self.reports
+        if snapshot is None:
+            return None
+        report = reports.get(week)
+        if report is None:
+            with self._week_lock:
+                report = reports.get(week)
+                if report is None:
+                    # rendered at most once per refresh, weeks before the fetched ones lack the PRs without story
+                    report = reports[week] = snapshot.for_week(week).print_report()
+        return report
+
+    def metrics(self) -> dict:
+        latencies = list(self.latencies)
+        return {
+            'refreshed_at': self.refreshed_at,
+            'refresh_lag': None if self.refreshed_at is None else time() - self.refreshed_at,
+            'refresh_interval': self.interval,
+            'refreshes': self.num_refreshes,
+            'failed_refreshes': self.num_failed_refreshes,
+            'last_refresh_duration': self.last_refresh_duration,
+            'last_refresh_requests': self.last_refresh_requests,
+            # the requests to GitHub since the start of the last refresh, including those of webhooks
+            'github_requests': self.sprint.ghh.metrics.to_dict()['endpoints'],
+            'last_error': self.last_error,
+            'requests_served': dict(self.num_served),
+            'webhooks': dict(self.webhook_statuses),
+            'webhooks_queued': self.webhooks.qsize(),
+            'request_latency': {
+                'count': len(latencies),
+                'p50': percentile(latencies, 0.5),
+                'p95': percentile(latencies, 0.95),
+                'max': max(latencies) if latencies else None,
+            },
+        }
+
+    def _start_threads(self):
+        self._thread = threading.Thread(target=self._refresh_loop, name='refresh', daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._apply_loop, name='webhooks', daemon=True).start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def start(self, refresh_first=True):
+        """Serves in background threads, with `refresh_first` only after the first refresh is done."""
+        if refresh_first:
+            self.refresh()
+        self._start_threads()
+        threading.Thread(target=self.httpd.serve_forever, name='http', daemon=True).start()
+
+    def serve_forever(self, replay=()):
+        """Serves after the first refresh, the recorded webhooks of `replay` are applied before."""
+        self.refresh()
+        for event, delivery, payload in load_recorded(replay):
+            self.apply_webhook(event, payload, delivery)
+        self._start_threads()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self._stop.set()
+            self.httpd.server_close()
+
+    def stop(self):
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, status: int, body: str, content_type='text/plain; charset=utf-8'):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                start = perf_counter()
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                try:
+                    if url.path == '/report':
+                        week = int(query['week'][0]) if 'week' in query else None
+                        report = server.report(week)
+                        if report is None:
+                            self._send(503, 'no data yet\n')
+                        else:
+                            self._send(200, report, 'text/markdown; charset=utf-8')
+                    elif url.path == '/metrics':
+                        self._send(200, json.dumps(server.metrics(), indent=2), 'application/json')
+                    elif url.path == '/healthz':
+                        self._send(200 if server.snapshot is not None else 503, 'ok\n' if server.snapshot is not None else 'no data yet\n')
+                    else:
+                        self._send(404, 'not found\n')
+                except (ValueError, OverflowError):
+                    self._send(400, 'invalid week\n')
+                server.num_served[url.path] += 1
+                server.latencies.append(perf_counter() - start)
+
+            def do_POST(self):
+                start = perf_counter()
+                url = urlsplit(self.path)
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if url.path != '/webhook':
+                    self._send(404, 'not found\n')
+                elif server.webhook_secret is not None and not verify_signature(server.webhook_secret, body, self.headers.get('X-Hub-Signature-256')):
+                    self._send(401, 'invalid signature\n')
+                else:
+                    try:
+                        payload = json.loads(body)
+                    except ValueError:
+                        self._send(400, 'invalid payload\n')
+                    else:
+                        # GitHub expects an answer within 10s, webhooks are applied after the answer
+                        server.webhooks.put((self.headers.get('X-GitHub-Event'), payload, self.headers.get('X-GitHub-Delivery')))
+                        self._send(202, 'accepted\n')
+                server.num_served[url.path] += 1
+                server.latencies.append(perf_counter() - start)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=8080, show_default=True)
+@click.option('--interval', default=300.0, show_default=True, help='seconds between two refreshes')
+@click.option('--ignore-columns', default='', help='list of columns names to ignore, separated by commas')
+@click.option('--keep-columns', default='', help='list of columns names to always have in report, separated by commas')
+@click.option('--login-name-mapper', default='', help='<login>:<name>,...')
+@click.option('--special-tags', default='', help='<tag string>,...')
+@click.option('--weeks', callback=parse_weeks, help='calendar weeks like `30-42` or `30,32,35`, also fetched and rendered with every refresh')
+@click.option('--engine', type=click.Choice(['threads', 'async', 'graphql']), default='threads', help='how data is fetched, see `python -m ghsprint --help`')
+@click.option('--incremental', is_flag=True, help='refresh from the local store, only what changed is fetched')
+@click.option('--store', default=DEFAULT_STORE_PATH, show_default=True, help='sqlite file of the incremental refreshes')
+@click.option('--webhook-secret', default=None, help='secret of the GitHub webhooks, deliveries without a valid signature are rejected')
+@click.option('--record-webhooks', default=None, type=click.Path(file_okay=False), help='directory the webhook deliveries are recorded to')
+@click.option('--replay-webhooks', multiple=True, type=click.Path(exists=True),
+              help='recorded deliveries, files or directories, applied after the first refresh')
+@click.option('--api-url', default='https://api.github.com', show_default=True, help='base url of the REST API')
+@click.option('--graphql-url', default=None, help='url of the GraphQL API, default is <api-url>/graphql')
+@click.option('--cache-dir', default=DEFAULT_CACHE_DIR, show_default=True, help='directory of the http response cache')
+@click.option('--cache-size', default=256, show_default=True, help='maximal size of the http response cache in MB')
+@click.option('--no-cache', is_flag=True, help='do not cache http responses')
+@click.option('--max-workers', default=50, help='number of concurrent requests, also the size of the connection pool')
+@click.argument('access-token')
+@click.argument('project-name')
+@click.argument('repos', nargs=-1)
+def start_server(access_token, repos, project_name, host, port, interval, ignore_columns, keep_columns, login_name_mapper, special_tags, weeks,
+                 engine, incremental, store, webhook_secret, record_webhooks, replay_webhooks, api_url, graphql_url, cache_dir, cache_size, no_cache,
+                 max_workers):
+    """Serves the sprint report over HTTP and refreshes it in the background."""
+    from .sprint import Sprint
+
+    logging.basicConfig(level=logging.INFO)
+    sprint = Sprint(access_token, repos, project_name, ignore_columns, keep_columns, login_name_mapper=login_name_mapper, special_tags=special_tags,
+                    max_workers=max_workers, cache_dir=None if no_cache else cache_dir, cache_size=cache_size, api_url=api_url,
+                    graphql_url=graphql_url, store_path=store, weeks=weeks)
+    server = SprintServer(sprint, interval=interval, engine=engine, incremental=incremental, host=host, port=port,
+                          webhook_secret=webhook_secret, record_dir=record_webhooks)
+    logger.info('serving on http://%s:%d/report', *server.address[:2])
+    server.serve_forever(replay=replay_webhooks)
+
+
+if __name__ == '__main__':
+    start_server()
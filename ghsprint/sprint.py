@@ -1,24 +1,81 @@
+import asyncio
 import concurrent.futures
+import copy
 import logging
 import sys
+import threading
 from datetime import date, datetime, timedelta
 from time import time
-from typing import List, Tuple, TypeVar
-
-from dateutil.relativedelta import WE, relativedelta
-from rake_nltk import Rake
-from tqdm import tqdm
+from typing import Dict, List, Tuple, TypeVar
 
 from .board_card import Card
 from .ghdriver import GithubHelper
+from .http_cache import ResponseCache
 from .issue import states
+from .pipeline import Pipeline
+from .pr_stuff import PR, Review
+from .repo_stuff import Repo
+from .tracing import span, traced
+from .utils import date2str, str2date
 
 nl = '\n'
 
 
+def sprint_window(week_number=None, end=None) -> Tuple[datetime, datetime]:
+    """Start and end of the sprint of the calendar week `week_number`, the current sprint if not given."""
+    from dateutil.relativedelta import WE, relativedelta
+
+    sprint_start_day = WE
+    start_hour = 9
+    end_hour = 19
+    sprint_length = 7
+    if not week_number:
+        today = datetime.now()
+        last_wed = today + relativedelta(weekday=sprint_start_day(-1))
+        start = last_wed
+    else:
+        start = date(date.today().year, 1, 1)+timedelta(weeks=week_number) + relativedelta(weekday=sprint_start_day(-1))
+        start = datetime.combine(start, datetime.min.time())
+
+    start = start.replace(hour=start_hour, minute=0, microsecond=0, second=0)
+    if not end:
+        end = start + timedelta(days=sprint_length-1)
+    end = end.replace(hour=end_hour, minute=0, microsecond=0, second=0)
+
+    if end <= start:
+        raise ValueError('end is set incorrectly')
+    return start, end
+
+
 class Sprint(object):
-    def __init__(self, access_token, repos, project_name, ignore_columns, keep_columns, login_name_mapper='', start=None, end=None, week_number=None, special_tags='', verbosity=0):
-        self.ghh = GithubHelper(access_token, repos, project_name, ignore_columns, keep_columns, login_name_mapper=login_name_mapper, special_tags=special_tags, verbosity=verbosity)
+    def __init__(self, access_token, repos, project_name, ignore_columns, keep_columns, login_name_mapper='', start=None, end=None, week_number=None,
+                 special_tags='', verbosity=0, max_workers=50, cache_dir=None, cache_size=256, api_url='https://api.github.com', graphql_url=None,
+                 store_path=None, keyword_engine='degree', keyword_cache_path=None, weeks: List[int] = None, client=None, record_path=None, replay_path=None):
+        from .keywords import keyword_engines
+
+        if keyword_engine not in keyword_engines:
+            raise ValueError(f'unknown keyword engine `{keyword_engine}`')
+        self.keyword_engine = keyword_engine
+        self.keyword_cache_path = keyword_cache_path
+        # set on the sprints of the weeks by `print_reports`, they share one cache saved once
+        self.keyword_cache = None
+        self.max_workers = max_workers
+        self.graphql_url = graphql_url
+        # a client shared by several sprints brings its own cache and is reset by its owner
+        self.owns_client = client is None
+        if client is None:
+            self.cache = ResponseCache(cache_dir, max_bytes=cache_size * 1024 * 1024) if cache_dir else None
+        else:
+            self.cache = client.cache
+        self.store_path = store_path
+        # all requests are recorded to or replayed from a cassette, e.g. for runs without network
+        cassette = None
+        if record_path or replay_path:
+            from .cassette import Cassette
+
+            cassette = Cassette(record_path, mode='record') if record_path else Cassette(replay_path, mode='replay')
+        self.ghh = GithubHelper(access_token, repos, project_name, ignore_columns, keep_columns, login_name_mapper=login_name_mapper, special_tags=special_tags,
+                                verbosity=verbosity, pool_maxsize=max_workers, client=client, cache=self.cache, api_url=api_url, cassette=cassette)
 
         # logging
         self.logger = logging.Logger('sprint')
@@ -34,154 +91,498 @@ class Sprint(object):
 
         self.logger.info('starting')
 
-        sprint_start_day = WE
-        start_hour = 9
-        end_hour = 19
-        sprint_length = 7
-        if not week_number:
-            today = datetime.now()
-            last_wed = today + relativedelta(weekday=sprint_start_day(-1))
-            start = last_wed
-        else:
-            start = date(date.today().year, 1, 1)+timedelta(weeks=week_number) + relativedelta(weekday=sprint_start_day(-1))
-            start = datetime.combine(start, datetime.min.time())
-
-        start = start.replace(hour=start_hour, minute=0, microsecond=0, second=0)
-        self.date_start = start
-        if not end:
-            self.date_end = self.date_start + timedelta(days=sprint_length-1)
-        else:
-            self.date_end = end
-        self.date_end = self.date_end.replace(hour=end_hour, minute=0, microsecond=0, second=0)
-
-        if self.date_end <= self.date_start:
-            raise ValueError('end is set incorrectly')
-
-    def set_pokered_leftovers(self, all_cards: List[Card]):
-        self.all_pokered_leftover = [c for c in all_cards if c.has_label_val_created_within(
-            self.date_start-timedelta(days=1), self.date_start)]
-
-    def set_pokered(self, all_cards: List[Card]):
-        self.all_pokered_cards = [c for c in all_cards if c.has_label_val_created_within(
-            self.date_start, self.date_start+timedelta(hours=8))]
-
-    def set_unchanged_stories(self, all_cards: List[Card]):
-        self.all_stale_cards = [c for c in all_cards if c.col.name in self.ghh.cols_keep and c not in self.all_pokered_cards and c not in self.all_pokered_leftover]
-
-    def set_repokered(self, all_cards: List[Card]):
-        self.all_repokered_cards = [c for c in all_cards if c.has_label_val_created_within(
-            self.date_end-timedelta(hours=12), self.date_end)]
+        self.date_start, self.date_end = sprint_window(week_number, end)
+        # all weeks are built from one fetch, PRs are fetched for the earliest of them
+        self.weeks = list(weeks or [])
+        self.fetch_since = min([self.date_start] + [sprint_window(week)[0] for week in self.weeks])
+
+    @traced('sprint')
+    def set_stories(self, all_cards: List[Card]):
+        """Sorts the cards into leftover, pokered, unchanged and repokered stories in one pass.
+
+        Every story is listed once per category, in the order of `all_cards`. Stories of the columns to keep are
+        unchanged if they are neither leftover nor pokered.
+        """
+        leftover_window = (self.date_start-timedelta(days=1), self.date_start)
+        pokered_window = (self.date_start, self.date_start+timedelta(hours=8))
+        repokered_window = (self.date_end-timedelta(hours=12), self.date_end)
+        cols_keep = set(self.ghh.cols_keep)
+
+        leftover, pokered, repokered, keep = {}, {}, {}, {}
+        for c in all_cards:
+            if c.has_label_val_created_within(*leftover_window):
+                leftover.setdefault(c, c)
+            if c.has_label_val_created_within(*pokered_window):
+                pokered.setdefault(c, c)
+            if c.has_label_val_created_within(*repokered_window):
+                repokered.setdefault(c, c)
+            if c.col.name in cols_keep:
+                keep.setdefault(c, c)
+
+        self.all_pokered_leftover = list(leftover.values())
+        self.all_pokered_cards = list(pokered.values())
+        self.all_stale_cards = [c for c in keep.values() if c not in pokered and c not in leftover]
+        self.all_repokered_cards = list(repokered.values())
 
     def set_PRs_without_stories(self, all_PRs):
         self.PRs_without_issues = [pr for pr in all_PRs if len(pr.closes) == 0 and self.date_start < pr.created_at < self.date_end]
 
+    def _match_project(self, projects: List[dict]):
+        for project in projects:
+            if self.ghh.project_name.lower() == project['name'].lower():
+                return project['id']
+        return None
+
+    @traced('sprint')
+    def fetch_all_data(self, engine='threads', incremental=False):
+        """Fetches board, cards, PRs and timelines, `engine` is `threads`, `async` (requires aiohttp) or `graphql`.
+
+        With `incremental` only what changed since the last run is fetched, everything else is taken from the local
+        store at `store_path`, this requires the `threads` engine.
+        """
+        self.ghh.reset(client=self.owns_client)
+        if engine == 'async' and self.ghh.client.cassette is not None:
+            raise ValueError('cassettes are not supported by the `async` engine')
+        if incremental:
+            if engine != 'threads':
+                raise ValueError(f'incremental sync is not supported by the `{engine}` engine')
+            cards_with_issues, pull_requests = self._fetch_all_data_incremental()
+        elif engine == 'async':
+            cards_with_issues, pull_requests = asyncio.run(self._fetch_all_data_async())
+        elif engine == 'graphql':
+            cards_with_issues, pull_requests = self._fetch_all_data_graphql()
+        elif engine == 'threads':
+            cards_with_issues, pull_requests = self._fetch_all_data_threaded()
+        else:
+            raise ValueError(f'unknown engine `{engine}`')
+        self.logger.info('http requests saved by deduplication:\t{}'.format(self.ghh.requests_saved))
+        self.logger.info('timeline probes avoided:\t{}'.format(self.ghh.num_probes_avoided))
+        self.logger.info('rate limit:\tremaining: {remaining}, throttled: {throttled}, paused: {paused:.1f}s, concurrency: {concurrency}'.format(
+            **self.ghh.client.limiter.stats()))
+        if self.cache:
+            self.logger.info('http cache:\thits: {hits}, misses: {misses}, revalidated: {revalidated}'.format(**self.cache.stats()))
+
+        self.cards_with_issues = cards_with_issues
+        self.set_stories(cards_with_issues)
+        self.prs = pull_requests
+        self.set_PRs_without_stories(pull_requests)
 
-    def fetch_all_data(self):
-        start_0 = time()
-        # to know that is in not yet in production
-        # prod_sha = self.ghh.get_production_sha()
-        # master_sha = self.ghh.get_master_sha()
-        # compare = self.ghh.compare_commits(prod_sha, master_sha)
-        # self.logger.info('time for production tag difference:\t{:.1f}s'.format(time() - start_0))
+    def _find_project_id(self, helper=None):
+        from tqdm import tqdm
 
-        # get project_id
-        start = time()
-        found_matching_name = False
+        helper = helper or self.ghh
         with tqdm(total=len(self.ghh.repos)) as pbar:
             for repo in self.ghh.repos:
                 pbar.set_description(f'Checking {repo.owner}/{repo.name}')
-                prjs = self.ghh.get_all_projects(repo)
-                for project in prjs:
-                    if self.ghh.project_name.lower() == project['name'].lower():
-                        self.ghh.project_id = project['id']
-                        found_matching_name = True
-                        pbar.update(len(self.ghh.repos)-pbar.n)
-                        break
-                if found_matching_name:
-                    break
+                project_id = self._match_project(helper.get_all_projects(repo))
+                if project_id:
+                    self.ghh.project_id = project_id
+                    pbar.update(len(self.ghh.repos)-pbar.n)
+                    return project_id
                 pbar.update()
-        if not found_matching_name:
-            raise RuntimeError(f'No suitable project called "{self.ghh.project_name}" found in {self.ghh.repos}')
-        self.logger.info('time for getting project id:\t{:.1f}s'.format(time() - start))
+        raise RuntimeError(f'No suitable project called "{self.ghh.project_name}" found in {self.ghh.repos}')
 
-        # get all columns in project
-        start = time()
-        cols = self.ghh.get_all_columns()
-        self.logger.info('time for board columns:\t{:.1f}s'.format(time() - start))
+    def _fetch_all_data_threaded(self):
+        # to know that is in not yet in production
+        # prod_sha = self.ghh.get_production_sha()
+        # master_sha = self.ghh.get_master_sha()
+        # compare = self.ghh.compare_commits(prod_sha, master_sha)
 
-        # get all cards from board and columns
-        all_cards = []
+        from tqdm import tqdm
+
+        pbar = tqdm(total=0, desc='Fetching')
+        pbar_lock = threading.Lock()
+
+        def progress(submitted=0, done=0):
+            with pbar_lock:
+                if submitted:
+                    pbar.total += submitted
+                    pbar.refresh()
+                if done:
+                    pbar.update(done)
+
+        def fetch_cards(project_id, cols):
+            # the details of a card are requested as soon as its column (and the ones before) arrived, not after all
+            # columns. The columns are read in board order, so the stories keep the order of the board in every run.
+            all_cards = []
+            card_details = []
+            column_futures = [executor.submit(self.ghh.get_all_cards, col) for col in cols]
+            progress(submitted=len(cols))
+            for col, future in zip(cols, column_futures):
+                cards = future.result()
+                all_cards.extend(cards)
+                cards_with_issues = [c for c in cards if c.has_issue]
+                # recognize related repos, add it to config
+                new_repos = list(dict.fromkeys(c.repo for c in cards_with_issues if c.repo not in self.ghh.repos))
+                if new_repos:
+                    self.ghh.repos = self.ghh.repos + list(new_repos)
+                for card in cards_with_issues:
+                    card_details.append((card,
+                                         executor.submit(self.ghh.get_all_events, card.issue_num, card.repo),
+                                         executor.submit(self.ghh.get_single_issue_from_card, card)))
+                progress(submitted=2*len(cards_with_issues), done=1)
+            return all_cards, card_details
+
+        def set_card_details(cards):
+            all_cards, card_details = cards
+            for card, events, issue in card_details:
+                card.set_events(events.result())
+                card.set_issue(issue.result())
+                progress(done=2)
+            return [card for card, _, _ in card_details]
+
+        def fetch_PR_details(pull_requests, fetch, apply):
+            progress(submitted=len(pull_requests))
+            for pr, result in zip(pull_requests, executor.map(fetch, pull_requests)):
+                apply(pr, result)
+                progress(done=1)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pipeline = Pipeline()
+            pipeline.add('project id', self._find_project_id)
+            pipeline.add('board columns', lambda project_id: self.ghh.get_all_columns(), deps=['project id'])
+            pipeline.add('board cards', fetch_cards, deps=['project id', 'board columns'])
+            pipeline.add('board card details', set_card_details, deps=['board cards'])
+            pipeline.add('PRs', lambda cards: self.ghh.get_all_PRs(updated_since=self.fetch_since), deps=['board cards'])
+            pipeline.add('PR reviews', lambda prs: fetch_PR_details(prs, self.ghh.fetch_PR_reviews, PR.add_reviews), deps=['PRs'])
+            pipeline.add('PR data', lambda prs: fetch_PR_details(prs, self.ghh.fetch_PR_data, PR.update), deps=['PRs'])
+            try:
+                results = pipeline.run()
+            finally:
+                pbar.close()
+
+        for line in pipeline.timings():
+            self.logger.info(line)
+        self.logger.info('total time:\t{:.1f}s'.format(time() - pipeline.started_at))
+        stats = self.ghh.client.connection_stats()
+        self.logger.info('http requests:\t{requests}, connections opened: {connections}, reused: {reused}'.format(**stats))
+        return results['board card details'], results['PRs']
+
+    def _fetch_all_data_incremental(self):
+        """Syncs the store with GitHub and builds the sprint from it.
+
+        Cards are always listed, issues and PRs are listed only if updated since the last sync (`since=` and
+        `updated_at`). Timelines, issues, reviews and PR data are fetched only for cards and PRs that changed, so a
+        run on an unchanged board costs one request per column and two per repo.
+        """
+        from .store import DEFAULT_STORE_PATH, SyncStore, repo_key
+
+        store = SyncStore(self.store_path or DEFAULT_STORE_PATH)
+        # the clocks of GitHub and this machine may differ a bit, listings since the last sync overlap by this margin
+        margin = timedelta(minutes=5)
+        sync_start = datetime.utcnow()
+        project_key = 'project:{}:{}'.format(self.ghh.api_url, self.ghh.project_name.lower())
+        num_from_store = 0
+        from tqdm import tqdm
+
+        pbar = tqdm(total=0, desc='Syncing')
+        pbar_lock = threading.Lock()
+
+        def progress(submitted=0, done=0):
+            with pbar_lock:
+                if submitted:
+                    pbar.total += submitted
+                    pbar.refresh()
+                if done:
+                    pbar.update(done)
+
+        def find_project_id():
+            project_id = store.get_meta(project_key)
+            if project_id is not None:
+                self.ghh.project_id = int(project_id)
+                return self.ghh.project_id
+            project_id = self._find_project_id()
+            store.set_meta(project_key, project_id)
+            return project_id
+
+        def fetch_cards(project_id, cols):
+            store.save_columns(cols)
+            all_cards = [card for cards in executor.map(self.ghh.get_all_cards, cols) for card in cards]
+            # recognize related repos, add it to config
+            self.ghh.repos = self.ghh.repos + list(dict.fromkeys(c.repo for c in all_cards if c.repo != None and c.repo not in self.ghh.repos))
+            return all_cards
+
+        def fetch_changed_issues(all_cards):
+            """Issues updated since the last sync of their repo by (repo, number), and the repos synced before."""
+            repos = [(repo, store.synced_at('issues:' + repo_key(repo))) for repo in self.ghh.repos]
+            repos = [(repo, synced_at) for repo, synced_at in repos if synced_at]
+            changed = {}
+            for (repo, _), issues in zip(repos, executor.map(lambda r: list(self.ghh.iter_issue_dicts(r[0], since=r[1] - margin)), repos)):
+                changed.update(((repo, issue['number']), issue) for issue in issues if 'pull_request' not in issue)
+            return changed, set(repo for repo, _ in repos)
+
+        def set_card_details(all_cards, changed_issues):
+            nonlocal num_from_store
+            changed, synced_repos = changed_issues
+            card_updates = store.card_updates()
+            cards_with_issues = [c for c in all_cards if c.has_issue]
+            card_details = []
+            for card in cards_with_issues:
+                key = (card.repo, card.issue_num)
+                issue_dict, timeline = None, None
+                if card.repo in synced_repos and key not in changed and card_updates.get(card.id) == card.updated_at:
+                    issue_dict, timeline = store.load_issue(card.repo, card.issue_num)
+                if issue_dict is not None and timeline is not None:
+                    num_from_store += 1
+                    card_details.append((card, issue_dict, timeline))
+                else:
+                    issue = changed.get(key) or executor.submit(self.ghh.fetch_issue, card.repo, card.issue_num)
+                    events = executor.submit(self.ghh.fetch_timeline, card.issue_num, card.repo)
+                    card_details.append((card, issue, events))
+            progress(submitted=len(card_details))
+
+            # a repo is synced only if all of its fetched issues and timelines are saved, the others are fetched again next time
+            unsaved_repos = set()
+            for card, issue_dict, timeline in card_details:
+                if isinstance(issue_dict, concurrent.futures.Future):
+                    issue_dict = issue_dict.result()
+                if isinstance(timeline, concurrent.futures.Future):
+                    timeline = timeline.result()
+                    if issue_dict is not None and timeline is not None:
+                        store.save_issue(card.repo, issue_dict, timeline)
+                    else:
+                        unsaved_repos.add(card.repo)
+                card.set_events(self.ghh.make_events(timeline or []))
+                card.set_issue(self.ghh.register_issue(card.repo, issue_dict) if issue_dict is not None else None)
+                progress(done=1)
+            store.save_cards(all_cards)
+            for repo in self.ghh.repos:
+                if repo not in unsaved_repos:
+                    store.set_synced_at('issues:' + repo_key(repo), sync_start)
+            return cards_with_issues
+
+        def sync_PRs(all_cards):
+            """PRs updated since the start of the sprint, and the ones of them that changed since the last sync."""
+            nonlocal num_from_store
+            pull_requests, changed = [], []
+            for repo in self.ghh.repos:
+                synced_at = store.synced_at('prs:' + repo_key(repo))
+                covered_since = str2date(store.get_meta('prs_covered:' + repo_key(repo)))
+                stored = {}
+                updated_since = self.fetch_since
+                if synced_at and covered_since and covered_since <= self.fetch_since:
+                    stored = store.load_PRs(repo, updated_since=self.fetch_since)
+                    updated_since = max(synced_at - margin, self.fetch_since)
+                else:
+                    store.set_meta('prs_covered:' + repo_key(repo), date2str(self.fetch_since))
+
+                prs = []
+                for pr_dict in self.ghh.iter_PR_dicts(repo, updated_since=updated_since):
+                    stored_pr = stored.pop(pr_dict['number'], None)
+                    if stored_pr and stored_pr[0]['updated_at'] == pr_dict['updated_at']:
+                        prs.append(stored_pr)
+                    else:
+                        pr = self.ghh.register_pr(repo, pr_dict)
+                        changed.append((pr, pr_dict))
+                        prs.append(pr)
+                prs.extend(stored.values())
+
+                for i, pr in enumerate(prs):
+                    if isinstance(pr, tuple):
+                        pr_dict, details, reviews = pr
+                        pr = prs[i] = self.ghh.register_pr(repo, pr_dict)
+                        pr.update(details)
+                        pr.add_reviews([Review(pr, rev) for rev in reviews])
+                        num_from_store += 1
+                pull_requests.extend(sorted(prs, key=lambda pr: pr.updated_at, reverse=True))
+            return pull_requests, changed
+
+        def fetch_PR_details(prs):
+            _, changed = prs
+            progress(submitted=len(changed))
+            reviews = executor.map(lambda c: self.ghh.fetch_PR_review_dicts(c[0]), changed)
+            datas = executor.map(lambda c: self.ghh.fetch_PR_data(c[0]), changed)
+            # like the issues, a repo is synced only if all of its changed PRs are saved with their reviews
+            unsaved_repos = set()
+            for (pr, pr_dict), revs, data in zip(changed, reviews, datas):
+                if revs is not None:
+                    pr.add_reviews([Review(pr, rev) for rev in revs])
+                if data is not None:
+                    pr.update(data)
+                if data is not None and revs is not None:
+                    store.save_PR(pr.repo, pr_dict, data, revs)
+                else:
+                    unsaved_repos.add(pr.repo)
+                progress(done=1)
+            for repo in self.ghh.repos:
+                if repo not in unsaved_repos:
+                    store.set_synced_at('prs:' + repo_key(repo), sync_start)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pipeline = Pipeline()
+            pipeline.add('project id', find_project_id)
+            pipeline.add('board columns', lambda project_id: self.ghh.get_all_columns(), deps=['project id'])
+            pipeline.add('board cards', fetch_cards, deps=['project id', 'board columns'])
+            pipeline.add('changed issues', fetch_changed_issues, deps=['board cards'])
+            pipeline.add('board card details', set_card_details, deps=['board cards', 'changed issues'])
+            pipeline.add('PRs', sync_PRs, deps=['board cards'])
+            pipeline.add('PR details', fetch_PR_details, deps=['PRs'])
+            try:
+                results = pipeline.run()
+            except BaseException:
+                # the writes of a failed run are dropped, nothing is marked synced without its issues and PRs
+                store.rollback()
+                raise
+            finally:
+                pbar.close()
+                store.close()
+
+        for line in pipeline.timings():
+            self.logger.info(line)
+        self.logger.info('total time:\t{:.1f}s'.format(time() - pipeline.started_at))
+        self.logger.info('http requests:\t{}, taken from the store: {} issues and PRs'.format(self.ghh.client.num_requests, num_from_store))
+        return results['board card details'], results['PRs'][0]
+
+    def _fetch_all_data_graphql(self):
+        from .graphql_driver import GraphQLGithubHelper
+
+        gql = GraphQLGithubHelper(self.ghh, graphql_url=self.graphql_url, max_workers=self.max_workers)
+        start_0 = time()
         start = time()
-        with tqdm(total=len(cols)) as pbar:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-                for col, cards in zip(cols, executor.map(self.ghh.get_all_cards, cols)):
-                    pbar.set_description(f'Fetched cards for {col.name}')
-                    all_cards.extend(cards)
-                    pbar.update()
+        with span('project id'):
+            self._find_project_id(gql)
+        self.logger.info('time for project id:\t{:.1f}s'.format(time() - start))
 
+        # cards come with their issues and timelines
+        start = time()
+        with span('board cards'):
+            cols = gql.get_all_columns()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                all_cards = [card for cards in executor.map(lambda col: gql.get_all_cards(*col), cols) for card in cards]
         self.logger.info('time for all board cards:\t{:.1f}s'.format(time() - start))
 
         # recognize related repos, add it to config
-        self.ghh.repos = self.ghh.repos + list(set(c.repo for c in all_cards if c.repo != None and c.repo not in self.ghh.repos))
+        self.ghh.repos = self.ghh.repos + list(dict.fromkeys(c.repo for c in all_cards if c.repo != None and c.repo not in self.ghh.repos))
 
-        # PRs
+        # PRs come with their reviews and data
         start = time()
-        pull_requests = self.ghh.get_all_PRs()
+        with span('PRs'):
+            pull_requests = gql.get_all_PRs(updated_since=self.fetch_since)
         self.logger.info('time for PRs:\t{:.1f}s'.format(time() - start))
 
-        start = time()
-        with tqdm(total=len(pull_requests)) as pbar:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-                for pr, revs in zip(pull_requests, executor.map(self.ghh.fetch_PR_reviews, pull_requests)):
-                    pbar.set_description(f'Fetched PR reviews for #{pr.number}')
-                    pr.add_reviews(revs)
-                    pbar.update()
-        self.logger.info('time for PR reviews:\t{:.1f}s'.format(time() - start))
+        self.logger.info('total time:\t{:.1f}s'.format(time() - start_0))
+        self.logger.info('graphql queries:\t{}, cost: {}, http requests: {}'.format(gql.num_queries, gql.cost, self.ghh.client.num_requests))
+        return [c for c in all_cards if c.has_issue], pull_requests
 
-        start = time()
-        with tqdm(total=len(pull_requests)) as pbar:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-                for pr, data in zip(pull_requests, executor.map(self.ghh.fetch_PR_data, pull_requests)):
-                    pbar.set_description(f'Fetched PR data for #{pr.number}')
-                    pr.update(data)
-                    pbar.update()
-        self.logger.info('time for PR data:\t{:.1f}s'.format(time() - start))
+    async def _fetch_all_data_async(self):
+        from .async_driver import AsyncGithubHelper
 
-        # get all events
-        start = time()
-        cards_with_issues = [c for c in all_cards if c.has_issue]
-        with tqdm(total=len(cards_with_issues)) as pbar:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-                for card, events in zip(cards_with_issues, executor.map(self.ghh.get_all_events, [c.issue_num for c in cards_with_issues])):
-                    pbar.set_description(f'Fetched events for #{card.id}')
-                    card.set_events(events)
-                    pbar.update()
-        self.logger.info('time for all board card events:\t{:.1f}s'.format(time() - start))
-
-        # issue data
-        start = time()
-        with tqdm(total=len(cards_with_issues)) as pbar:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-                for card, issue in zip(cards_with_issues, executor.map(self.ghh.get_single_issue_from_card, cards_with_issues)):
-                    pbar.set_description(f'Fetched issue data for #{card.id}')
+        start_0 = time()
+        async with AsyncGithubHelper(self.ghh, concurrency=self.max_workers) as agh:
+            # get project_id, the phases run one after the other on the event loop, each of them is one span
+            start = time()
+            with span('project id'):
+                for repo in self.ghh.repos:
+                    project_id = self._match_project(await agh.get_all_projects(repo))
+                    if project_id:
+                        self.ghh.project_id = project_id
+                        break
+                else:
+                    raise RuntimeError(f'No suitable project called "{self.ghh.project_name}" found in {self.ghh.repos}')
+            self.logger.info('time for project id:\t{:.1f}s'.format(time() - start))
+
+            # get all columns and their cards
+            start = time()
+            with span('board cards'):
+                cols = await agh.get_all_columns()
+                all_cards = [card for cards in await asyncio.gather(*(agh.get_all_cards(col) for col in cols)) for card in cards]
+            self.logger.info('time for all board cards:\t{:.1f}s'.format(time() - start))
+
+            # recognize related repos, add it to config
+            self.ghh.repos = self.ghh.repos + list(dict.fromkeys(c.repo for c in all_cards if c.repo != None and c.repo not in self.ghh.repos))
+
+            start = time()
+            with span('PRs'):
+                pull_requests = await agh.get_all_PRs(updated_since=self.fetch_since)
+            self.logger.info('time for PRs:\t{:.1f}s'.format(time() - start))
+
+            # reviews, PR data, events and issues don't depend on each other, all of them share the semaphore
+            start = time()
+            with span('PR details and board card details'):
+                cards_with_issues = [c for c in all_cards if c.has_issue]
+                revs, datas, events, issues = await asyncio.gather(
+                    asyncio.gather(*(agh.fetch_PR_reviews(pr) for pr in pull_requests)),
+                    asyncio.gather(*(agh.fetch_PR_data(pr) for pr in pull_requests)),
+                    asyncio.gather(*(agh.get_all_events(c.issue_num, c.repo) for c in cards_with_issues)),
+                    asyncio.gather(*(agh.get_single_issue_from_card(c) for c in cards_with_issues)),
+                )
+                for pr, pr_revs, data in zip(pull_requests, revs, datas):
+                    pr.add_reviews(pr_revs)
+                    pr.update(data)
+                for card, card_events, issue in zip(cards_with_issues, events, issues):
+                    card.set_events(card_events)
                     card.set_issue(issue)
-                    pbar.update()
-        self.logger.info('time for all board card issues:\t{:.1f}s'.format(time() - start))
+            self.logger.info('time for PR details and board card details:\t{:.1f}s'.format(time() - start))
 
-        # total
         self.logger.info('total time:\t{:.1f}s'.format(time() - start_0))
-
-        self.set_pokered_leftovers(cards_with_issues)
-        self.set_pokered(cards_with_issues)
-        self.set_repokered(cards_with_issues)
-        self.set_unchanged_stories(cards_with_issues)
-        self.prs = pull_requests
-        self.set_PRs_without_stories(pull_requests)
-
-    def get_all_stories(self):
-        return self.all_pokered_cards + self.all_pokered_leftover + self.all_stale_cards + self.all_repokered_cards
+        self.logger.info('http requests:\t{}'.format(agh.num_requests))
+        return cards_with_issues, pull_requests
+
+    def get_all_stories(self) -> List[Card]:
+        """All stories of the sprint, each of them once."""
+        return list(dict.fromkeys(self.all_pokered_cards + self.all_pokered_leftover + self.all_stale_cards + self.all_repokered_cards))
+
+    @traced('report')
+    def resolve_PRs(self, stories: List[Card]) -> Dict[Tuple[Repo, int], PR]:
+        """Index of the fetched PRs and of all PRs referenced by the events of `stories`, by (repo, number).
+
+        Referenced PRs that were not fetched with the sprint are requested concurrently, so the rendering does no I/O.
+        """
+        pr_index = {}
+        for pr in self.prs:
+            pr_index.setdefault((pr.repo, pr.number), pr)
+        missing = list(dict.fromkeys((ev.source_repo, ev.source_number) for story in stories for ev in story.events
+                                     if ev.source_is_pr and (ev.source_repo, ev.source_number) not in pr_index))
+        if missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(missing), self.max_workers)) as executor:
+                for key, pr in zip(missing, executor.map(lambda key: self.ghh.get_pr(*key), missing)):
+                    pr_index[key] = pr
+        return pr_index
+
+    def for_week(self, week_number) -> 'Sprint':
+        """The sprint of the calendar week `week_number` on the data already fetched, nothing is fetched again."""
+        sprint = copy.copy(self)
+        sprint.date_start, sprint.date_end = sprint_window(week_number)
+        sprint.set_stories(self.cards_with_issues)
+        sprint.set_PRs_without_stories(self.prs)
+        return sprint
+
+    def print_reports(self, week_numbers: List[int] = None) -> List[str]:
+        """Reports of all `week_numbers` (default `weeks`) from one fetch, rendered concurrently."""
+        from .keywords import KeywordCache
+
+        cache = KeywordCache(self.keyword_cache_path) if self.keyword_cache_path else None
+        sprints = [self.for_week(week) for week in (week_numbers or self.weeks)]
+        for sprint in sprints:
+            sprint.keyword_cache = cache
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(sprints), self.max_workers) or 1) as executor:
+            reports = list(executor.map(Sprint._render_report, sprints))
+        if cache:
+            cache.save()
+        # the sprints of the weeks share the helper, its count is the one of all reports
+        self.logger.info('http requests saved by deduplication:\t{}'.format(self.ghh.requests_saved))
+        return reports
+
+    @traced('report')
+    def title_keywords(self, n=10) -> List[str]:
+        """The `n` words with the highest degree in the titles of all stories."""
+        from .keywords import KeywordCache, keyword_engines, top_keywords
+
+        cache = self.keyword_cache
+        if cache is None and self.keyword_cache_path:
+            cache = KeywordCache(self.keyword_cache_path)
+        keywords = top_keywords(((c.issue.id, c.issue.title) for c in self.get_all_stories()), keyword_engines[self.keyword_engine](), cache, n=n)
+        if cache is not None and cache is not self.keyword_cache:
+            cache.save()
+        return keywords
 
     def print_report(self):
+        report = self._render_report()
+        self.logger.info('http requests saved by deduplication:\t{}'.format(self.ghh.requests_saved))
+        return report
+
+    @traced('report', name='Sprint.print_report')
+    def _render_report(self):
         def print_pr(pr, print_user):
             user = pr.user_name if print_user else ''
             special_tags = [tag for tag in pr.labels if tag['name'] in self.ghh.special_tags]
@@ -212,28 +613,21 @@ class Sprint(object):
             )
             pr_block = []
             for pr_event in [ev for ev in story.events if ev.source_is_pr]:
-                merged_txt = ''
-                prs = [pr for pr in self.prs if pr.number == pr_event.source_number and pr.repo == pr_event.source_repo]
-                if len(prs) == 0:
-                    pr = self.ghh.get_pr(pr_event.source_repo, pr_event.source_number)
-                else:
-                    pr = prs[0]
+                pr = pr_index[(pr_event.source_repo, pr_event.source_number)]
                 pr_block.append('  ' + print_pr(pr, print_user=False))
             if len(pr_block) > 0:
                 txt += nl
                 txt += nl.join(pr_block)
             return txt
 
+        # all PRs shown with the stories are known before rendering
+        pr_index = self.resolve_PRs(self.all_pokered_leftover + self.all_pokered_cards + self.all_stale_cards)
+
         # report list, will be joined at the end with newline character
         rprt = []
 
         # title by using word frequency
-        all_titles = '. '.join([c.issue.title.strip() for c in self.get_all_stories()])
-        r = Rake()
-        r.extract_keywords_from_text(all_titles)
-        word_degs = r.get_word_degrees()
-        sorted_tuples = sorted(word_degs.items(), key=lambda item: item[1], reverse=True)
-        rprt.append('# '+', '.join([t[0] for t in sorted_tuples[:10]]))
+        rprt.append('# '+', '.join(self.title_keywords()))
         rprt.append('')
 
         # date range: 06. February - 12. February 2019
@@ -247,27 +641,31 @@ class Sprint(object):
 
         # Stories
         if self.all_pokered_leftover:
-            rprt.append('# Leftover stories from last week')
-            for story in self.all_pokered_leftover:
-                rprt.append(print_story(story))
-                rprt.append('')
+            with span('leftover stories', 'report', stories=len(self.all_pokered_leftover)):
+                rprt.append('# Leftover stories from last week')
+                for story in self.all_pokered_leftover:
+                    rprt.append(print_story(story))
+                    rprt.append('')
 
         if self.all_pokered_cards:
-            rprt.append('# Stories of the week')
-            for story in self.all_pokered_cards:
-                rprt.append(print_story(story))
-                rprt.append('')
+            with span('stories of the week', 'report', stories=len(self.all_pokered_cards)):
+                rprt.append('# Stories of the week')
+                for story in self.all_pokered_cards:
+                    rprt.append(print_story(story))
+                    rprt.append('')
 
         if self.all_stale_cards:
-            rprt.append('# Unchanged stories')
-            for story in self.all_stale_cards:
-                rprt.append(print_story(story))
-                rprt.append('')
+            with span('unchanged stories', 'report', stories=len(self.all_stale_cards)):
+                rprt.append('# Unchanged stories')
+                for story in self.all_stale_cards:
+                    rprt.append(print_story(story))
+                    rprt.append('')
 
         # PRs without story:
         if self.PRs_without_issues:
-            rprt.append('# PRs without issue')
-            for pr in self.PRs_without_issues:
-                rprt.append(print_pr(pr, print_user=True))
+            with span('PRs without issue', 'report', prs=len(self.PRs_without_issues)):
+                rprt.append('# PRs without issue')
+                for pr in self.PRs_without_issues:
+                    rprt.append(print_pr(pr, print_user=True))
 
         return nl.join(rprt)
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import typing
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .repo_stuff import Repo
+from .utils import date2str, str2date
+
+if typing.TYPE_CHECKING:
+    from .board_card import Card
+    from .board_stuff import Column
+
+# the CLIs only need the default path, sqlite3 is imported with the first store
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'ghsprint.sqlite')
+
+_schema = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS columns (id INTEGER PRIMARY KEY, project_id INTEGER, name TEXT);
+CREATE TABLE IF NOT EXISTS cards (id INTEGER PRIMARY KEY, column_id INTEGER, created_at TEXT, updated_at TEXT, content_url TEXT);
+CREATE TABLE IF NOT EXISTS issues (repo TEXT, number INTEGER, updated_at TEXT, data TEXT, PRIMARY KEY (repo, number));
+CREATE TABLE IF NOT EXISTS events (repo TEXT, number INTEGER, data TEXT, PRIMARY KEY (repo, number));
+CREATE TABLE IF NOT EXISTS prs (repo TEXT, number INTEGER, updated_at TEXT, data TEXT, details TEXT, PRIMARY KEY (repo, number));
+CREATE TABLE IF NOT EXISTS reviews (repo TEXT, number INTEGER, data TEXT, PRIMARY KEY (repo, number));
+'''
+
+# the fields of a single PR that `PR.update` needs, the rest of the response is not stored
+_pr_details_fields = ('additions', 'deletions', 'changed_files', 'labels', 'mergeable_state')
+
+
+def repo_key(repo: Repo) -> str:
+    return '{}/{}'.format(repo.owner, repo.name)
+
+
+class SyncStore(object):
+    """Local SQLite copy of the board, the issues with their timelines and the PRs with their reviews.
+
+    Issues, timelines, PRs and reviews are kept as the dicts returned by the REST API, so the usual objects can be
+    built from them without a request. Writes are collected in one transaction until `commit`.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        import sqlite3
+
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_schema)
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, args=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._conn.rollback()
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+    # bookkeeping of the syncs
+    def get_meta(self, key: str) -> Optional[str]:
+        rows = self._execute('SELECT value FROM meta WHERE key = ?', (key,))
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key: str, value):
+        self._execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def synced_at(self, key: str) -> Optional[datetime]:
+        return str2date(self.get_meta('synced:' + key))
+
+    def set_synced_at(self, key: str, when: datetime):
+        self.set_meta('synced:' + key, date2str(when))
+
+    # board
+    def save_columns(self, cols: List['Column']):
+        for col in cols:
+            self._execute('INSERT OR REPLACE INTO columns (id, project_id, name) VALUES (?, ?, ?)', (col.id, col.project_id, col.name))
+
+    def save_cards(self, cards: List['Card']):
+        for card in cards:
+            self._execute('INSERT OR REPLACE INTO cards (id, column_id, created_at, updated_at, content_url) VALUES (?, ?, ?, ?, ?)',
+                          (card.id, card.col.id, date2str(card.created_at), date2str(card.updated_at), card.content_url))
+
+    def delete_card(self, card_id: int):
+        self._execute('DELETE FROM cards WHERE id = ?', (card_id,))
+
+    def card_updates(self) -> Dict[int, datetime]:
+        """`updated_at` of every stored card by card id."""
+        return {card_id: str2date(updated_at) for card_id, updated_at in self._execute('SELECT id, updated_at FROM cards')}
+
+    # issues and their timelines
+    def load_issue(self, repo: Repo, number: int) -> Tuple[Optional[dict], Optional[List[dict]]]:
+        """The issue and its timeline, None for what is not stored."""
+        issue = self._execute('SELECT data FROM issues WHERE repo = ? AND number = ?', (repo_key(repo), number))
+        timeline = self._execute('SELECT data FROM events WHERE repo = ? AND number = ?', (repo_key(repo), number))
+        return (json.loads(issue[0][0]) if issue else None), (json.loads(timeline[0][0]) if timeline else None)
+
+    def save_issue(self, repo: Repo, issue_dict: dict, timeline: List[dict]):
+        self._execute('INSERT OR REPLACE INTO issues (repo, number, updated_at, data) VALUES (?, ?, ?, ?)',
+                      (repo_key(repo), issue_dict['number'], issue_dict.get('updated_at'), json.dumps(issue_dict)))
+        self._execute('INSERT OR REPLACE INTO events (repo, number, data) VALUES (?, ?, ?)',
+                      (repo_key(repo), issue_dict['number'], json.dumps(timeline)))
+
+    # PRs and their reviews
+    def load_PRs(self, repo: Repo, updated_since: datetime) -> Dict[int, Tuple[dict, dict, List[dict]]]:
+        """PR, details and reviews of the stored PRs of `repo` updated since `updated_since`, by PR number."""
+        rows = self._execute('SELECT prs.number, prs.data, prs.details, reviews.data FROM prs JOIN reviews USING (repo, number) '
+                             'WHERE prs.repo = ? AND prs.updated_at >= ? AND prs.details IS NOT NULL',
+                             (repo_key(repo), date2str(updated_since)))
+        return {number: (json.loads(data), json.loads(details), json.loads(reviews)) for number, data, details, reviews in rows}
+
+    def save_PR(self, repo: Repo, pr_dict: dict, details: dict, reviews: List[dict]):
+        details = {field: details.get(field) for field in _pr_details_fields}
+        self._execute('INSERT OR REPLACE INTO prs (repo, number, updated_at, data, details) VALUES (?, ?, ?, ?, ?)',
+                      (repo_key(repo), pr_dict['number'], pr_dict['updated_at'], json.dumps(pr_dict), json.dumps(details)))
+        self._execute('INSERT OR REPLACE INTO reviews (repo, number, data) VALUES (?, ?, ?)',
+                      (repo_key(repo), pr_dict['number'], json.dumps(reviews)))
+
+    def save_reviews(self, repo: Repo, number: int, reviews: List[dict]):
+        self._execute('INSERT OR REPLACE INTO reviews (repo, number, data) VALUES (?, ?, ?)', (repo_key(repo), number, json.dumps(reviews)))
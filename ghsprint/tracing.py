@@ -0,0 +1,207 @@
+"""Spans of a run in the Chrome trace-event format (opens in Perfetto or `chrome://tracing`), and cProfile for all threads.
+
+Spans are recorded only while a tracer is started, otherwise `span` and `traced` cost a function call::
+
+    with tracing.tracing('trace.json'):
+        sprint.fetch_all_data()
+
+Categories: `sprint` the run and its phases, `pipeline` the tasks of `fetch_all_data`, `github` the calls of the
+helpers, `http` the requests (`queue` the wait for the rate limiter), `decode` JSON decoding, `models` the
+construction of cards, events and reviews, `report` the sections of the report.
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+from time import perf_counter
+from typing import Callable, List
+
+# the tracer of the running trace, None if not tracing
+tracer = None
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class Span(object):
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.add(self.name, self.cat, self.start, perf_counter(), self.args)
+        return False
+
+
+class Tracer(object):
+    """Collects complete events (`ph: X`) of all threads, timestamps are µs since the start of the tracer."""
+
+    def __init__(self):
+        self.events: List[dict] = []
+        self.pid = os.getpid()
+        self.started_at = perf_counter()
+        self.threads = {}
+
+    def add(self, name: str, cat: str, start: float, end: float, args: dict = None):
+        tid = threading.get_native_id()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': (start - self.started_at) * 1e6, 'dur': (end - start) * 1e6,
+                 'pid': self.pid, 'tid': tid}
+        if args:
+            event['args'] = args
+        # appending to a list is atomic, no lock needed
+        self.events.append(event)
+
+    def span(self, name: str, cat: str, args: dict = None) -> Span:
+        return Span(self, name, cat, args or {})
+
+    def to_dict(self) -> dict:
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0, 'args': {'name': 'ghsprint'}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}} for tid, name in self.threads.items()]
+        return {'traceEvents': metadata + sorted(self.events, key=lambda e: e['ts']), 'displayTimeUnit': 'ms'}
+
+    def write(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+
+def start() -> Tracer:
+    global tracer
+    tracer = Tracer()
+    return tracer
+
+
+def stop() -> Tracer:
+    global tracer
+    stopped, tracer = tracer, None
+    return stopped
+
+
+def span(name: str, cat='sprint', **args):
+    """A span over a `with` block, recorded if a tracer is started."""
+    if tracer is None:
+        return _null_span
+    return tracer.span(name, cat, args)
+
+
+def traced(cat='github', name: str = None) -> Callable:
+    """Records a span over every call of the decorated function, named after it, with its `str` and `int` arguments."""
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if tracer is None:
+                return fn(*args, **kwargs)
+            described = [a for a in args if isinstance(a, (str, int))] + [v for v in kwargs.values() if isinstance(v, (str, int))]
+            with tracer.span(span_name, cat, {'args': described} if described else {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextlib.contextmanager
+def tracing(path: str):
+    """Traces the `with` block and writes the trace to `path`, also if the block fails."""
+    started = start()
+    try:
+        yield started
+    finally:
+        stop()
+        started.write(path)
+
+
+class ThreadProfiler(object):
+    """cProfile over the calling thread and all threads started while it is enabled, their stats are merged.
+
+    Before Python 3.12 a `cProfile.Profile` only sees the thread it was enabled in, but most of a run happens in
+    worker threads, so every thread gets its own. Threads still running when the profiler is disabled are not
+    included. Since Python 3.12 one profile sees all threads and no second one can be enabled, it is used alone.
+    """
+
+    def __init__(self):
+        self.profiles = []
+        self._lock = threading.Lock()
+        self._run = None
+        self._main = None
+
+    def enable(self):
+        import cProfile
+
+        profiler = self
+        original = threading.Thread.run
+
+        def run(thread):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # another profiler is active, the thread runs without
+                return original(thread)
+            try:
+                original(thread)
+            finally:
+                profile.disable()
+                with profiler._lock:
+                    profiler.profiles.append(profile)
+
+        self._main = cProfile.Profile()
+        self._main.enable()
+        if sys.version_info < (3, 12):
+            self._run = original
+            threading.Thread.run = run
+
+    def disable(self):
+        self._main.disable()
+        if self._run is not None:
+            threading.Thread.run = self._run
+            self._run = None
+        with self._lock:
+            self.profiles.append(self._main)
+
+    def write(self, path: str, sort='cumulative'):
+        """Writes the stats sorted by `sort` as text, or in the binary format of `pstats` if `path` ends with `.prof`."""
+        import pstats
+
+        with self._lock:
+            profiles = list(self.profiles)
+        if path.endswith('.prof'):
+            pstats.Stats(*profiles).dump_stats(path)
+            return
+        with open(path, 'w') as f:
+            pstats.Stats(*profiles, stream=f).sort_stats(sort).print_stats()
+
+
+@contextlib.contextmanager
+def profiling(path: str, sort='cumulative'):
+    """Profiles the `with` block in all threads and writes the stats to `path`, also if the block fails."""
+    profiler = ThreadProfiler()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.write(path, sort=sort)
@@ -1,7 +1,44 @@
 from datetime import datetime
+from functools import lru_cache
+from typing import List
+
+import click
+
+_date_format = '%Y-%m-%dT%H:%M:%SZ'
+
+
+@lru_cache(maxsize=65536)
+def _parse_date(input: str) -> datetime:
+    # GitHub always sends `2019-06-19T09:00:00Z`, slicing is much faster than strptime
+    if len(input) == 20 and input[4] == input[7] == '-' and input[10] == 'T' and input[13] == input[16] == ':' and input[19] == 'Z':
+        try:
+            return datetime(int(input[0:4]), int(input[5:7]), int(input[8:10]), int(input[11:13]), int(input[14:16]), int(input[17:19]))
+        except ValueError:
+            pass
+    return datetime.strptime(input, _date_format)
 
 
 def str2date(input: str):
     if input:
-        return datetime.strptime(input, '%Y-%m-%dT%H:%M:%SZ')
+        return _parse_date(input)
+    return None
+
+
+def date2str(input: datetime):
+    if input:
+        return input.strftime(_date_format)
     return None
+
+
+def parse_weeks(ctx, param, value) -> List[int]:
+    """`30-42` or `30,32,35` (or both, `20,30-42`) to the list of week numbers, the callback of the `--weeks` options."""
+    if not value:
+        return []
+    weeks = []
+    try:
+        for part in value.split(','):
+            first, _, last = part.partition('-')
+            weeks.extend(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise click.BadParameter('use week numbers like `30-42` or `30,32,35`')
+    return sorted(set(weeks))
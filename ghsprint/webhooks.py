@@ -0,0 +1,328 @@
+"""Applies GitHub webhooks to a fetched sprint, so its data stays current without fetching the board again.
+
+The `project_card`, `issues`, `pull_request` and `pull_request_review` events are handled, every payload is applied
+as a change of the cards, timelines and PRs in memory and, if given, of the `SyncStore`. GitHub delivers webhooks
+at least once and in no particular order, so every change is checked against what is already known:
+
+- a card, issue or PR older than the known one (`updated_at`) is not applied, a deleted card is not brought back
+- events are added to a timeline once, sorted by their date
+- a dismissed review stays dismissed
+- a delivery id that was applied before is skipped
+- a delivery that needs a request that fails changes nothing, it can be delivered again
+
+Deliveries can be recorded as JSON files, `{"event": ..., "delivery": ..., "payload": {...}}`, and replayed.
+"""
+import collections
+import hashlib
+import hmac
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .board_card import Card
+from .board_stuff import Column
+from .issue import Issue
+from .issue_event import Event
+from .pr_stuff import PR, Review
+from .repo_stuff import Repo
+from .utils import date2str, str2date
+
+events_handled = ('project_card', 'issues', 'pull_request', 'pull_request_review')
+
+
+def sign(secret: str, body: bytes) -> str:
+    """The `X-Hub-Signature-256` header of `body`."""
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+
+def record(directory: str, event: str, delivery: str, payload: dict) -> str:
+    """Writes a delivery to `directory`, the names of the files sort in the order of arrival."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, '{}-{}.json'.format(datetime.utcnow().strftime('%Y%m%dT%H%M%S%f'), delivery or event))
+    with open(path, 'w') as f:
+        json.dump({'event': event, 'delivery': delivery, 'payload': payload}, f)
+    return path
+
+
+def load_recorded(paths: Iterable[str]) -> Iterator[Tuple[str, str, dict]]:
+    """(event, delivery id, payload) of the recorded deliveries, the files of a directory in the order of their names."""
+    for path in paths:
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.json')] if os.path.isdir(path) else [path]
+        for file in files:
+            with open(file) as f:
+                delivery = json.load(f)
+            yield delivery['event'], delivery.get('delivery'), delivery['payload']
+
+
+class FetchError(RuntimeError):
+    """Something a delivery needs could not be fetched from GitHub."""
+
+
+def _event_key(event: Event) -> tuple:
+    return event.event, event.date, event.label, event.assignee, event.source_repo, event.source_number
+
+
+def _issue_fields(issue: Issue) -> tuple:
+    return issue.title, issue.state, issue.closed_at, issue.assignees, issue.labels
+
+
+def _review_dict(review: Review) -> dict:
+    """The fields of a review of the REST API that `Review` reads."""
+    return {'html_url': review.url, 'user': {'login': review.reviewer}, 'state': review.state.name, 'submitted_at': date2str(review.submitted_at)}
+
+
+class WebhookApplier(object):
+    """Applies webhook payloads to the fetched `sprint`, and to `store` if given.
+
+    Stories and PRs without stories are sorted again after every applied change. Cards that are new to the board
+    and PRs that were not fetched with the sprint are requested, those are the only requests. They are never answered
+    with the responses the client received for the sprint, those may be older than the delivery.
+    """
+
+    def __init__(self, sprint, store=None, max_deliveries=10000):
+        self.max_deliveries = max_deliveries
+        # `updated_at` of the deleted cards, late deliveries must not bring them back
+        self.deleted: Dict[int, datetime] = {}
+        self.deliveries = collections.OrderedDict()
+        self.counts = collections.Counter()
+        self.set_sprint(sprint, store)
+
+    def set_sprint(self, sprint, store=None):
+        """Applies the next deliveries to `sprint`, e.g. fetched again, the deliveries and deleted cards seen before are kept."""
+        self.sprint = sprint
+        self.ghh = sprint.ghh
+        self.store = store
+        self.cards: Dict[int, Card] = {card.id: card for card in sprint.cards_with_issues}
+        # columns of other projects and ignored columns are None
+        self.columns: Dict[int, Column] = {card.col.id: card.col for card in sprint.cards_with_issues}
+
+    def apply(self, event: str, payload: dict, delivery: str = None) -> str:
+        """Applies one delivery, returns `applied`, `stale` (older than what is known), `duplicate`, `ignored` or `failed`.
+
+        A `failed` delivery changed nothing and is not remembered, it is applied if delivered again.
+        """
+        if delivery is not None and delivery in self.deliveries:
+            status = 'duplicate'
+        elif event in events_handled:
+            self.ghh.client.forget_responses()
+            try:
+                status = getattr(self, '_apply_' + event)(payload)
+            except FetchError:
+                status = 'failed'
+        else:
+            status = 'ignored'
+        if delivery is not None and status != 'failed':
+            self.deliveries[delivery] = None
+            if len(self.deliveries) > self.max_deliveries:
+                self.deliveries.popitem(last=False)
+        if status == 'applied':
+            self.sprint.set_stories(self.sprint.cards_with_issues)
+            self.sprint.set_PRs_without_stories(self.sprint.prs)
+            if self.store:
+                self.store.commit()
+        self.counts[status] += 1
+        return status
+
+    def replay(self, paths: Iterable[str]) -> collections.Counter:
+        """Applies recorded deliveries, returns the number of deliveries by status."""
+        counts = collections.Counter()
+        for event, delivery, payload in load_recorded(paths):
+            counts[self.apply(event, payload, delivery)] += 1
+        return counts
+
+    @staticmethod
+    def _repo(payload: dict) -> Repo:
+        return Repo(payload['repository']['owner']['login'], payload['repository']['name'])
+
+    def _column(self, column_id: int) -> Column:
+        if column_id not in self.columns:
+            col = self.ghh.fetch_column(column_id)
+            if col is None:
+                raise FetchError('column {} could not be fetched'.format(column_id))
+            project_id = int(col['project_url'].split('/')[-1])
+            if project_id != self.ghh.project_id or col['name'] in self.ghh.cols_ignore:
+                self.columns[column_id] = None
+            else:
+                self.columns[column_id] = Column(project_id, col)
+        return self.columns[column_id]
+
+    def _cards_of(self, repo: Repo, issue_num: int) -> List[Card]:
+        return [card for card in self.cards.values() if card.repo == repo and card.issue_num == issue_num]
+
+    def _remove_card(self, card: Card):
+        del self.cards[card.id]
+        # the lists of the sprint are replaced, not changed, copies of the sprint keep theirs
+        self.sprint.cards_with_issues = [c for c in self.sprint.cards_with_issues if c.id != card.id]
+        if self.store:
+            self.store.delete_card(card.id)
+
+    def _add_event(self, repo: Repo, issue_num: int, ev: dict) -> bool:
+        """Adds the timeline item `ev` to the cards of the issue and to the stored timeline, if it is not there yet."""
+        event = Event(ev, self.ghh.label2val)
+        added = False
+        for card in self._cards_of(repo, issue_num):
+            if all(_event_key(e) != _event_key(event) for e in card.events):
+                card.set_events(sorted(card.events + [event], key=lambda e: e.date))
+                added = True
+        if added and self.store:
+            issue_dict, timeline = self.store.load_issue(repo, issue_num)
+            if issue_dict is not None and timeline is not None:
+                self.store.save_issue(repo, issue_dict, sorted(timeline + [ev], key=lambda e: e['created_at']))
+        return added
+
+    def _apply_project_card(self, payload: dict) -> str:
+        card_dict = payload['project_card']
+        card_id = card_dict['id']
+        updated_at = str2date(card_dict['updated_at'])
+        card = self.cards.get(card_id)
+        known = card.updated_at if card else self.deleted.get(card_id)
+        if known is not None and updated_at < known:
+            return 'stale'
+
+        col = None if payload['action'] == 'deleted' else self._column(card_dict['column_id'])
+        if col is None:
+            # deleted, or moved to an ignored column or to another project
+            self.deleted[card_id] = updated_at
+            if card is None:
+                return 'ignored'
+            self._remove_card(card)
+            return 'applied'
+
+        if card is None:
+            card = Card(col, card_dict)
+            if not card.has_issue:
+                return 'ignored'
+            issue_dict = self.ghh.fetch_issue(card.repo, card.issue_num)
+            timeline = self.ghh.fetch_timeline(card.issue_num, card.repo)
+            if issue_dict is None or timeline is None:
+                raise FetchError('issue {} of {}/{} could not be fetched'.format(card.issue_num, card.repo.owner, card.repo.name))
+            card.set_events(self.ghh.make_events(timeline))
+            card.set_issue(self.ghh.register_issue(card.repo, issue_dict))
+            if self.store:
+                self.store.save_issue(card.repo, issue_dict, timeline)
+            self.cards[card_id] = card
+            self.sprint.cards_with_issues = self.sprint.cards_with_issues + [card]
+            # the other cards of the issue may have an older one
+            self._update_issue(card.repo, issue_dict)
+        else:
+            card.col = col
+            card.updated_at = updated_at
+        if self.store:
+            self.store.save_cards([card])
+        return 'applied'
+
+    def _update_issue(self, repo: Repo, issue_dict: dict) -> bool:
+        """Sets the issue on its cards if it is newer than theirs, returns whether it was."""
+        cards = self._cards_of(repo, issue_dict['number'])
+        current = cards[0].issue
+        # a newer issue replaces the registered one, it is not changed, copies of the sprint keep theirs
+        issue = Issue(repo, issue_dict)
+        if current is None or current.updated_at is None or issue.updated_at > current.updated_at or (
+                issue.updated_at == current.updated_at and _issue_fields(issue) != _issue_fields(current)):
+            for card in cards:
+                card.set_issue(issue)
+            with self.ghh._registry_lock:
+                self.ghh.issues[(repo, issue.number)] = issue
+            if self.store:
+                _, timeline = self.store.load_issue(repo, issue_dict['number'])
+                if timeline is not None:
+                    self.store.save_issue(repo, issue_dict, timeline)
+            return True
+        return False
+
+    def _apply_issues(self, payload: dict) -> str:
+        issue_dict = payload['issue']
+        repo = self._repo(payload)
+        if not self._cards_of(repo, issue_dict['number']):
+            return 'ignored'
+
+        applied = self._update_issue(repo, issue_dict)
+        action = payload['action']
+        if action in self.ghh.interesting_event_types:
+            ev = {'event': action, 'created_at': action == 'closed' and issue_dict.get('closed_at') or issue_dict['updated_at']}
+            if payload.get('label'):
+                ev['label'] = {'name': payload['label']['name']}
+            if payload.get('assignee'):
+                ev['assignee'] = {'login': payload['assignee']['login']}
+            applied = self._add_event(repo, issue_dict['number'], ev) or applied
+        return 'applied' if applied else 'stale'
+
+    def _find_pr(self, repo: Repo, number: int) -> PR:
+        return next((pr for pr in self.sprint.prs if pr.repo == repo and pr.number == number), None)
+
+    def _set_pr(self, old: PR, pr: PR, pr_dict: dict):
+        """Replaces `old` by `pr`, the PRs of the sprint stay sorted by `updated_at`."""
+        self.sprint.prs = [pr] + [p for p in self.sprint.prs if p is not old]
+        with self.ghh._registry_lock:
+            self.ghh.prs[(pr.repo, pr.number)] = pr
+        if self.store:
+            details = {field: getattr(pr, field) for field in ('additions', 'deletions', 'changed_files', 'labels')}
+            details['mergeable_state'] = 'draft' if pr.is_draft else None
+            self.store.save_PR(pr.repo, pr_dict, details, [_review_dict(r) for r in pr.reviews or []])
+
+    def _apply_pull_request(self, payload: dict) -> str:
+        pr_dict = payload['pull_request']
+        repo = self._repo(payload)
+        old = self._find_pr(repo, pr_dict['number'])
+        if old is None and repo not in self.ghh.repos:
+            return 'ignored'
+        if old is not None and str2date(pr_dict['updated_at']) < old.updated_at:
+            return 'stale'
+
+        pr = PR(repo, pr_dict)
+        # the payload has the fields of a single PR
+        data = pr_dict if 'additions' in pr_dict else self.ghh.fetch_PR_data(pr)
+        if data is not None:
+            pr.update(data)
+        if old is not None:
+            pr.add_reviews([Review(pr, _review_dict(r)) for r in old.reviews or []])
+        else:
+            pr.add_reviews(self.ghh.fetch_PR_reviews(pr))
+        self._set_pr(old, pr, pr_dict)
+
+        # GitHub adds the PR to the timelines of the issues it closes
+        for issue in pr.closes:
+            self._add_event(issue.repo, issue.number, {
+                'event': 'cross-referenced', 'created_at': pr_dict['created_at'],
+                'source': {'type': 'issue', 'issue': {
+                    'repository_url': '{}/repos/{}/{}'.format(self.ghh.api_url, repo.owner, repo.name), 'number': pr.number,
+                    'title': pr.title, 'state': pr.state.name, 'closed_at': pr_dict.get('closed_at'),
+                    'pull_request': {'url': pr_dict['url']}}}})
+        return 'applied'
+
+    def _apply_pull_request_review(self, payload: dict) -> str:
+        pr_dict = payload['pull_request']
+        repo = self._repo(payload)
+        pr = self._find_pr(repo, pr_dict['number'])
+        if pr is None:
+            if repo not in self.ghh.repos:
+                return 'ignored'
+            # the PR of a review payload lacks additions and deletions, the fetched reviews include this one
+            pr = PR(repo, pr_dict)
+            data = self.ghh.fetch_PR_data(pr)
+            if data is not None:
+                pr.update(data)
+            pr.add_reviews(self.ghh.fetch_PR_reviews(pr))
+            self._set_pr(None, pr, pr_dict)
+            return 'applied'
+
+        rev = dict(payload['review'])
+        rev['state'] = 'DISMISSED' if payload['action'] == 'dismissed' else rev['state'].upper()
+        review = Review(pr, rev)
+        reviews = list(pr.reviews or [])
+        old = next((r for r in reviews if r.url == review.url), None)
+        if old is not None:
+            if old.state == review.state or old.state == Review.states.DISMISSED:
+                return 'stale'
+            reviews[reviews.index(old)] = review
+        else:
+            reviews = sorted(reviews + [review], key=lambda r: r.submitted_at or datetime.min)
+        pr.add_reviews(reviews)
+        if self.store:
+            self.store.save_reviews(repo, pr.number, [_review_dict(r) for r in reviews])
+        return 'applied'
@@ -19,10 +19,13 @@ setup(
     install_requires=[
         'requests',
         'urllib3',
-        'rake-nltk',
         'tqdm',
         'click',
     ],
+    extras_require={
+        'async': ['aiohttp'],
+        'rake': ['rake-nltk'],
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
 
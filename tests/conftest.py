@@ -0,0 +1,28 @@
+import pytest
+
+from ghsprint.fake_github import FakeGitHub, SyntheticBoard
+from ghsprint.sprint import Sprint
+
+
+@pytest.fixture
+def board():
+    # some PRs are cards of the board too
+    return SyntheticBoard(num_cards=60, events_per_card=6, num_prs=30, num_pr_cards=6)
+
+
+@pytest.fixture
+def fake(board):
+    fake = FakeGitHub(board, rate_limit=0).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def make_sprint(fake, board):
+    """Makes sprints of the board served by `fake`, keyword arguments override those of `Sprint`."""
+    def make(access_token='token', **kwargs) -> Sprint:
+        settings = dict(ignore_columns='', keep_columns='In Progress,Review', max_workers=4, api_url=fake.url)
+        settings.update(kwargs)
+        repos = ['{}/{}'.format(board.owner, repo) for repo in board.repos]
+        return Sprint(access_token, repos, board.project_name, **settings)
+    return make
@@ -0,0 +1,39 @@
+import threading
+
+from ghsprint.http_cache import ResponseCache
+from ghsprint.sprint import Sprint
+
+
+def fetch(make_sprint, engine: str, cache_dir: str = None) -> Sprint:
+    sprint = make_sprint(cache_dir=cache_dir)
+    sprint.fetch_all_data(engine=engine)
+    return sprint
+
+
+def test_async_engine_registers_PRs_and_issues(make_sprint):
+    sprint = fetch(make_sprint, 'async')
+
+    ghh = sprint.ghh
+    assert sprint.prs and all(ghh.prs[(pr.repo, pr.number)] is pr for pr in sprint.prs)
+    issues = [c.issue for c in sprint.cards_with_issues if c.issue is not None]
+    assert issues and all(ghh.issues[(issue.repo, issue.number)] is issue for issue in issues)
+
+
+def test_async_engine_returns_the_report_of_the_threads_engine(make_sprint):
+    assert fetch(make_sprint, 'async').print_report() == fetch(make_sprint, 'threads').print_report()
+
+
+def test_async_engine_uses_the_cache_outside_the_event_loop(make_sprint, monkeypatch, tmp_path):
+    threads = set()
+    for name in ('load', 'store', 'not_modified'):
+        def recording(cache, *args, method=getattr(ResponseCache, name)):
+            threads.add(threading.current_thread())
+            return method(cache, *args)
+        monkeypatch.setattr(ResponseCache, name, recording)
+
+    first = fetch(make_sprint, 'async', cache_dir=str(tmp_path))
+    second = fetch(make_sprint, 'async', cache_dir=str(tmp_path))
+
+    # the event loop of `asyncio.run` runs in the main thread
+    assert threads and threading.main_thread() not in threads
+    assert second.cache.hits > 0 and second.print_report() == first.print_report()
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from ghsprint.batch import load_config, run_batch
+
+
+def write_config(tmp_path, config: dict) -> str:
+    path = tmp_path / 'projects.json'
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+def team(board, name: str) -> dict:
+    return {'name': name, 'project_name': board.project_name, 'repos': ['{}/{}'.format(board.owner, repo) for repo in board.repos],
+            'keep_columns': 'In Progress,Review'}
+
+
+def test_config_defaults_apply_to_every_project(tmp_path):
+    path = write_config(tmp_path, {'access_token': 'token', 'keep_columns': 'Review', 'projects': [
+        {'project_name': 'Board A', 'repos': ['acme/api']},
+        {'name': 'b', 'project_name': 'Board B', 'repos': ['acme/web'], 'keep_columns': 'Done'}]})
+
+    projects = load_config(path)
+
+    assert [(p['name'], p['access_token'], p['keep_columns']) for p in projects] == [('Board A', 'token', 'Review'), ('b', 'token', 'Done')]
+
+
+@pytest.mark.parametrize('projects, message', [
+    ([{'project_name': 'Board', 'repos': ['acme/api']}], 'access_token'),
+    ([{'name': 'a', 'access_token': 't', 'project_name': 'A', 'repos': ['acme/api']},
+      {'name': 'a', 'access_token': 't', 'project_name': 'B', 'repos': ['acme/web']}], 'unique'),
+])
+def test_invalid_config_is_rejected(tmp_path, projects, message):
+    with pytest.raises(ValueError, match=message):
+        load_config(write_config(tmp_path, {'projects': projects}))
+
+
+def test_teams_of_shared_repos_are_fetched_once(board, fake, tmp_path):
+    projects = [dict(team(board, 'team-a'), access_token='token')]
+    with open(run_batch(projects, str(tmp_path / 'one'), max_workers=4, api_url=fake.url)['team-a']) as f:
+        report = f.read()
+    one_team = fake.stats()['requests']
+
+    fake.counts.clear()
+    projects = [dict(team(board, name), access_token='token') for name in ('team-a', 'team-b', 'team-c')]
+    metrics_path = str(tmp_path / 'metrics.json')
+    paths = run_batch(projects, str(tmp_path / 'three'), max_workers=4, api_url=fake.url, metrics_out=[metrics_path])
+
+    assert sorted(paths) == ['team-a', 'team-b', 'team-c']
+    for path in paths.values():
+        with open(path) as f:
+            assert f.read() == report
+    # the requests of the teams are shared, three teams cost about as much as one
+    assert fake.stats()['requests'] < 1.5 * one_team
+    with open(metrics_path) as f:
+        assert json.load(f)['requests'] == fake.stats()['requests']
@@ -0,0 +1,48 @@
+import copy
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_scale import compare
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_benchmark(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, '-m', 'benchmarks.bench_scale', '--latency', '0', '--jitter', '0', '--max-workers', '4'] + list(args),
+                          cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def test_benchmark_saves_the_phases_of_every_scale(tmp_path):
+    out = str(tmp_path / 'results.json')
+    run = run_benchmark('--cards', '10,40', '--out', out)
+    assert run.returncode == 0, run.stderr
+
+    with open(out) as f:
+        results = json.load(f)['results']
+    assert [result['cards'] for result in results] == [10, 40]
+    for result in results:
+        assert list(result['phases']) == ['setup', 'fetch', 'report']
+        assert result['phases']['report']['report_bytes'] > 0
+        assert {'board cards', 'board card details'} <= set(result['phases']['fetch']['pipeline'])
+        # every request of the client reached the fake GitHub
+        assert result['total']['requests'] == result['server']['requests'] > 0
+    assert results[1]['total']['requests'] > results[0]['total']['requests']
+
+    # the same version sends the same requests, the times of such small boards are noise
+    assert run_benchmark('--cards', '10', '--compare', out, '--threshold', '100').returncode == 0
+
+
+def test_more_requests_are_a_regression():
+    phase = {'wall_s': 1.0, 'cpu_s': 0.5, 'peak_rss_mb': 50.0, 'requests': 100}
+    baseline = {'environment': {}, 'results': [{'cards': 100, 'phases': {'fetch': phase}, 'total': phase}]}
+    results = copy.deepcopy(baseline['results'])
+    assert compare(results, baseline, threshold=0.2) == 0
+
+    results[0]['phases']['fetch'] = dict(phase, requests=101)
+    assert compare(results, baseline, threshold=0.2) == 1
+    # a small change of a short phase is noise
+    results[0]['phases']['fetch'] = dict(phase, wall_s=1.04)
+    results[0]['total'] = dict(phase, wall_s=2.0)
+    assert compare(results, baseline, threshold=0.2) == 1
@@ -0,0 +1,75 @@
+from typing import Tuple
+
+import pytest
+
+from ghsprint.cassette import Cassette
+from ghsprint.fake_github import FakeGitHub
+from ghsprint.request_session import HTTPClient
+from ghsprint.sprint import Sprint
+
+token = 'ghp_not_a_real_token'
+# nothing listens there, a replay must not send a request
+unreachable = 'http://127.0.0.1:9'
+
+
+def run(make_sprint, api_url: str, engine='threads', **kwargs) -> Tuple[Sprint, str]:
+    """The sprint and its report, the report requests the PRs referenced by the stories that were not fetched."""
+    sprint = make_sprint(token, api_url=api_url, **kwargs)
+    try:
+        sprint.fetch_all_data(engine=engine)
+        return sprint, sprint.print_report()
+    finally:
+        sprint.ghh.client.close()
+
+
+@pytest.mark.parametrize('engine', ['threads', 'graphql'])
+def test_replay_returns_the_recorded_report(make_sprint, fake, tmp_path, engine):
+    path = str(tmp_path / 'run.jsonl')
+    recorded, recorded_report = run(make_sprint, fake.url, engine, record_path=path)
+    replayed, replayed_report = run(make_sprint, unreachable, engine, replay_path=path)
+
+    assert replayed_report == recorded_report
+    assert replayed.ghh.client.cassette.num_played == recorded.ghh.client.cassette.num_recorded
+    with open(path) as f:
+        assert token not in f.read()
+
+
+def test_fake_github_serves_a_cassette(make_sprint, fake, tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    _, recorded_report = run(make_sprint, fake.url, record_path=path)
+    server = FakeGitHub(cassette=Cassette(path), rate_limit=0).start()
+    try:
+        _, served_report = run(make_sprint, server.url)
+    finally:
+        server.stop()
+
+    assert served_report == recorded_report
+    assert 404 not in server.stats()['by_status']
+
+
+def test_requests_are_matched_without_host_token_and_query_order():
+    key = Cassette.key('GET', 'https://api.github.com/repos/acme/api/pulls?access_token=a&state=all&per_page=100', params={'page': 2})
+    assert Cassette.key('GET', 'http://127.0.0.1:8000/repos/acme/api/pulls?per_page=100&page=2&state=all&access_token=b') == key
+    assert Cassette.key('GET', 'http://127.0.0.1:8000/repos/acme/api/pulls?per_page=100&page=3&state=all') != key
+    assert Cassette.key('GET', 'http://127.0.0.1/issues/1', headers={'Accept': 'application/vnd.github.mockingbird-preview'}) != \
+        Cassette.key('GET', 'http://127.0.0.1/issues/1')
+    assert Cassette.key('POST', 'http://127.0.0.1/graphql', json_body={'query': 'a', 'variables': {'x': 1, 'y': 2}}) == \
+        Cassette.key('POST', 'http://127.0.0.1/graphql', json_body={'variables': {'y': 2, 'x': 1}, 'query': 'a'})
+    assert Cassette.key('POST', 'http://127.0.0.1/graphql', json_body={'query': 'a', 'variables': {'x': 1}}) != \
+        Cassette.key('POST', 'http://127.0.0.1/graphql', json_body={'query': 'a', 'variables': {'x': 2}})
+
+
+def test_repeated_requests_get_the_responses_in_recorded_order(fake, board, tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    url = fake.url + '/repos/acme/api/projects'
+    recorder = HTTPClient(cassette=Cassette(path, mode='record'))
+    for name in ('First', 'Second'):
+        board.project_name = name
+        recorder.reset()
+        recorder.get(url)
+    recorder.close()
+
+    cassette = Cassette(path)
+    assert [cassette.play('GET', url).json()[0]['name'] for _ in range(3)] == ['First', 'Second', 'Second']
+    with pytest.raises(RuntimeError):
+        cassette.play('GET', fake.url + '/repos/acme/unknown/projects')
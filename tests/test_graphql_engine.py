@@ -0,0 +1,74 @@
+from ghsprint.graphql_driver import GraphQLError, GraphQLGithubHelper
+from ghsprint.sprint import Sprint
+
+
+def fetch(make_sprint, engine: str) -> Sprint:
+    sprint = make_sprint()
+    sprint.fetch_all_data(engine=engine)
+    return sprint
+
+
+def name(repo) -> str:
+    return repo and '{}/{}'.format(repo.owner, repo.name)
+
+
+def story(card) -> tuple:
+    issue = card.issue
+    events = [(e.event, e.date, e.label, e.assignee, e.source_number, e.source_title, e.source_state, e.source_closed_at, e.source_is_pr,
+               name(e.source_repo)) for e in card.events]
+    return (name(card.repo), card.issue_num, card.col.name, card.id, card.created_at, card.updated_at, issue.id, issue.title, issue.url,
+            issue.state, issue.closed_at, issue.updated_at, issue.assignees, issue.labels, events)
+
+
+def pull_request(pr) -> tuple:
+    return (name(pr.repo), pr.number, pr.title, pr.state, pr.created_at, pr.updated_at, pr.merged_at, pr.merge_commit_sha, pr.user_name,
+            pr.labels, pr.additions, pr.deletions, pr.changed_files, pr.is_draft, [(i.number, name(i.repo)) for i in pr.closes],
+            [(r.reviewer, r.state, r.submitted_at, r.url) for r in pr.reviews])
+
+
+def test_graphql_engine_returns_the_stories_of_the_threads_engine(make_sprint, board):
+    threads, graphql = fetch(make_sprint, 'threads'), fetch(make_sprint, 'graphql')
+
+    assert len(threads.cards_with_issues) == board.num_cards + 6
+    assert [story(c) for c in graphql.cards_with_issues] == [story(c) for c in threads.cards_with_issues]
+    assert sorted(map(pull_request, graphql.prs)) == sorted(map(pull_request, threads.prs))
+    assert graphql.print_report() == threads.print_report()
+
+
+def test_pr_cards_are_stories(make_sprint, board):
+    graphql = fetch(make_sprint, 'graphql')
+
+    pr_cards = [c for c in graphql.cards_with_issues if board.pull(c.repo.name, c.issue_num)]
+    assert len(pr_cards) == 6
+    assert all(c.content_url.endswith('/issues/{}'.format(c.issue_num)) and c.issue.updated_at and c.events for c in pr_cards)
+
+
+def test_graphql_engine_registers_PRs_and_issues(make_sprint):
+    sprint = fetch(make_sprint, 'graphql')
+
+    ghh = sprint.ghh
+    assert sprint.prs and all(ghh.prs[(pr.repo, pr.number)] is pr for pr in sprint.prs)
+    issues = [c.issue for c in sprint.cards_with_issues if c.issue is not None]
+    assert issues and all(ghh.issues[(issue.repo, issue.number)] is issue for issue in issues)
+
+
+def test_page_size_is_halved_for_one_query(make_sprint, board):
+    sprint = make_sprint(keep_columns='')
+    gql = GraphQLGithubHelper(sprint.ghh, page_size=8)
+    query = gql.query
+    page_sizes = []
+
+    def expensive_cards(text, **variables):
+        if 'cards(' in text and variables['first'] > 2:
+            raise GraphQLError('MAX_NODE_LIMIT_EXCEEDED too many nodes')
+        page_sizes.append(variables.get('first'))
+        return query(text, **variables)
+
+    gql.query = expensive_cards
+    sprint._find_project_id(gql)
+    col, column_node_id = gql.get_all_columns()[0]
+    cards = gql.get_all_cards(col, column_node_id)
+
+    assert len(cards) == len(board.cards[col.id])
+    assert gql.page_size == 8
+    assert next(gql.iter_PRs(sprint.ghh.repos[0])) and page_sizes[-1] == 8
@@ -0,0 +1,63 @@
+import os
+
+from ghsprint.fake_github import FakeGitHub
+from ghsprint.http_cache import ResponseCache
+from ghsprint.request_session import HTTPClient
+
+
+def client(tmp_path) -> HTTPClient:
+    return HTTPClient(cache=ResponseCache(str(tmp_path)))
+
+
+def test_unchanged_response_is_revalidated(fake, tmp_path):
+    http = client(tmp_path)
+    first = http.get(fake.url + '/repos/acme/api/issues/1')
+    # a new run, the response of the first is not reused
+    http.reset()
+    second = http.get(fake.url + '/repos/acme/api/issues/1')
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert http.cache.stats() == {'hits': 1, 'misses': 1, 'revalidated': 1}
+    assert fake.stats()['by_status'] == {200: 1, 304: 1}
+
+
+def test_changed_response_replaces_the_entry(fake, board, tmp_path):
+    http = client(tmp_path)
+    http.get(fake.url + '/repos/acme/api/projects')
+    board.project_name = 'Next Board'
+    http.reset()
+    changed = http.get(fake.url + '/repos/acme/api/projects')
+    http.reset()
+    again = http.get(fake.url + '/repos/acme/api/projects')
+
+    assert changed.json()[0]['name'] == again.json()[0]['name'] == 'Next Board'
+    assert fake.stats()['by_status'] == {200: 2, 304: 1}
+
+
+def test_revalidation_does_not_use_the_rate_limit(board, tmp_path):
+    fake = FakeGitHub(board, rate_limit=100).start()
+    try:
+        http = client(tmp_path)
+        http.get(fake.url + '/repos/acme/api/issues/1')
+        http.reset()
+        r = http.get(fake.url + '/repos/acme/api/issues/1')
+    finally:
+        fake.stop()
+
+    assert r.headers['X-RateLimit-Remaining'] == '99'
+    assert fake.stats()['rate_remaining'] == 99
+
+
+def test_token_is_not_cached_but_restored_in_links(fake, tmp_path):
+    http = client(tmp_path)
+    url = fake.url + '/projects/columns/100/cards?access_token=secret&per_page=2'
+    first = http.get(url)
+    http.reset()
+    second = http.get(url)
+
+    assert fake.stats()['by_status'] == {200: 1, 304: 1}
+    assert 'access_token=secret' in first.links['next']['url'] and second.links['next']['url'] == first.links['next']['url']
+    for name in os.listdir(str(tmp_path)):
+        with open(os.path.join(str(tmp_path), name), 'rb') as f:
+            assert b'secret' not in f.read()
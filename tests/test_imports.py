@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize('module', ['ghsprint.__main__', 'ghsprint.serve', 'ghsprint.batch'])
+def test_cli_does_not_import_sqlite3(module):
+    # a fresh interpreter, the tests may have imported it already
+    code = 'import sys, {}; print("sqlite3" in sys.modules)'.format(module)
+    assert subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout.strip() == 'False'
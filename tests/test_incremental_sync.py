@@ -0,0 +1,87 @@
+from collections import Counter
+
+import pytest
+
+from ghsprint.sprint import Sprint
+from ghsprint.store import SyncStore
+
+
+def sync(make_sprint, store_path: str) -> Sprint:
+    sprint = make_sprint(store_path=store_path)
+    sprint.fetch_all_data(incremental=True)
+    return sprint
+
+
+def test_all_repos_are_synced(make_sprint, tmp_path):
+    sync(make_sprint, str(tmp_path / 'store.sqlite'))
+
+    store = SyncStore(str(tmp_path / 'store.sqlite'))
+    assert all(store.synced_at(kind + ':acme/' + repo) for kind in ('issues', 'prs') for repo in ('api', 'web'))
+
+
+def test_repo_with_an_unsaved_PR_is_not_synced(make_sprint, board, tmp_path):
+    # the most recently updated PR of `web` is listed, but its details cannot be fetched
+    del board.pull_index[('web', board.pulls['web'][0]['number'])]
+    sync(make_sprint, str(tmp_path / 'store.sqlite'))
+
+    store = SyncStore(str(tmp_path / 'store.sqlite'))
+    assert store.synced_at('prs:acme/api') is not None
+    assert store.synced_at('prs:acme/web') is None
+
+
+def test_repo_with_an_unsaved_issue_is_not_synced(make_sprint, board, monkeypatch, tmp_path):
+    issue = board.issue
+    monkeypatch.setattr(board, 'issue', lambda repo, number: None if (repo, number) == ('api', 1) else issue(repo, number))
+    sync(make_sprint, str(tmp_path / 'store.sqlite'))
+
+    store = SyncStore(str(tmp_path / 'store.sqlite'))
+    assert store.synced_at('issues:acme/api') is None
+    assert store.synced_at('issues:acme/web') is not None
+
+
+def requests_by_endpoint(fake) -> Counter:
+    return Counter({endpoint.rsplit(' ', 1)[0]: count for endpoint, count in fake.stats()['by_endpoint'].items()})
+
+
+def test_failed_timeline_is_fetched_again(make_sprint, fake, tmp_path):
+    routes = fake.routes
+    fake.routes = [(pattern, lambda q, *args, handler=handler: None if args == ('acme', 'api', '1') else handler(q, *args))
+                   if pattern.pattern.endswith('/timeline') else (pattern, handler) for pattern, handler in routes]
+    sprint = sync(make_sprint, str(tmp_path / 'store.sqlite'))
+    api = sprint.ghh.repos[0]
+
+    store = SyncStore(str(tmp_path / 'store.sqlite'))
+    assert store.load_issue(api, 1) == (None, None)
+    assert store.synced_at('issues:acme/api') is None and store.synced_at('issues:acme/web') is not None
+    store.close()
+
+    fake.routes = routes
+    sync(make_sprint, str(tmp_path / 'store.sqlite'))
+
+    store = SyncStore(str(tmp_path / 'store.sqlite'))
+    assert all(part is not None for part in store.load_issue(api, 1))
+    assert store.synced_at('issues:acme/api') is not None
+
+
+def test_failed_run_saves_nothing(make_sprint, monkeypatch, tmp_path):
+    sprint = make_sprint(store_path=str(tmp_path / 'store.sqlite'))
+    monkeypatch.setattr(sprint.ghh, 'fetch_PR_data', lambda pr: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        sprint.fetch_all_data(incremental=True)
+
+    store = SyncStore(str(tmp_path / 'store.sqlite'))
+    assert store.load_issue(sprint.ghh.repos[0], 1) == (None, None)
+    assert not any(store.synced_at(kind + ':acme/' + repo) for kind in ('issues', 'prs') for repo in ('api', 'web'))
+
+
+def test_unchanged_board_is_read_from_the_store(make_sprint, fake, board, tmp_path):
+    first = sync(make_sprint, str(tmp_path / 'store.sqlite'))
+    before = requests_by_endpoint(fake)
+    second = sync(make_sprint, str(tmp_path / 'store.sqlite'))
+
+    # the columns, their cards, and per repo the issues and the PRs changed since the first run
+    requests = requests_by_endpoint(fake) - before
+    assert set(requests) == {r'/projects/(\d+)/columns', r'/projects/columns/(\d+)/cards', r'/repos/([^/]+)/([^/]+)/issues',
+                             r'/repos/([^/]+)/([^/]+)/pulls'}
+    assert sum(requests.values()) == 1 + len(board.columns) + 2 * 2
+    assert second.print_report() == first.print_report()
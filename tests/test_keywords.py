@@ -0,0 +1,92 @@
+import datetime
+import json
+
+import pytest
+
+from ghsprint.keywords import DegreeKeywords, KeywordCache, RakeKeywords, top_keywords
+
+
+def test_degree_of_a_word_is_the_length_of_its_phrases():
+    engine = DegreeKeywords()
+    assert engine.word_degrees('Fix the login widget') == {'fix': 1, 'login': 2, 'widget': 2}
+    # runs of punctuation separate phrases, stopwords are dropped
+    assert engine.word_degrees('Speed up -- the cache?. Export report') == {'speed': 1, 'cache': 1, 'export': 2, 'report': 2}
+
+
+# the word degrees `Rake.get_word_degrees` gives with the NLTK english stopwords
+RAKE_DEGREES = {
+    'Fix the login widget': {'fix': 1, 'login': 2, 'widget': 2},
+    'Improve the search of the export dashboard': {'improve': 1, 'search': 1, 'export': 2, 'dashboard': 2},
+    'Add retry to the upload api': {'add': 2, 'retry': 2, 'upload': 2, 'api': 2},
+    "Don't cache the user's avatar": {'cache': 1, 'user': 1, 'avatar': 1},
+}
+
+
+@pytest.mark.parametrize('title', sorted(RAKE_DEGREES))
+def test_degree_keywords_match_rake(title):
+    assert DegreeKeywords().word_degrees(title) == RAKE_DEGREES[title]
+
+
+@pytest.mark.parametrize('title', sorted(RAKE_DEGREES))
+def test_rake_degrees_are_up_to_date(title):
+    try:
+        rake = RakeKeywords()
+        rake.word_degrees('warm up')
+    except (ImportError, LookupError):
+        pytest.skip('rake_nltk or its NLTK data is not installed')
+    assert rake.word_degrees(title) == RAKE_DEGREES[title]
+
+
+def test_cache_scores_only_new_and_renamed_titles(tmp_path):
+    path = str(tmp_path / 'keywords.json')
+    titles = [(1, 'Fix the login widget'), (2, 'Add the export')]
+    cache = KeywordCache(path)
+    first = top_keywords(titles, cache=cache)
+    cache.save()
+
+    cache = KeywordCache(path)
+    assert top_keywords(titles, cache=cache) == first and (cache.hits, cache.misses) == (2, 0)
+    top_keywords([(1, 'Fix the login widget'), (2, 'Add the import')], cache=cache)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_cache_keeps_the_newest_entries(tmp_path):
+    path = str(tmp_path / 'keywords.json')
+    cache = KeywordCache(path, max_entries=2)
+    top_keywords([(1, 'login'), (2, 'search'), (3, 'export')], cache=cache)
+    cache.save()
+
+    with open(path) as f:
+        assert [key.split(':')[1] for key in json.load(f)] == ['2', '3']
+
+
+def test_keywords_of_the_stories_of_a_sprint(make_sprint, tmp_path):
+    path = str(tmp_path / 'keywords.json')
+    sprint = make_sprint(keyword_cache_path=path)
+    sprint.fetch_all_data()
+    stories = sprint.get_all_stories()
+
+    keywords = sprint.title_keywords()
+    assert keywords == top_keywords((c.issue.id, c.issue.title) for c in stories)
+    assert len(keywords) == 10 and 'the' not in keywords
+    with open(path) as f:
+        assert len(json.load(f)) == len(stories)
+    # the second time from the cache
+    assert sprint.title_keywords() == keywords
+
+
+def test_reports_of_several_weeks_share_one_cache(make_sprint, monkeypatch, tmp_path):
+    path = str(tmp_path / 'keywords.json')
+    sprint = make_sprint(keyword_cache_path=path)
+    sprint.fetch_all_data()
+    saved = []
+    save = KeywordCache.save
+    monkeypatch.setattr(KeywordCache, 'save', lambda cache: saved.append(cache) or save(cache))
+    week = datetime.date.today().isocalendar()[1]
+
+    sprint.print_reports([week - 2, week - 1, week])
+
+    # the stories of the weeks overlap, every title is scored once
+    assert len(saved) == 1 and saved[0].misses == len(saved[0].entries)
+    with open(path) as f:
+        assert len(json.load(f)) == len(saved[0].entries)
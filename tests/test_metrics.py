@@ -0,0 +1,62 @@
+import json
+import re
+
+import pytest
+from click.testing import CliRunner
+
+from ghsprint.__main__ import start_sprint
+from ghsprint.metrics import RequestMetrics, endpoint_template
+
+
+@pytest.mark.parametrize('path, template', [
+    ('/repos/acme/api/issues/12/timeline', '/repos/{o}/{r}/issues/{n}/timeline'),
+    ('/repos/acme/api/pulls', '/repos/{o}/{r}/pulls'),
+    ('/projects/columns/101/cards', '/projects/columns/{n}/cards'),
+    ('/graphql', '/graphql'),
+])
+def test_endpoint_template(path, template):
+    assert endpoint_template(path) == template
+
+
+def test_template_drops_the_base_path_of_the_api():
+    metrics = RequestMetrics('/api/v3')
+    assert metrics.template('https://github.example.com/api/v3/repos/acme/api/issues/3?page=2') == '/repos/{o}/{r}/issues/{n}'
+
+
+def test_latency_quantiles_and_statuses_by_endpoint():
+    metrics = RequestMetrics()
+    for i in range(100):
+        metrics.observe('GET', 'https://api.github.com/repos/acme/api/issues/{}'.format(i), 200 if i else 404, (i + 1) / 100,
+                        num_bytes=10, remaining=5000 - i)
+    metrics.observe('GET', 'https://api.github.com/repos/acme/api/issues/1', 304, 0.01, retries=1)
+
+    endpoint = metrics.to_dict()['endpoints']['GET /repos/{o}/{r}/issues/{n}']
+    assert endpoint['requests'] == 101 and endpoint['bytes'] == 1000 and endpoint['retries'] == 1
+    assert endpoint['statuses'] == {'200': 99, '304': 1, '404': 1} and endpoint['not_modified'] == 1
+    assert (endpoint['latency']['p50'], endpoint['latency']['p95'], endpoint['latency']['p99']) == (0.5, 0.95, 0.99)
+    assert endpoint['rate_limit_remaining'] == 4901
+
+
+def test_run_writes_the_requests_by_endpoint(board, fake, tmp_path):
+    json_path, prom_path = str(tmp_path / 'metrics.json'), str(tmp_path / 'metrics.prom')
+    repos = ['{}/{}'.format(board.owner, repo) for repo in board.repos]
+    result = CliRunner().invoke(start_sprint, ['--api-url', fake.url, '--no-cache', '--max-workers', '4', '--keep-columns', 'In Progress,Review',
+                                               '--metrics-out', json_path, '--metrics-out', prom_path, 'token', board.project_name] + repos)
+    assert result.exit_code == 0, result.output
+
+    with open(json_path) as f:
+        metrics = json.load(f)
+    # the endpoints of the fake are regular expressions of the same paths
+    served = {}
+    for key, count in fake.stats()['by_endpoint'].items():
+        pattern, status = key.rsplit(' ', 1)
+        template = re.sub(r'\(\\d\+\)', '{n}', pattern.replace('([^/]+)/([^/]+)', '{o}/{r}'))
+        served.setdefault('GET ' + template, {})[status] = count
+    assert {key: endpoint['statuses'] for key, endpoint in metrics['endpoints'].items()} == served
+    assert metrics['requests'] == fake.stats()['requests'] and metrics['labels'] == {'project': board.project_name}
+
+    with open(prom_path) as f:
+        prom = f.read()
+    timelines = metrics['endpoints']['GET /repos/{o}/{r}/issues/{n}/timeline']['statuses']['200']
+    assert 'ghsprint_requests_total{{project="{}",method="GET",endpoint="/repos/{{o}}/{{r}}/issues/{{n}}/timeline",status="200"}} {}'.format(
+        board.project_name, timelines) in prom.splitlines()
@@ -0,0 +1,42 @@
+import logging
+import threading
+
+import pytest
+
+from ghsprint.ghdriver import PageError
+
+
+def fail_page(fake, page: int):
+    fake.routes = [(pattern, lambda q, *args, handler=handler: None if q.get('page') == [str(page)] else handler(q, *args))
+                   for pattern, handler in fake.routes]
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_failed_page_is_reported(make_sprint, fake, caplog, parallel):
+    ghh = make_sprint().ghh
+    url = fake.url + '/repos/acme/api/issues?access_token=token&per_page=5'
+    fail_page(fake, 3)
+
+    items = []
+    with pytest.raises(PageError) as e, caplog.at_level(logging.WARNING, logger='ghsprint.ghdriver'):
+        items.extend(ghh._paginate(url, parallel=parallel))
+
+    assert len(items) == 10
+    assert e.value.status == 404 and 'page=3' in e.value.url and 'token' not in e.value.url
+    assert e.value.url in caplog.text
+
+
+def test_pages_share_the_threads_of_the_helper(make_sprint, fake, monkeypatch):
+    ghh = make_sprint(max_workers=3).ghh
+    url = fake.url + '/repos/acme/{}/issues?access_token=token&per_page=2'
+    threads, get = set(), ghh.client.get
+
+    def recording_get(*args, **kwargs):
+        threads.add(threading.current_thread())
+        return get(*args, **kwargs)
+
+    monkeypatch.setattr(ghh.client, 'get', recording_get)
+    for repo in ('api', 'web'):
+        assert len(list(ghh._paginate(url.format(repo), parallel=True))) > 6
+
+    assert len(threads - {threading.current_thread()}) == 3
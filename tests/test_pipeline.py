@@ -0,0 +1,73 @@
+import threading
+from time import sleep, time
+
+import pytest
+
+from ghsprint import sprint as sprint_module
+from ghsprint.fake_github import FakeGitHub
+from ghsprint.pipeline import Pipeline
+
+
+def test_tasks_get_the_results_of_their_dependencies():
+    pipeline = Pipeline()
+    pipeline.add('columns', lambda: ['todo', 'done'])
+    pipeline.add('cards', lambda columns: {column: column.upper() for column in columns}, deps=['columns'])
+    pipeline.add('report', lambda cards, columns: [cards[column] for column in columns], deps=['cards', 'columns'])
+
+    assert pipeline.run()['report'] == ['TODO', 'DONE']
+    assert [task.name for task in pipeline.critical_path()] == ['columns', 'cards', 'report']
+
+
+def test_independent_tasks_overlap():
+    # both branches wait for each other, they only finish if they run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+    pipeline = Pipeline()
+    pipeline.add('PRs', lambda: 'PRs')
+    pipeline.add('reviews', lambda prs: barrier.wait() >= 0, deps=['PRs'])
+    pipeline.add('timelines', lambda: barrier.wait() >= 0)
+
+    results = pipeline.run()
+
+    assert results['reviews'] and results['timelines']
+
+
+def test_tasks_start_when_their_dependencies_are_done():
+    pipeline = Pipeline()
+    pipeline.add('slow', lambda: sleep(0.3))
+    pipeline.add('fast', lambda: None)
+    pipeline.add('after fast', lambda _: None, deps=['fast'])
+    pipeline.run()
+
+    tasks = pipeline.tasks
+    assert tasks['after fast'].start >= tasks['fast'].end
+    assert tasks['after fast'].end < tasks['slow'].end
+
+
+def test_unknown_dependency_is_rejected():
+    pipeline = Pipeline()
+    with pytest.raises(ValueError):
+        pipeline.add('cards', lambda columns: columns, deps=['columns'])
+
+
+def test_sprint_fetches_PR_reviews_while_cards_are_fetched(make_sprint, board, monkeypatch):
+    pipelines = []
+
+    class RecordingPipeline(Pipeline):
+        def __init__(self):
+            super().__init__()
+            pipelines.append(self)
+
+    monkeypatch.setattr(sprint_module, 'Pipeline', RecordingPipeline)
+    fake = FakeGitHub(board, rate_limit=0, latency=0.02).start()
+    try:
+        start = time()
+        make_sprint(api_url=fake.url).fetch_all_data()
+        wall_time = time() - start
+    finally:
+        fake.stop()
+
+    tasks = pipelines[0].tasks
+    assert tasks['PR reviews'].start < tasks['board card details'].end
+    assert tasks['PR data'].start < tasks['board card details'].end
+    phases = sum(task.duration for task in tasks.values())
+    assert wall_time < phases
@@ -0,0 +1,51 @@
+from ghsprint.fake_github import FakeGitHub
+from ghsprint.rate_limit import RateLimiter
+from ghsprint.request_session import HTTPClient
+
+
+def test_exhausted_budget_halves_the_concurrency_and_waits_for_the_reset(board):
+    fake = FakeGitHub(board, rate_limit=3, rate_reset=1).start()
+    # GitHub is never asked with a low budget by default, here the 403 of an exhausted budget is provoked
+    limiter = RateLimiter(max_concurrency=8, low_remaining=-1, max_wait=5)
+    http = HTTPClient(limiter=limiter)
+    try:
+        statuses = [http.get(fake.url + '/repos/acme/api/issues/{}'.format(n)).status_code for n in range(1, 6)]
+    finally:
+        fake.stop()
+
+    assert statuses == [200] * 5
+    assert fake.stats()['by_status'] == {200: 5, 403: 1}
+    assert limiter.throttled == 1 and limiter.paused > 0
+    # halved once, then grown by 1/concurrency for every success
+    assert 4 < limiter.concurrency < 5
+
+
+def test_low_budget_pauses_before_github_throttles(board):
+    fake = FakeGitHub(board, rate_limit=3, rate_reset=1).start()
+    limiter = RateLimiter(max_concurrency=8, low_remaining=1, max_wait=5)
+    http = HTTPClient(limiter=limiter)
+    try:
+        statuses = [http.get(fake.url + '/repos/acme/api/issues/{}'.format(n)).status_code for n in range(1, 6)]
+    finally:
+        fake.stop()
+
+    assert statuses == [200] * 5
+    assert fake.stats()['by_status'] == {200: 5}
+    assert limiter.throttled == 0 and limiter.paused > 0
+    assert limiter.concurrency == 8
+
+
+def test_concurrency_grows_back_additively():
+    limiter = RateLimiter(max_concurrency=8)
+    assert limiter.observe(429, {'Retry-After': '0'}) == 0
+    assert limiter.observe(403, {'X-RateLimit-Remaining': '10'}, 'You have exceeded a secondary rate limit') == limiter.secondary_wait
+    assert limiter.concurrency == 2
+
+    sizes = []
+    for _ in range(20):
+        limiter.observe(200, {})
+        sizes.append(limiter.concurrency)
+    assert sizes == sorted(sizes) and int(sizes[1]) == 2 and 5 < sizes[-1] < 8
+    for _ in range(100):
+        limiter.observe(200, {})
+    assert limiter.concurrency == 8
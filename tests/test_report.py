@@ -0,0 +1,28 @@
+import datetime
+
+
+def test_rendering_makes_no_requests(make_sprint, fake):
+    sprint = make_sprint()
+    sprint.fetch_all_data()
+    stories = sprint.all_pokered_leftover + sprint.all_pokered_cards + sprint.all_stale_cards
+    referenced = {(ev.source_repo, ev.source_number) for story in stories for ev in story.events if ev.source_is_pr}
+    before = fake.stats()['requests']
+    pr_index = sprint.resolve_PRs(stories)
+    resolved = fake.stats()['requests']
+
+    sprint.print_report()
+
+    # the PRs referenced by the stories but not fetched with the sprint are requested before the rendering only
+    assert referenced and referenced <= set(pr_index)
+    assert resolved > before and fake.stats()['requests'] == resolved
+
+
+def test_reports_of_several_weeks_log_the_saved_requests_once(make_sprint, capsys):
+    sprint = make_sprint()
+    sprint.fetch_all_data()
+    capsys.readouterr()
+    week = datetime.date.today().isocalendar()[1]
+
+    sprint.print_reports([week - 1, week])
+
+    assert capsys.readouterr().out.count('saved by deduplication') == 1
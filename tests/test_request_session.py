@@ -0,0 +1,74 @@
+import asyncio
+import concurrent.futures
+
+from ghsprint.async_driver import AsyncGithubHelper
+from ghsprint.fake_github import FakeGitHub
+from ghsprint.request_session import HTTPClient
+
+
+def test_concurrent_identical_requests_are_sent_once(board):
+    fake = FakeGitHub(board, rate_limit=0, latency=0.2).start()
+    http = HTTPClient()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            responses = list(executor.map(lambda _: http.get(fake.url + '/repos/acme/api/issues/1'), range(5)))
+    finally:
+        fake.stop()
+
+    assert all(r is responses[0] for r in responses)
+    assert fake.stats()['requests'] == 1 and http.num_saved == 4
+
+
+def test_stored_responses_are_bounded(fake):
+    http = HTTPClient()
+    size = len(http.get(fake.url + '/repos/acme/api/issues/1').content)
+    http.max_stored_bytes = 2 * size
+    for number in (2, 3):
+        http.get(fake.url + '/repos/acme/api/issues/{}'.format(number))
+    http.get(fake.url + '/repos/acme/api/issues/3')
+    http.get(fake.url + '/repos/acme/api/issues/1')
+
+    # the least recently used response was dropped, the others are reused
+    assert fake.stats()['requests'] == 4 and http.num_saved == 1
+
+
+def test_forgotten_responses_are_requested_again(fake, board, monkeypatch):
+    http = HTTPClient()
+    first = http.get(fake.url + '/repos/acme/api/issues/1').json()
+    issue = board.issue
+    monkeypatch.setattr(board, 'issue', lambda repo, number: dict(issue(repo, number), title='changed'))
+
+    assert http.get(fake.url + '/repos/acme/api/issues/1').json() == first
+    http.forget_responses()
+    assert http.get(fake.url + '/repos/acme/api/issues/1').json()['title'] == 'changed'
+
+
+def test_async_identical_requests_are_sent_once(make_sprint, fake):
+    ghh = make_sprint().ghh
+
+    async def get_all():
+        async with AsyncGithubHelper(ghh) as agh:
+            return await asyncio.gather(*(agh._get(ghh.issue_url(ghh.repos[0], 1), headers=ghh.headers) for _ in range(5)))
+
+    results = asyncio.run(get_all())
+
+    assert all(result == results[0] for result in results) and results[0][0] == 200
+    assert fake.stats()['requests'] == 1 and ghh.client.num_saved == 4
+
+
+def test_sprint_reuses_the_pooled_connections(make_sprint, fake, monkeypatch):
+    accepted, finish_request = [], fake.httpd.finish_request
+
+    def counting_finish_request(request, client_address):
+        accepted.append(client_address)
+        return finish_request(request, client_address)
+
+    monkeypatch.setattr(fake.httpd, 'finish_request', counting_finish_request)
+    sprint = make_sprint()
+    sprint.fetch_all_data()
+    stats = sprint.ghh.client.connection_stats()
+
+    # the sprint workers and the page threads each keep at most one connection open
+    assert stats['requests'] == fake.stats()['requests'] > 100
+    assert stats['connections'] == len(accepted) <= 2 * sprint.max_workers
+    assert stats['reused'] == stats['requests'] - stats['connections']
@@ -0,0 +1,42 @@
+from ghsprint.utils import str2date
+
+
+def timeline_requests(fake) -> dict:
+    return {key.rsplit(' ', 1)[1]: count for key, count in fake.stats()['by_endpoint'].items() if '/timeline' in key}
+
+
+def test_every_card_gets_the_timeline_of_its_own_repo(make_sprint, fake, board):
+    sprint = make_sprint()
+    sprint.fetch_all_data()
+    ghh = sprint.ghh
+    cards = sprint.cards_with_issues
+
+    # the numbers of the issues exist in both repos, each timeline is requested once from the repo of its card
+    assert {card.repo.name for card in cards} == set(board.repos)
+    assert timeline_requests(fake) == {'200': len(cards)}
+    for card in cards:
+        timeline = board.timeline(card.repo.name, card.issue_num)
+        assert [ev.date for ev in card.events] == [str2date(ev['created_at']) for ev in timeline if ev['event'] in ghh.interesting_event_types]
+    assert ghh.num_probes_avoided == sum(ghh.repos.index(card.repo) for card in cards)
+
+
+def test_timeline_of_a_number_is_routed_to_its_repo(make_sprint, fake):
+    ghh = make_sprint().ghh
+    api, web = ghh.repos
+    ghh.add_route(web, 1)
+
+    assert list(ghh.iter_timeline(1))
+    assert timeline_requests(fake) == {'200': 1}
+    assert ghh.num_probes_avoided == 1
+
+
+def test_timeline_of_an_unknown_number_is_probed_in_order(make_sprint, fake):
+    ghh = make_sprint().ghh
+    api, web = ghh.repos
+    # the issue 1 of the first repo is missing
+    fake.routes = [(pattern, lambda q, owner, repo, number, handler=handler: None if (repo, number) == (api.name, '1') else handler(q, owner, repo, number))
+                   if pattern.pattern.endswith('/timeline') else (pattern, handler) for pattern, handler in fake.routes]
+
+    assert list(ghh.iter_timeline(1))
+    assert timeline_requests(fake) == {'404': 1, '200': 1}
+    assert ghh.route(1) == web
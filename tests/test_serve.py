@@ -0,0 +1,45 @@
+import concurrent.futures
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ghsprint.serve import SprintServer
+from ghsprint.sprint import Sprint
+
+
+@pytest.fixture
+def server(make_sprint):
+    server = SprintServer(make_sprint(), port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def get(server, path: str) -> int:
+    try:
+        with urllib.request.urlopen('http://{}:{}{}'.format(*server.address[:2], path)) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_weeks_out_of_range_are_rejected(server):
+    assert [get(server, '/report?week=' + week) for week in ('54', '-54', '10000000000', 'x')] == [400] * 4
+    assert set(server.reports) == {None}
+
+
+def test_week_is_rendered_once(server, monkeypatch):
+    renders = []
+    for_week = Sprint.for_week
+
+    def counting_for_week(sprint, week):
+        renders.append(week)
+        return for_week(sprint, week)
+
+    monkeypatch.setattr(Sprint, 'for_week', counting_for_week)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(lambda _: get(server, '/report?week=10'), range(16)))
+
+    assert statuses == [200] * 16
+    assert renders == [10]
@@ -0,0 +1,53 @@
+import cProfile
+import pstats
+import threading
+
+from ghsprint.tracing import ThreadProfiler
+
+
+def work():
+    return sum(i * i for i in range(10000))
+
+
+def run_threads(n=3):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(work())) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_profile_includes_the_threads(tmp_path):
+    run = threading.Thread.run
+    profiler = ThreadProfiler()
+    profiler.enable()
+    try:
+        run_threads()
+    finally:
+        profiler.disable()
+    profiler.write(str(tmp_path / 'run.prof'))
+
+    stats = pstats.Stats(str(tmp_path / 'run.prof')).stats
+    assert sum(calls for (_, _, name), (calls, *_) in stats.items() if name == 'work') == 3
+    assert threading.Thread.run is run
+
+
+def test_threads_run_if_no_profile_can_be_enabled(monkeypatch):
+    class ActiveProfile(cProfile.Profile):
+        # like Python 3.12, where only one profile can be enabled
+        def enable(self, *args, **kwargs):
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError('Another profiling tool is already active')
+            super().enable(*args, **kwargs)
+
+    monkeypatch.setattr(cProfile, 'Profile', ActiveProfile)
+    profiler = ThreadProfiler()
+    profiler.enable()
+    try:
+        results = run_threads()
+    finally:
+        profiler.disable()
+
+    assert len(results) == 3
@@ -0,0 +1,11 @@
+import click
+import pytest
+
+from ghsprint.utils import parse_weeks
+
+
+def test_weeks_are_parsed_from_ranges_and_lists():
+    assert parse_weeks(None, None, '32,30-31,35') == [30, 31, 32, 35]
+    assert parse_weeks(None, None, '') == []
+    with pytest.raises(click.BadParameter):
+        parse_weeks(None, None, '30-x')
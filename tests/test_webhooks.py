@@ -0,0 +1,154 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+import pytest
+
+from ghsprint.pr_stuff import Review
+from ghsprint.serve import SprintServer
+from ghsprint.utils import date2str
+from ghsprint.webhooks import WebhookApplier, sign
+
+repository = {'owner': {'login': 'acme'}, 'name': 'api'}
+
+
+@pytest.fixture
+def sprint(make_sprint):
+    sprint = make_sprint()
+    sprint.fetch_all_data()
+    return sprint
+
+
+def card_payload(card, column_id: int, updated_at, action='moved') -> dict:
+    return {'action': action, 'project_card': {'id': card.id, 'column_id': column_id, 'created_at': date2str(card.created_at),
+                                               'updated_at': date2str(updated_at), 'content_url': card.content_url}}
+
+
+def other_column(board, card) -> int:
+    return next(col['id'] for col in board.columns if col['id'] != card.col.id)
+
+
+def test_late_and_duplicate_card_moves_are_not_applied(sprint, board):
+    applier = WebhookApplier(sprint)
+    card = sprint.cards_with_issues[0]
+    old_col = card.col.id
+    new_col = other_column(board, card)
+
+    assert applier.apply('project_card', card_payload(card, new_col, card.updated_at + timedelta(hours=2)), 'd1') == 'applied'
+    assert card.col.id == new_col
+    # a delivery for an earlier move arrives after the later one
+    assert applier.apply('project_card', card_payload(card, old_col, card.updated_at - timedelta(hours=1)), 'd2') == 'stale'
+    assert applier.apply('project_card', card_payload(card, old_col, card.updated_at + timedelta(hours=3)), 'd1') == 'duplicate'
+    assert card.col.id == new_col
+
+
+def test_deleted_card_is_not_brought_back(sprint, board):
+    applier = WebhookApplier(sprint)
+    card = sprint.cards_with_issues[0]
+    updated_at = card.updated_at + timedelta(hours=1)
+
+    assert applier.apply('project_card', card_payload(card, card.col.id, updated_at, action='deleted'), 'd1') == 'applied'
+    assert applier.apply('project_card', card_payload(card, other_column(board, card), updated_at - timedelta(minutes=5)), 'd2') == 'stale'
+    assert card.id not in [c.id for c in sprint.cards_with_issues]
+
+
+def test_event_is_added_once(sprint, board):
+    applier = WebhookApplier(sprint)
+    card = next(c for c in sprint.cards_with_issues if c.repo.name == 'api')
+    issue = dict(board.issue('api', card.issue_num), updated_at=date2str(card.issue.updated_at + timedelta(minutes=1)))
+    payload = {'action': 'labeled', 'issue': issue, 'label': {'name': '8'}, 'repository': repository}
+    num_events = len(card.events)
+
+    assert applier.apply('issues', payload, 'd1') == 'applied'
+    # the same change delivered again with another id, e.g. after a redelivery from the settings
+    assert applier.apply('issues', payload, 'd2') == 'stale'
+    assert len(card.events) == num_events + 1 and card.events[-1].label == '8'
+
+
+def test_dismissed_review_stays_dismissed(sprint):
+    applier = WebhookApplier(sprint)
+    pr = next(pr for pr in sprint.prs if pr.repo.name == 'api')
+    pr_dict = {'number': pr.number}
+    review = {'html_url': pr.url + '#pullrequestreview-1', 'user': {'login': 'alice'}, 'state': 'approved', 'submitted_at': date2str(pr.updated_at)}
+
+    assert applier.apply('pull_request_review', {'action': 'dismissed', 'review': review, 'pull_request': pr_dict, 'repository': repository}, 'd1') == 'applied'
+    assert applier.apply('pull_request_review', {'action': 'submitted', 'review': review, 'pull_request': pr_dict, 'repository': repository}, 'd2') == 'stale'
+    assert next(r for r in pr.reviews if r.url == review['html_url']).state == Review.states.DISMISSED
+
+
+def test_card_moved_to_a_column_that_cannot_be_fetched_is_kept(sprint, board):
+    applier = WebhookApplier(sprint)
+    card = sprint.cards_with_issues[0]
+    col = card.col
+    # the column is not on the board, the fake GitHub answers 404 like after an error
+    payload = card_payload(card, 999999, card.updated_at + timedelta(hours=1))
+
+    assert applier.apply('project_card', payload, 'd1') == 'failed'
+    assert card.col is col and card in sprint.cards_with_issues and card.id not in applier.deleted
+    # the delivery is not remembered, a redelivery is applied once the column can be fetched
+    board.columns.append(dict(board.columns[0], id=999999, name='Blocked'))
+    assert applier.apply('project_card', payload, 'd1') == 'applied'
+    assert card.col.id == 999999
+
+
+def test_new_card_gets_the_current_issue(sprint, board, monkeypatch):
+    applier = WebhookApplier(sprint)
+    card = next(c for c in sprint.cards_with_issues if c.repo.name == 'api')
+    issue = board.issue
+    updated_at = date2str(card.issue.updated_at + timedelta(minutes=1))
+    # the issue was fetched with the sprint and changed since
+    monkeypatch.setattr(board, 'issue', lambda repo, number: dict(issue(repo, number), title='changed', updated_at=updated_at))
+    payload = card_payload(card, other_column(board, card), card.updated_at + timedelta(hours=1), action='created')
+    payload['project_card']['id'] = 999999
+
+    assert applier.apply('project_card', payload, 'd1') == 'applied'
+    new_card = applier.cards[999999]
+    assert new_card.issue is card.issue is sprint.ghh.issues[(card.repo, card.issue_num)]
+    assert card.issue.title == 'changed'
+
+
+def test_refreshed_server_keeps_the_deliveries(sprint, board):
+    server = SprintServer(sprint, port=0)
+    server.refresh()
+    card = sprint.cards_with_issues[0]
+    payload = card_payload(card, card.col.id, card.updated_at + timedelta(hours=1), action='deleted')
+
+    assert server.apply_webhook('project_card', payload, 'd1') == 'applied'
+    board.cards[card.col.id] = [c for c in board.cards[card.col.id] if c['id'] != card.id]
+    server.refresh()
+    assert server.apply_webhook('project_card', payload, 'd1') == 'duplicate'
+    # a late move of the deleted card must not bring it back
+    moved = card_payload(card, other_column(board, card), card.updated_at + timedelta(minutes=30))
+    assert server.apply_webhook('project_card', moved, 'd2') == 'stale'
+
+
+def test_webhooks_need_a_valid_signature(sprint, board):
+    server = SprintServer(sprint, port=0, webhook_secret='s3cret')
+    server.start()
+    card = sprint.cards_with_issues[0]
+    body = json.dumps(card_payload(card, other_column(board, card), card.updated_at + timedelta(hours=1))).encode()
+
+    def post(signature: str, delivery: str) -> int:
+        headers = {'X-GitHub-Event': 'project_card', 'X-GitHub-Delivery': delivery, 'Content-Type': 'application/json'}
+        if signature:
+            headers['X-Hub-Signature-256'] = signature
+        request = urllib.request.Request('http://{}:{}/webhook'.format(*server.address[:2]), data=body, headers=headers)
+        try:
+            with urllib.request.urlopen(request) as r:
+                return r.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    try:
+        statuses = [post(None, 'd0'), post(sign('wrong', body), 'd0'), post(sign('s3cret', body + b' '), 'd0'),
+                    post(sign('s3cret', body), 'd1'), post(sign('s3cret', body), 'd1')]
+        deadline = time.time() + 10
+        while sum(server.webhook_statuses.values()) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.stop()
+
+    assert statuses == [401, 401, 401, 202, 202]
+    assert dict(server.webhook_statuses) == {'applied': 1, 'duplicate': 1}